@@ -1,25 +1,86 @@
-from openai import AzureOpenAI
-from config import AZURE_OPENAI_KEY, AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_MODEL, AZURE_OPENAI_API_VERSION
+from config import (EMBEDDING_BATCH_MAX_INPUTS, EMBEDDING_BATCH_MAX_TOKENS, EMBEDDING_CHUNK_CHARS,
+                    FEATURE_STORE_VECTOR_DTYPE)
+from embedding_cache import get_cache
+from embeddings import get_provider, estimate_tokens
+from feature_store import (EMPTY, HAS_EMBEDDING, HAS_SKILLS_EMBEDDING, SENIORITY_CODES, SENIORITY_NAMES,
+                           FeatureRecord, ResumeFeatures, get_feature_store)
+from instrumentation import instrumented, request_trace, stage
+from score_cache import get_score_cache, text_digest
+from section_embeddings import SECTIONS, chunk_text, get_section_store, pool_resume, pool_vectors
+from skill_bitsets import and_count, encode
+from skill_taxonomy import get_taxonomy, build_trie_pattern
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import lru_cache
+import copy
+import inspect
 import json
 import re
 import numpy as np
 
-client = AzureOpenAI(
-    api_key=AZURE_OPENAI_KEY,
-    api_version=AZURE_OPENAI_API_VERSION,
-    azure_endpoint=AZURE_OPENAI_ENDPOINT
-)
+def pack_embedding_batches(texts, max_inputs=EMBEDDING_BATCH_MAX_INPUTS, max_tokens=EMBEDDING_BATCH_MAX_TOKENS):
+    """Dzieli teksty na paczki mieszczące się w limicie liczby wejść i tokenów na jedno żądanie."""
+    batches = []
+    batch = []
+    batch_tokens = 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if batch and (len(batch) >= max_inputs or batch_tokens + tokens > max_tokens):
+            batches.append(batch)
+            batch = []
+            batch_tokens = 0
+        batch.append(text)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+@instrumented()
+def get_embeddings(texts):
+    """
+    Pobiera embeddingi dla listy tekstów od dostawcy z konfiguracji (EMBEDDING_PROVIDER),
+    pakując je w jak najmniej żądań.
+    Zwraca listę w kolejności wejścia; puste teksty dają None (jak w get_embedding).
+    Teksty z trwałego cache (embedding_cache) i duplikaty nie są wysyłane ponownie.
+    """
+    results = [None] * len(texts)
+    provider = get_provider()
+    namespace = provider.cache_namespace
+    cache = get_cache() if provider.remote else None
+    pending = {}
+    
+    for i, text in enumerate(texts):
+        if not text or not text.strip():
+            continue
+        text = text[:8000]
+        if cache is not None:
+            cached = cache.get(namespace, text)
+            if cached is not None:
+                results[i] = cached
+                continue
+        pending.setdefault(text, []).append(i)
+    
+    batches = pack_embedding_batches(list(pending)) if provider.remote else [list(pending)]
+    for batch in batches:
+        if not batch:
+            continue
+        with stage("embedding_api", size=len(batch)):
+            embeddings = provider.embed_batch(batch)
+        for text, embedding in zip(batch, embeddings):
+            if cache is not None:
+                cache.put(namespace, text, embedding)
+            for i in pending[text]:
+                results[i] = embedding
+    
+    return results
 
 def get_embedding(text):
-    """Pobiera embedding dla danego tekstu używając Azure OpenAI."""
-    if not text or not text.strip():
-        return None
-    
-    response = client.embeddings.create(
-        model=AZURE_OPENAI_MODEL,
-        input=text[:8000]  
-    )
-    return response.data[0].embedding
+    """
+    Pobiera embedding dla danego tekstu używając Azure OpenAI.
+    Wyniki trafiają do trwałego cache (embedding_cache), więc powtórzony tekst nie wymaga wywołania API.
+    """
+    return get_embeddings([text])[0]
 
 def cosine_similarity(vec1, vec2):
     """Oblicza podobieństwo cosinusowe między dwoma wektorami."""
@@ -27,8 +88,12 @@ def cosine_similarity(vec1, vec2):
         return 0.0
     vec1 = np.array(vec1)
     vec2 = np.array(vec2)
-    return np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
+    norms = np.linalg.norm(vec1) * np.linalg.norm(vec2)
+    if not norms:
+        return 0.0
+    return np.dot(vec1, vec2) / norms
 
+@instrumented()
 def extract_experience_years(text):
     """Ekstrahuje lata doświadczenia z tekstu - sumuje wszystkie okresy pracy."""
     text_lower = text.lower()
@@ -78,6 +143,7 @@ def extract_experience_years(text):
     
     return max(max_explicit_years, total_years_from_dates)
 
+@instrumented()
 def extract_seniority_level(text):
     """Ekstrahuje poziom zaawansowania z tekstu."""
     text_lower = text.lower()
@@ -92,6 +158,7 @@ def extract_seniority_level(text):
     
     return None
 
+@instrumented()
 def extract_keywords(text):
     """Ekstrahuje kluczowe słowa z tekstu (w tym techniczne)."""
     text = text.lower()
@@ -112,72 +179,100 @@ def extract_keywords(text):
     return set(keywords)
 
 def normalize_tech_term(term):
-    """Normalizuje terminy techniczne do wspólnych grup."""
-    term_lower = term.lower()
-    
-    sql_variants = ['sql', 'postgresql', 'postgres', 'mysql', 'mssql', 'oracle', 'sqlite', 'mariadb']
-    if any(sql in term_lower for sql in sql_variants):
-        return 'sql'
-    
-    if 'node' in term_lower:
-        return 'node.js'
-    
-    return term_lower
+    """Normalizuje terminy techniczne do wspólnych grup (aliasy z taksonomii umiejętności)."""
+    return get_taxonomy().normalize(term)
 
+@instrumented()
 def extract_technical_terms(text):
     """Ekstrahuje techniczne terminy, frameworki, języki programowania, itp."""
-    # Lista technologii 
-    tech_patterns = [
-        r'\b(python|java|javascript|typescript|c\+\+|c#|ruby|php|swift|kotlin|go|rust)\b',
-        r'\b(react|angular|vue|django|flask|spring|node\.?js|express|fastapi)\b',
-        r'\b(docker|kubernetes|aws|azure|gcp|terraform|jenkins|gitlab|github)\b',
-        r'\b(sql|postgresql|postgres|mysql|mssql|mongodb|redis|elasticsearch|oracle|sqlite|mariadb)\b',
-        r'\b(git|agile|scrum|ci\/cd|devops|rest|api|microservices)\b',
-        r'\b(machine learning|ai|deep learning|nlp|computer vision|data science)\b',
-    ]
-    
-    found_terms = set()
-    text_lower = text.lower()
-    
-    for pattern in tech_patterns:
-        matches = re.findall(pattern, text_lower, re.IGNORECASE)
-        found_terms.update(matches)
-    
-    normalized_terms = {normalize_tech_term(term) for term in found_terms}
-    
-    return normalized_terms
+    return get_taxonomy().extract(text)
+
+REQUIRED_HEADERS = [
+    ['requirements', 'requirement', 'required', 'must have', 'must-have', 'wymagania', 'wymagane'],
+    ['obowiązkowe', 'necessary'],
+]
+REQUIRED_SECTION_STOPS = ['nice to have', 'nice-to-have', 'preferred', 'optional', 'mile widziane', 'dodatkowo']
+NICE_HEADERS = [
+    ['nice to have', 'nice-to-have', 'preferred', 'optional', 'mile widziane', 'dodatkowo', 'would be plus'],
+    ['desirable', 'bonus'],
+]
+PARAGRAPH_BREAK = '\n\n'
+
+def _alternation(words):
+    return '|'.join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+# Tekst jest już zamieniony na małe litery, więc wzorce nie potrzebują IGNORECASE (który wyłącza szybkie przeskakiwanie)
+_SECTION_HEADER_PATTERN = re.compile(
+    '(' + build_trie_pattern([word for group in REQUIRED_HEADERS + NICE_HEADERS for word in group]) + ')'
+)
+# Nagłówek = słowo kluczowe + dwukropek/białe znaki; sprawdzane tylko na pozycjach znalezionych przez skaner
+_REQUIRED_HEADER_PATTERNS = [re.compile(r'(?:' + _alternation(group) + r')[:\s]+') for group in REQUIRED_HEADERS]
+_NICE_HEADER_PATTERNS = [re.compile(r'(?:' + _alternation(group) + r')[:\s]+') for group in NICE_HEADERS]
+_REQUIRED_HEADER_WORDS = [set(group) for group in REQUIRED_HEADERS]
+_NICE_HEADER_WORDS = [set(group) for group in NICE_HEADERS]
+_REQUIRED_STOP_PATTERN = re.compile(_alternation(REQUIRED_SECTION_STOPS))
+
+def _find_headers(text):
+    """
+    Jeden skan tekstu: dla każdej grupy nagłówków zwraca pozycję początku treści
+    pierwszego (najbardziej na lewo) poprawnego nagłówka albo None.
+    """
+    groups = list(zip(_REQUIRED_HEADER_WORDS, _REQUIRED_HEADER_PATTERNS)) + list(zip(_NICE_HEADER_WORDS, _NICE_HEADER_PATTERNS))
+    starts = [None] * len(groups)
+    missing = len(groups)
+    
+    search = _SECTION_HEADER_PATTERN.search
+    pos = 0
+    while missing:
+        marker = search(text, pos)
+        if not marker:
+            break
+        pos = marker.start()
+        token = marker.group(1)
+        for i, (words, pattern) in enumerate(groups):
+            if starts[i] is None and token in words:
+                header = pattern.match(text, pos)
+                if header:
+                    starts[i] = header.end()
+                    missing -= 1
+        # Kolejne wyszukiwanie od następnego znaku - znaczniki mogą na siebie nachodzić
+        pos += 1
+    
+    n_required = len(_REQUIRED_HEADER_PATTERNS)
+    return starts[:n_required], starts[n_required:]
+
+def _section_end(text, start, stop_pos):
+    """Koniec sekcji: znacznik końca (jeśli jest) albo koniec tekstu (przed końcowym \\n)."""
+    end = len(text) - 1 if text.endswith('\n') and start < len(text) else len(text)
+    if stop_pos != -1:
+        end = min(end, stop_pos)
+    return end
 
+@instrumented()
 def parse_job_requirements(job_description):
-    """Rozdziela wymagania na required i nice-to-have."""
+    """
+    Rozdziela wymagania na required i nice-to-have.
+    Jeden liniowy skan znajduje nagłówki sekcji, a koniec każdej sekcji szukany jest raz, od jej początku.
+    """
     text_lower = job_description.lower()
+    required_headers, nice_headers = _find_headers(text_lower)
     
     required_section = ""
     nice_section = ""
     
-    required_patterns = [
-        r'(requirements?|required|must have|must-have|wymagania|wymagane)[:\s]+(.*?)(?=nice to have|nice-to-have|preferred|optional|mile widziane|dodatkowo|$)',
-        r'(obowiązkowe|necessary)[:\s]+(.*?)(?=nice to have|nice-to-have|preferred|optional|mile widziane|dodatkowo|$)',
-    ]
-    
-    nice_patterns = [
-        r'(nice to have|nice-to-have|preferred|optional|mile widziane|dodatkowo|would be plus)[:\s]+(.*?)(?=\n\n|$)',
-        r'(desirable|bonus)[:\s]+(.*?)(?=\n\n|$)',
-    ]
-    
-    for pattern in required_patterns:
-        match = re.search(pattern, text_lower, re.IGNORECASE | re.DOTALL)
-        if match:
-            required_section = match.group(2)
-            break
+    required_start = next((start for start in required_headers if start is not None), None)
+    if required_start is not None:
+        stop = _REQUIRED_STOP_PATTERN.search(text_lower, required_start)
+        end = _section_end(text_lower, required_start, stop.start() if stop else -1)
+        required_section = text_lower[required_start:end]
     
     if not required_section:
         required_section = job_description
     
-    for pattern in nice_patterns:
-        match = re.search(pattern, text_lower, re.IGNORECASE | re.DOTALL)
-        if match:
-            nice_section = match.group(2)
-            break
+    nice_start = next((start for start in nice_headers if start is not None), None)
+    if nice_start is not None:
+        end = _section_end(text_lower, nice_start, text_lower.find(PARAGRAPH_BREAK, nice_start))
+        nice_section = text_lower[nice_start:end]
     
     return required_section, nice_section
 
@@ -213,20 +308,459 @@ def extract_text_from_field(field):
     else:
         return str(field)
 
+class JobProfile:
+    """
+    Prekompilowany profil stanowiska - wszystko, co zależy wyłącznie od opisu oferty.
+    Budowany raz na ofertę i współdzielony przez wszystkich kandydatów.
+    Embedding oferty pobierany jest leniwie, przy pierwszym użyciu.
+    """
+
+    def __init__(self, job_description):
+        self.description = job_description
+        self._embedding = None
+        self._embedding_loaded = False
+
+        self.required_text, self.nice_text = parse_job_requirements(job_description)
+        self.seniority = extract_seniority_level(job_description)
+        self.years = extract_experience_years(job_description)
+        self.keywords = extract_keywords(job_description)
+        self.tech_required = extract_technical_terms(self.required_text) if self.required_text else set()
+        self.tech_nice = extract_technical_terms(self.nice_text) if self.nice_text else set()
+        self.tech_all = self.tech_required | self.tech_nice
+
+    @property
+    def embedding(self):
+        if not self._embedding_loaded:
+            self.set_embedding(get_embedding(self.description))
+        return self._embedding
+
+    @property
+    def has_embedding(self):
+        return self._embedding_loaded
+
+    def without_embedding(self):
+        """Płytka kopia profilu bez embeddingu - do przesłania do procesów roboczych."""
+        profile = copy.copy(self)
+        profile._embedding = None
+        profile._embedding_loaded = False
+        return profile
+
+    def set_embedding(self, embedding):
+        """Ustawia embedding pobrany z zewnątrz (np. w jednej paczce z embeddingami CV)."""
+        self._embedding = embedding
+        self._embedding_loaded = True
+
+
 def analyze_candidate(resume_data, job_description):
     """
     Analizuje kandydata używając embeddings i prostych algorytmów dopasowania.
     Rozróżnia required i nice-to-have wymagania.
+    Czasy etapów (instrumentation) trafiają do result["debug"]["timings"].
     """
-    skills = resume_data.get("skills", [])
-    experience = resume_data.get("experience", [])
-    education = resume_data.get("education", [])
-    
-    skills_text = extract_text_from_field(skills)
-    experience_text = extract_text_from_field(experience)
-    education_text = extract_text_from_field(education)
+    with request_trace("analyze_candidate") as trace:
+        key, result = cached_score(resume_data, job_description)
+        if result is None:
+            with stage("job_profile", size=len(job_description)):
+                job_profile = JobProfile(job_description)
+            result = score_candidate(resume_data, job_profile)
+            store_score(key, result)
+    if trace is not None and "debug" in result:
+        result["debug"]["timings"] = trace.as_dict()
+    return result
+
+
+def rank_candidates(resumes, job_profile, processes=None):
+    """
+    Ocenia wielu kandydatów względem jednej oferty i zwraca wyniki posortowane malejąco po score.
+    `resumes` to lista resume_data albo słownik {id_kandydata: resume_data};
+    każdy wynik dostaje klucz "candidate_id" (indeks z listy lub klucz ze słownika).
+    `job_profile` może być gotowym JobProfile albo tekstem oferty.
+    `processes` > 1 rozdziela ekstrakcję cech leksykalnych na pulę procesów
+    (profil oferty trafia do każdego procesu raz, przy starcie); wyniki są identyczne jak szeregowo.
+    Kandydaci z wynikiem w magazynie wyników (score_cache) nie są oceniani ponownie.
+    """
+    job_description = job_profile.description if isinstance(job_profile, JobProfile) else job_profile
+    labeled = isinstance(resumes, dict)
+    all_items = list(resumes.items() if labeled else enumerate(resumes))
+
+    version = scorer_version() if get_score_cache() is not None else None
+    keys = []
+    results = []
+    for _, resume_data in all_items:
+        key, result = cached_score(resume_data, job_description, version)
+        keys.append(key)
+        results.append(result)
+    pending = [n for n, result in enumerate(results) if result is None]
+    
+    if pending:
+        if not isinstance(job_profile, JobProfile):
+            job_profile = JobProfile(job_profile)
+        items = [all_items[n] for n in pending]
+        for n, result in zip(pending, _rank_uncached(items, job_profile, processes)):
+            store_score(keys[n], result, label=str(all_items[n][0]) if labeled else None)
+            results[n] = result
+    
+    for (candidate_id, _), result in zip(all_items, results):
+        result["candidate_id"] = candidate_id
+
+    results.sort(key=lambda r: r["score"], reverse=True)
+    return results
+
+
+def _rank_uncached(items, job_profile, processes):
+    """Ocena listy (id, resume_data) bez magazynu wyników - zwraca wyniki w kolejności wejścia."""
+    # Embeddingi sekcji wszystkich CV (i ewentualnie oferty) pobierane w paczkach naraz
+    job_texts = [] if job_profile.has_embedding else [job_profile.description]
+    pairs, job_embeddings = _embed_resumes([resume_data for _, resume_data in items], job_texts)
+    if job_texts:
+        job_profile.set_embedding(job_embeddings[0])
+
+    tasks = []
+    for (_, resume_data), (resume_embedding, skills_embedding) in zip(items, pairs):
+        skills_text, resume_full_text = resume_texts(resume_data)
+        overall_similarity = cosine_similarity(job_profile.embedding, resume_embedding)
+        skills_similarity = cosine_similarity(job_profile.embedding, skills_embedding) if skills_embedding is not None else 0
+        tasks.append((skills_text, resume_full_text, overall_similarity, skills_similarity))
+    
+    if processes and processes > 1 and len(tasks) > 1:
+        chunksize = max(1, len(tasks) // (processes * 4))
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_scoring_worker,
+                                 initargs=(job_profile.without_embedding(),)) as executor:
+            scored = list(executor.map(_score_in_worker, tasks, chunksize=chunksize))
+    else:
+        scored = [score_resume_texts(s, r, job_profile, o, k) for s, r, o, k in tasks]
+    return scored
+
+
+# Ręczna część wersji logiki oceny - podbij przy zmianie wpływającej na wynik,
+# której nie widać w kodzie SCORING_CODE (np. w zależnościach spoza tego modułu)
+SCORER_VERSION = 2
+
+
+@lru_cache(maxsize=1)
+def _scoring_code_digest():
+    """Odcisk kodu i stałych, od których zależy wynik - zmiana wag lub progów zmienia wersję."""
+    parts = []
+    for obj in (score_resume_texts, extract_resume_features, score_resume_features, score_components,
+                score_components_batch, score_candidate, resume_texts, resume_sections, get_embeddings,
+                _embed_resumes, chunk_text, pool_vectors, pool_resume, extract_text_from_field, JobProfile,
+                parse_job_requirements, _find_headers, _section_end, extract_experience_years,
+                extract_seniority_level, extract_keywords, cosine_similarity):
+        try:
+            parts.append(inspect.getsource(obj))
+        except (OSError, TypeError):
+            parts.append(getattr(obj, "__qualname__", type(obj).__qualname__))
+    parts.append(repr((REQUIRED_HEADERS, REQUIRED_SECTION_STOPS, NICE_HEADERS, PARAGRAPH_BREAK, EMBEDDING_CHUNK_CHARS,
+                       RECOMMENDATION_RULES, _SENIORITY_LEVEL_BY_CODE.tolist())))
+    return text_digest(*parts)[:16]
+
+
+def scorer_version():
+    """
+    Wersja logiki oceny: SCORER_VERSION, odcisk kodu, taksonomia, dostawca embeddingów i bieżący rok
+    (lata z zakresów "2019-present" zależą od daty oceny).
+    """
+    return (f"{SCORER_VERSION}-{_scoring_code_digest()}-{get_taxonomy().fingerprint}"
+            f"-{get_provider().cache_namespace}-{date.today().year}")
+
+
+def score_key(resume_data, job_description, version=None):
+    """Klucz magazynu wyników: (hash tekstów CV, hash oferty, wersja logiki oceny)."""
+    return text_digest(*resume_texts(resume_data)), text_digest(job_description), version or scorer_version()
+
+
+def cached_score(resume_data, job_description, version=None):
+    """Zwraca (klucz, zapisany wynik albo None); klucz jest None, gdy magazyn jest wyłączony."""
+    cache = get_score_cache()
+    if cache is None:
+        return None, None
+    with stage("score_cache"):
+        key = score_key(resume_data, job_description, version)
+        return key, cache.get(*key)
+
+
+def store_score(key, result, label=None):
+    cache = get_score_cache()
+    if cache is not None and key is not None:
+        cache.put(*key, result, label=label)
+
+
+def score_history(job_description, all_versions=False, limit=None):
+    """
+    Zapisane wyniki dla oferty (od najwyższego score) - bez ponownej oceny.
+    Domyślnie tylko z bieżącej wersji logiki oceny; `all_versions` zwraca też starsze.
+    """
+    cache = get_score_cache()
+    if cache is None:
+        return []
+    version = None if all_versions else scorer_version()
+    return cache.history(text_digest(job_description), version, limit=limit)
+
+
+# Ręczna część schematu magazynu cech - podbij przy zmianie zapisywanych cech,
+# której nie widać w kodzie FEATURE_CODE
+FEATURE_SCHEMA_VERSION = 1
+# Ile CV naraz trafia do ekstrakcji, embeddingów i jednego dopisania do magazynu cech
+FEATURE_INGEST_BATCH = 1000
+
+
+@lru_cache(maxsize=1)
+def _feature_code_digest():
+    """Odcisk kodu, od którego zależą zapisane cechy CV (ekstraktory, teksty sekcji, uśrednianie wektorów)."""
+    parts = []
+    for obj in (extract_resume_features, resume_texts, resume_sections, extract_text_from_field,
+                extract_experience_years, extract_seniority_level, extract_keywords, _embed_resumes,
+                chunk_text, pool_vectors, pool_resume):
+        try:
+            parts.append(inspect.getsource(obj))
+        except (OSError, TypeError):
+            parts.append(obj.__qualname__)
+    parts.append(repr(EMBEDDING_CHUNK_CHARS))
+    return text_digest(*parts)[:16]
+
+
+def feature_schema():
+    """
+    Schemat magazynu cech: FEATURE_SCHEMA_VERSION, odcisk ekstraktorów, taksonomia, dostawca embeddingów,
+    format zapisu wektorów i bieżący rok (lata z zakresów "2019-present" zależą od daty ekstrakcji).
+    """
+    return (f"{FEATURE_SCHEMA_VERSION}-{_feature_code_digest()}-{get_taxonomy().fingerprint}"
+            f"-{get_provider().cache_namespace}-{FEATURE_STORE_VECTOR_DTYPE}-{date.today().year}")
+
+
+def ingest_features(resumes, store=None, processes=None, batch_size=FEATURE_INGEST_BATCH):
+    """
+    Zapisuje cechy CV w magazynie cech (feature_store) - raz na treść CV.
+    `resumes` jak w rank_candidates (lista albo {id_kandydata: resume_data}); id trafia do magazynu
+    jako etykieta. CV już obecne w magazynie są pomijane, nowe dopisywane paczkami po `batch_size`.
+    Gdy schemat magazynu jest nieaktualny (zmiana ekstraktorów, taksonomii, dostawcy embeddingów),
+    magazyn jest czyszczony i cechy liczone od nowa.
+    `processes` > 1 rozdziela ekstrakcję regex na pulę procesów.
+    Zwraca numery wierszy magazynu w kolejności wejścia.
+    """
+    store = store if store is not None else get_feature_store()
+    schema = feature_schema()
+    if store.schema != schema:
+        store.reset(schema, FEATURE_STORE_VECTOR_DTYPE)
+    labeled = isinstance(resumes, dict)
+    items = list(resumes.items() if labeled else enumerate(resumes))
+    
+    rows = [None] * len(items)
+    pending = {}
+    for n, (candidate_id, resume_data) in enumerate(items):
+        resume_hash = text_digest(*resume_sections(resume_data).values())
+        row = store.find(resume_hash)
+        if row is not None:
+            rows[n] = row
+        else:
+            pending.setdefault(resume_hash, []).append(n)
+    
+    executor = ProcessPoolExecutor(max_workers=processes) if processes and processes > 1 else None
+    try:
+        hashes = list(pending)
+        for start in range(0, len(hashes), batch_size):
+            batch = hashes[start:start + batch_size]
+            resume_batch = [items[pending[resume_hash][0]][1] for resume_hash in batch]
+            full_texts = [resume_texts(resume_data)[1] for resume_data in resume_batch]
+            if executor is not None:
+                chunksize = max(1, len(full_texts) // (processes * 4))
+                features = list(executor.map(extract_resume_features, full_texts, chunksize=chunksize))
+            else:
+                features = [extract_resume_features(text) for text in full_texts]
+            pairs = embed_resumes(resume_batch)
+            
+            first_row = store.append(
+                FeatureRecord(resume_hash, str(items[pending[resume_hash][0]][0]) if labeled else None,
+                              resume_features if text.strip() else None, embedding, skills_embedding)
+                for resume_hash, text, resume_features, (embedding, skills_embedding)
+                in zip(batch, full_texts, features, pairs)
+            )
+            for offset, resume_hash in enumerate(batch):
+                for n in pending[resume_hash]:
+                    rows[n] = first_row + offset
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return rows
+
+
+# Liczności dopasowania umiejętności oferty dla każdego wiersza magazynu cech (tablice NumPy)
+SkillMatches = namedtuple("SkillMatches", ["required", "nice", "all"])
+
+
+def pool_skill_matches(job_profile, store):
+    """
+    Dopasowanie terminów technicznych oferty do wszystkich CV w magazynie cech naraz:
+    AND masek bitowych i popcount, bez zbiorów Pythona na kandydata. Terminy oferty spoza
+    słownika magazynu (nie ma ich żadne CV) nie mają bitu i nie zwiększają liczności.
+    """
+    bits = store.tech_bits()
+    index = store.vocab_index("tech")
+    words = bits.shape[1]
+    required = encode(job_profile.tech_required, index, words)
+    nice = encode(job_profile.tech_nice, index, words)
+    return SkillMatches(
+        required=and_count(bits, required),
+        nice=and_count(bits, nice),
+        all=and_count(bits, required | nice),
+    )
+
+
+def pool_keyword_matches(job_profile, store):
+    """Liczba słów kluczowych oferty w każdym CV z magazynu cech (jedno przejście po identyfikatorach)."""
+    index = store.vocab_index("keywords")
+    job_ids = np.array(sorted(index[word] for word in job_profile.keywords if word in index), dtype=np.uint32)
+    offsets = store.offsets("keywords")
+    hits = np.flatnonzero(np.isin(store.column("keyword_ids"), job_ids))
+    rows = np.searchsorted(offsets, hits, side="right") - 1
+    return np.bincount(rows, minlength=len(offsets) - 1)
+
+
+def pool_similarities(job_embedding, store, block_rows=65536):
+    """
+    Podobieństwo cosinusowe oferty do wektora CV i wektora skills każdego wiersza magazynu cech
+    (mnożenie macierz-wektor blokami w float64). Wiersze bez wektora dostają 0 - jak cosine_similarity z None.
+    """
+    rows = len(store)
+    overall = np.zeros(rows)
+    skills = np.zeros(rows)
+    if job_embedding is None or not rows or not store.dim:
+        return overall, skills
+    job = np.asarray(job_embedding, dtype=np.float64)
+    job_norm = np.linalg.norm(job)
+    flags = store.column("flags")
+    for name, flag, out in (("embedding", HAS_EMBEDDING, overall), ("skills_embedding", HAS_SKILLS_EMBEDDING, skills)):
+        for start in range(0, rows, block_rows):
+            block = np.asarray(store.vectors(name, start, start + block_rows), dtype=np.float64)
+            norms = job_norm * np.sqrt(np.einsum("ij,ij->i", block, block))
+            np.divide(block @ job, norms, out=out[start:start + len(block)], where=norms != 0)
+        out[(flags & flag) == 0] = 0.0
+    return overall, skills
+
+
+def rank_stored(job_profile, store=None, rows=None, limit=None):
+    """
+    Ocenia kandydatów z magazynu cech względem oferty - bez ekstrakcji regex i bez embeddingów CV
+    (potrzebny jest tylko embedding oferty). Wyniki jak w rank_candidates, posortowane malejąco po score;
+    "candidate_id" to etykieta z ingest_features albo numer wiersza. `rows` zawęża ocenę do wybranych wierszy.
+    Cała pula oceniana jest wektorowo (pool_skill_matches, pool_similarities, score_components_batch),
+    a pełny wynik z etykietami (strong_matches, missing_requirements) budowany jest tylko dla
+    `limit` najlepszych kandydatów (domyślnie dla wszystkich).
+    """
+    store = store if store is not None else get_feature_store()
+    if store.schema != feature_schema():
+        raise ValueError("Magazyn cech ma nieaktualny schemat - uruchom ponownie ingest_features")
+    if not isinstance(job_profile, JobProfile):
+        job_profile = JobProfile(job_profile)
+    
+    skills = pool_skill_matches(job_profile, store)
+    overall_similarity, skills_similarity = pool_similarities(job_profile.embedding, store)
+    components = score_components_batch(
+        job_profile, store.column("seniority"), store.column("years"), pool_keyword_matches(job_profile, store),
+        skills.required, skills.nice, skills.all, overall_similarity, skills_similarity,
+    )
+    scores = np.where(store.column("flags") & EMPTY, 0, components["final_score"])
+    rows = np.arange(len(store)) if rows is None else np.asarray(rows, dtype=np.int64)
+    
+    # Stabilnie, jak sort() w rank_candidates - równe wyniki w kolejności wierszy
+    order = rows[np.argsort(-scores[rows], kind="stable")[:limit]].tolist()
+    labels = store.labels()
+    results = []
+    for row in order:
+        features = store.features(row)
+        if features is None:
+            result = score_resume_texts("", "", job_profile, 0.0, 0)
+        else:
+            result = score_resume_features(features, job_profile, overall_similarity[row], skills_similarity[row])
+        result["candidate_id"] = labels[row] if labels[row] is not None else row
+        results.append(result)
+    return results
+
+
+# Profil oferty w procesie roboczym - ustawiany raz przez initializer puli
+_worker_job_profile = None
+
+
+def _init_scoring_worker(job_profile):
+    global _worker_job_profile
+    _worker_job_profile = job_profile
+
+
+def _score_in_worker(task):
+    skills_text, resume_full_text, overall_similarity, skills_similarity = task
+    return score_resume_texts(skills_text, resume_full_text, _worker_job_profile, overall_similarity, skills_similarity)
+
+
+def resume_sections(resume_data):
+    """Teksty sekcji CV: {"skills", "experience", "education"}."""
+    return {name: extract_text_from_field(resume_data.get(name, [])) for name in SECTIONS}
+
+
+def resume_texts(resume_data):
+    """Zwraca (skills_text, resume_full_text) - teksty CV używane do ekstrakcji cech."""
+    sections = resume_sections(resume_data)
     
-    resume_full_text = f"{skills_text} {experience_text} {education_text}".strip()
+    resume_full_text = f"{sections['skills']} {sections['experience']} {sections['education']}".strip()
+    return sections["skills"], resume_full_text
+
+
+def embed_resumes(resumes):
+    """
+    Zwraca dla każdego CV parę (wektor CV, wektor skills) uśrednioną z embeddingów fragmentów sekcji
+    (None dla pustego CV / pustych skills). Sekcje każdego CV embeddowane są raz - kolejne wywołania
+    biorą wektory z magazynu section_embeddings.
+    """
+    return _embed_resumes(resumes)[0]
+
+
+def _embed_resumes(resumes, extra_texts=()):
+    """embed_resumes + embeddingi `extra_texts` (np. oferty) pobrane w tej samej paczce."""
+    provider = get_provider()
+    namespace = f"{provider.cache_namespace}:{EMBEDDING_CHUNK_CHARS}"
+    store = get_section_store()
+    pairs = [(None, None)] * len(resumes)
+    chunks_to_embed = []
+    pending = []
+    
+    for i, resume_data in enumerate(resumes):
+        sections = resume_sections(resume_data)
+        if not any(text.strip() for text in sections.values()):
+            continue
+        resume_hash = text_digest(*sections.values())
+        stored = store.get(resume_hash, namespace) if store is not None else None
+        if stored is not None:
+            pairs[i] = pool_resume(stored)
+            continue
+        layout = {}
+        for name, text in sections.items():
+            chunks = chunk_text(text)
+            if chunks:
+                layout[name] = (len(chunks_to_embed), chunks)
+                chunks_to_embed.extend(chunks)
+        pending.append((i, resume_hash, layout))
+    
+    texts = chunks_to_embed + list(extra_texts)
+    embeddings = get_embeddings(texts) if texts else []
+    
+    for i, resume_hash, layout in pending:
+        sections = {}
+        for name, (start, chunks) in layout.items():
+            lengths = [len(chunk) for chunk in chunks]
+            sections[name] = (pool_vectors(embeddings[start:start + len(chunks)], lengths), sum(lengths))
+        if store is not None:
+            store.put(resume_hash, namespace, sections, {name: len(chunks) for name, (_, chunks) in layout.items()})
+        pairs[i] = pool_resume(sections)
+    
+    return pairs, embeddings[len(chunks_to_embed):]
+
+
+def score_candidate(resume_data, job_profile, resume_embeddings=None):
+    """
+    Ocenia kandydata względem prekompilowanego profilu stanowiska (JobProfile).
+    Liczy wyłącznie cechy po stronie CV - cechy oferty pochodzą z profilu.
+    `resume_embeddings` to opcjonalna para (wektor CV, wektor skills) z embed_resumes.
+    """
+    skills_text, resume_full_text = resume_texts(resume_data)
     
     if not resume_full_text.strip():
         return {
@@ -237,20 +771,64 @@ def analyze_candidate(resume_data, job_description):
             "method": "embedding-based"
         }
     
-    job_embedding = get_embedding(job_description)
-    resume_embedding = get_embedding(resume_full_text)
-    skills_embedding = get_embedding(skills_text) if skills_text.strip() else None
+    if resume_embeddings is None:
+        job_texts = [] if job_profile.has_embedding else [job_profile.description]
+        pairs, job_embeddings = _embed_resumes([resume_data], job_texts)
+        if job_texts:
+            job_profile.set_embedding(job_embeddings[0])
+        resume_embeddings = pairs[0]
     
-    overall_similarity = cosine_similarity(job_embedding, resume_embedding)
-    skills_similarity = cosine_similarity(job_embedding, skills_embedding) if skills_embedding else 0
+    job_embedding = job_profile.embedding
+    resume_embedding, skills_embedding = resume_embeddings
     
-    required_text, nice_text = parse_job_requirements(job_description)
+    overall_similarity = cosine_similarity(job_embedding, resume_embedding)
+    skills_similarity = cosine_similarity(job_embedding, skills_embedding) if skills_embedding is not None else 0
     
-    job_seniority = extract_seniority_level(job_description)
-    resume_seniority = extract_seniority_level(resume_full_text)
+    return score_resume_texts(skills_text, resume_full_text, job_profile, overall_similarity, skills_similarity)
+
+
+def score_resume_texts(skills_text, resume_full_text, job_profile, overall_similarity, skills_similarity):
+    """
+    Część oceny bez embeddingów: ekstrakcja cech leksykalnych CV (regex) i złożenie wyniku
+    z gotowymi podobieństwami embeddingów. Czyste obliczenia CPU - może działać w procesie roboczym.
+    """
+    if not resume_full_text.strip():
+        return {
+            "score": 0,
+            "strong_matches": [],
+            "missing_requirements": ["Brak danych w CV"],
+            "recommendation": "NO",
+            "method": "embedding-based"
+        }
     
-    job_years = extract_experience_years(job_description)
-    resume_years = extract_experience_years(resume_full_text)
+    features = extract_resume_features(resume_full_text)
+    return score_resume_features(features, job_profile, overall_similarity, skills_similarity)
+
+
+def extract_resume_features(resume_full_text):
+    """Cechy leksykalne CV (ResumeFeatures) - jedyna część oceny, która czyta tekst CV."""
+    return ResumeFeatures(
+        seniority=extract_seniority_level(resume_full_text),
+        years=extract_experience_years(resume_full_text),
+        keywords=extract_keywords(resume_full_text),
+        tech=extract_technical_terms(resume_full_text),
+    )
+
+
+def score_components(job_profile, resume_seniority, resume_years, common_keywords,
+                     common_tech_required, common_tech_nice, common_tech_all,
+                     overall_similarity, skills_similarity):
+    """
+    Liczbowa część oceny (bez etykiet): dopasowanie poziomu i lat, współczynniki, final_score i rekomendacja.
+    `common_*` to liczności części wspólnych z ofertą - ze zbiorów (score_resume_features)
+    albo z masek bitowych całej puli (pool_skill_matches).
+    """
+    job_seniority = job_profile.seniority
+    job_years = job_profile.years
+    job_keywords = job_profile.keywords
+    job_tech_required = job_profile.tech_required
+    job_tech_nice = job_profile.tech_nice
+    job_tech_all = job_profile.tech_all
     
     seniority_match = 0.0
     experience_match = 0.0
@@ -281,34 +859,21 @@ def analyze_candidate(resume_data, job_description):
     else:
         experience_match = 1.0  
     
-    job_keywords = extract_keywords(job_description)
-    resume_keywords = extract_keywords(resume_full_text)
-    
-    job_tech_required = extract_technical_terms(required_text) if required_text else set()
-    job_tech_nice = extract_technical_terms(nice_text) if nice_text else set()
-    job_tech_all = job_tech_required | job_tech_nice
-    resume_tech = extract_technical_terms(resume_full_text)
-    
     # Oblicz keyword match ratio
-    common_keywords = job_keywords.intersection(resume_keywords)
-    keyword_match_ratio = len(common_keywords) / len(job_keywords) if job_keywords else 0
+    keyword_match_ratio = common_keywords / len(job_keywords) if job_keywords else 0
     
     # Oblicz technical terms match - oddzielnie dla required i nice-to-have
-    common_tech_required = job_tech_required.intersection(resume_tech)
-    common_tech_nice = job_tech_nice.intersection(resume_tech)
-    common_tech_all = job_tech_all.intersection(resume_tech)
-    
     # Match ratio dla required (ważniejsze - waga 70%)
-    required_match_ratio = len(common_tech_required) / len(job_tech_required) if job_tech_required else 1.0
+    required_match_ratio = common_tech_required / len(job_tech_required) if job_tech_required else 1.0
     
     # Match ratio dla nice-to-have (mniejsza waga - 30%)
-    nice_match_ratio = len(common_tech_nice) / len(job_tech_nice) if job_tech_nice else 1.0
+    nice_match_ratio = common_tech_nice / len(job_tech_nice) if job_tech_nice else 1.0
     
     # Połączony tech match ratio z wagami
     if job_tech_required or job_tech_nice:
         tech_match_ratio = (required_match_ratio * 0.7 + nice_match_ratio * 0.3)
     else:
-        tech_match_ratio = len(common_tech_all) / len(job_tech_all) if job_tech_all else 0
+        tech_match_ratio = common_tech_all / len(job_tech_all) if job_tech_all else 0
     
     # OBLICZANIE WYNIKU:
     # 1. Technical terms match (45%)
@@ -331,6 +896,194 @@ def analyze_candidate(resume_data, job_description):
         normalized_embedding * 10     # Embedding: 10%
     )
     
+    # REKOMENDACJA:
+    # YES jeśli:
+    # - Technical match >= 40% LUB
+    # - Final score >= 45% LUB
+    # - Technical match >= 30% I keyword match >= 25%
+    recommendation = "NO"
+    recommendation_confidence = "low"  # low, medium, high
+    
+    if final_score >= 50:
+        recommendation = "YES"
+        recommendation_reason = "High overall match score"
+        recommendation_confidence = "high"
+    elif tech_match_ratio >= 0.55 and keyword_match_ratio >= 0.25:
+        recommendation = "YES"
+        recommendation_reason = "Strong technical + keyword match"
+        recommendation_confidence = "high"
+    elif tech_match_ratio >= 0.55:
+        recommendation = "YES"
+        recommendation_reason = "Very high technical skills match (verify other aspects)"
+        recommendation_confidence = "medium"  # Żółte kółko - technical >= 55%
+    elif tech_match_ratio >= 0.30 and keyword_match_ratio >= 0.30:
+        recommendation = "YES"
+        recommendation_reason = "Balanced technical + keyword match"
+        recommendation_confidence = "medium"
+    elif final_score >= 45:
+        recommendation = "YES"
+        recommendation_reason = "Acceptable overall match"
+        recommendation_confidence = "medium"
+    else:
+        recommendation_reason = "Insufficient match"
+        recommendation_confidence = "low"
+    
+    return {
+        "seniority_match": seniority_match,
+        "experience_match": experience_match,
+        "keyword_match_ratio": keyword_match_ratio,
+        "required_match_ratio": required_match_ratio,
+        "nice_match_ratio": nice_match_ratio,
+        "tech_match_ratio": tech_match_ratio,
+        "normalized_embedding": normalized_embedding,
+        "experience_score": experience_score,
+        "final_score": final_score,
+        "recommendation": recommendation,
+        "recommendation_reason": recommendation_reason,
+        "recommendation_confidence": recommendation_confidence,
+    }
+
+
+# Kolejne reguły rekomendacji z score_components: (rekomendacja, uzasadnienie, pewność)
+RECOMMENDATION_RULES = (
+    ("YES", "High overall match score", "high"),
+    ("YES", "Strong technical + keyword match", "high"),
+    ("YES", "Very high technical skills match (verify other aspects)", "medium"),
+    ("YES", "Balanced technical + keyword match", "medium"),
+    ("YES", "Acceptable overall match", "medium"),
+    ("NO", "Insufficient match", "low"),
+)
+# Kod SENIORITY_CODES -> poziom z score_components (0 = brak poziomu w CV)
+_SENIORITY_LEVEL_BY_CODE = np.array([{'junior': 1, 'mid': 2, 'senior': 3}.get(SENIORITY_NAMES[code], 0)
+                                     for code in range(len(SENIORITY_CODES))])
+
+
+def score_components_batch(job_profile, resume_seniority, resume_years, common_keywords,
+                           common_tech_required, common_tech_nice, common_tech_all,
+                           overall_similarity, skills_similarity):
+    """
+    Wektorowy odpowiednik score_components dla N kandydatów naraz - te same operacje na float64
+    w tej samej kolejności, więc dla tych samych wejść wyniki są identyczne.
+    `resume_seniority` to kody SENIORITY_CODES, pozostałe argumenty CV to tablice długości N.
+    Zwraca słownik tablic; "rule" to numer reguły z RECOMMENDATION_RULES, a "recommendation"
+    i "recommendation_confidence" to tablice napisów odczytane z tej tabeli.
+    """
+    resume_level = _SENIORITY_LEVEL_BY_CODE[np.asarray(resume_seniority, dtype=np.intp)]
+    resume_years = np.asarray(resume_years)
+    common_keywords = np.asarray(common_keywords, dtype=np.float64)
+    common_tech_required = np.asarray(common_tech_required, dtype=np.float64)
+    common_tech_nice = np.asarray(common_tech_nice, dtype=np.float64)
+    common_tech_all = np.asarray(common_tech_all, dtype=np.float64)
+    overall_similarity = np.asarray(overall_similarity, dtype=np.float64)
+    skills_similarity = np.asarray(skills_similarity, dtype=np.float64)
+    ones = np.ones(len(resume_level))
+    
+    job_seniority = job_profile.seniority
+    job_years = job_profile.years
+    job_keywords = job_profile.keywords
+    job_tech_required = job_profile.tech_required
+    job_tech_nice = job_profile.tech_nice
+    job_tech_all = job_profile.tech_all
+    
+    if job_seniority:
+        job_level = {'junior': 1, 'mid': 2, 'senior': 3}.get(job_seniority, 2)
+        seniority_match = np.select(
+            [resume_level == 0, resume_level >= job_level, resume_level == job_level - 1], [0.0, 1.0, 0.7], 0.3)
+    else:
+        seniority_match = ones
+    
+    if job_years > 0:
+        experience_match = np.select(
+            [resume_years >= job_years, resume_years >= job_years * 0.75, resume_years >= job_years * 0.5],
+            [1.0, 0.8, 0.5], 0.2)
+    else:
+        experience_match = ones
+    
+    keyword_match_ratio = common_keywords / len(job_keywords) if job_keywords else 0 * ones
+    required_match_ratio = common_tech_required / len(job_tech_required) if job_tech_required else ones
+    nice_match_ratio = common_tech_nice / len(job_tech_nice) if job_tech_nice else ones
+    if job_tech_required or job_tech_nice:
+        tech_match_ratio = (required_match_ratio * 0.7 + nice_match_ratio * 0.3)
+    else:
+        tech_match_ratio = common_tech_all / len(job_tech_all) if job_tech_all else 0 * ones
+    
+    embedding_score = np.where(skills_similarity != 0, overall_similarity * 0.5 + skills_similarity * 0.5,
+                               overall_similarity)
+    # fmin/fmax jak min/max Pythona w score_components (NaN nie przechodzi dalej)
+    normalized_embedding = np.fmin(1.0, np.fmax(0.0, (embedding_score - 0.3) / 0.6))
+    experience_score = (seniority_match * 0.5 + experience_match * 0.5)
+    
+    final_score = (
+        tech_match_ratio * 45 +
+        keyword_match_ratio * 25 +
+        experience_score * 20 +
+        normalized_embedding * 10
+    ).astype(np.int64)
+    
+    rule = np.select(
+        [final_score >= 50,
+         (tech_match_ratio >= 0.55) & (keyword_match_ratio >= 0.25),
+         tech_match_ratio >= 0.55,
+         (tech_match_ratio >= 0.30) & (keyword_match_ratio >= 0.30),
+         final_score >= 45],
+        [0, 1, 2, 3, 4], 5).astype(np.int8)
+    
+    return {
+        "seniority_match": seniority_match,
+        "experience_match": experience_match,
+        "keyword_match_ratio": keyword_match_ratio,
+        "required_match_ratio": required_match_ratio,
+        "nice_match_ratio": nice_match_ratio,
+        "tech_match_ratio": tech_match_ratio,
+        "normalized_embedding": normalized_embedding,
+        "experience_score": experience_score,
+        "final_score": final_score,
+        "rule": rule,
+        "recommendation": np.array([r[0] for r in RECOMMENDATION_RULES])[rule],
+        "recommendation_confidence": np.array([r[2] for r in RECOMMENDATION_RULES])[rule],
+    }
+
+
+def score_resume_features(features, job_profile, overall_similarity, skills_similarity):
+    """
+    Złożenie wyniku z gotowych cech CV (extract_resume_features albo magazyn cech)
+    i podobieństw embeddingów.
+    """
+    job_seniority = job_profile.seniority
+    resume_seniority = features.seniority
+    
+    job_years = job_profile.years
+    resume_years = features.years
+    
+    job_keywords = job_profile.keywords
+    resume_keywords = features.keywords
+    
+    job_tech_required = job_profile.tech_required
+    job_tech_nice = job_profile.tech_nice
+    job_tech_all = job_profile.tech_all
+    resume_tech = features.tech
+    
+    common_keywords = job_keywords.intersection(resume_keywords)
+    common_tech_required = job_tech_required.intersection(resume_tech)
+    common_tech_nice = job_tech_nice.intersection(resume_tech)
+    common_tech_all = job_tech_all.intersection(resume_tech)
+    
+    components = score_components(job_profile, resume_seniority, resume_years, len(common_keywords),
+                                  len(common_tech_required), len(common_tech_nice), len(common_tech_all),
+                                  overall_similarity, skills_similarity)
+    seniority_match = components["seniority_match"]
+    experience_match = components["experience_match"]
+    keyword_match_ratio = components["keyword_match_ratio"]
+    required_match_ratio = components["required_match_ratio"]
+    nice_match_ratio = components["nice_match_ratio"]
+    tech_match_ratio = components["tech_match_ratio"]
+    normalized_embedding = components["normalized_embedding"]
+    experience_score = components["experience_score"]
+    final_score = components["final_score"]
+    recommendation = components["recommendation"]
+    recommendation_reason = components["recommendation_reason"]
+    recommendation_confidence = components["recommendation_confidence"]
+    
     strong_matches = []
     
     # Poziom i doświadczenie
@@ -342,16 +1095,16 @@ def analyze_candidate(resume_data, job_description):
     
     # Najpierw required tech 
     if common_tech_required:
-        strong_matches.extend([f"✓ {tech.upper()} (Required)" for tech in list(common_tech_required)[:3]])
+        strong_matches.extend([f"✓ {tech.upper()} (Required)" for tech in sorted(common_tech_required)[:3]])
     
     # Potem nice-to-have tech
     if common_tech_nice:
-        strong_matches.extend([f"✓ {tech.upper()} (Nice-to-have)" for tech in list(common_tech_nice)[:2]])
+        strong_matches.extend([f"✓ {tech.upper()} (Nice-to-have)" for tech in sorted(common_tech_nice)[:2]])
     
     # Keywords
     if common_keywords:
         non_tech_keywords = common_keywords - job_tech_all
-        strong_matches.extend(list(non_tech_keywords)[:2])
+        strong_matches.extend(sorted(non_tech_keywords)[:2])
     
     if not strong_matches:
         strong_matches = ["Ogólne semantyczne dopasowanie profilu"]
@@ -371,52 +1124,20 @@ def analyze_candidate(resume_data, job_description):
     
     missing_tech_required = job_tech_required - resume_tech
     if missing_tech_required:
-        missing_requirements.extend([f"❌ {tech.upper()} (Required!)" for tech in list(missing_tech_required)[:3]])
+        missing_requirements.extend([f"❌ {tech.upper()} (Required!)" for tech in sorted(missing_tech_required)[:3]])
     
     missing_tech_nice = job_tech_nice - resume_tech
     if missing_tech_nice:
-        missing_requirements.extend([f"⚠ {tech.upper()} (Nice-to-have)" for tech in list(missing_tech_nice)[:2]])
+        missing_requirements.extend([f"⚠ {tech.upper()} (Nice-to-have)" for tech in sorted(missing_tech_nice)[:2]])
     
     missing_keywords = job_keywords - resume_keywords - job_tech_all
     if missing_keywords and len(missing_requirements) < 6:
-        important_keywords = [k for k in missing_keywords if len(k) > 4]
+        important_keywords = [k for k in sorted(missing_keywords) if len(k) > 4]
         missing_requirements.extend(list(important_keywords)[:2])
     
     if not missing_requirements:
         missing_requirements = ["✅ Brak kluczowych braków"]
     
-    # REKOMENDACJA:
-    # YES jeśli:
-    # - Technical match >= 40% LUB
-    # - Final score >= 45% LUB
-    # - Technical match >= 30% I keyword match >= 25%
-    recommendation = "NO"
-    recommendation_confidence = "low"  # low, medium, high
-    
-    if final_score >= 50:
-        recommendation = "YES"
-        recommendation_reason = "High overall match score"
-        recommendation_confidence = "high"
-    elif tech_match_ratio >= 0.55 and keyword_match_ratio >= 0.25:
-        recommendation = "YES"
-        recommendation_reason = "Strong technical + keyword match"
-        recommendation_confidence = "high"
-    elif tech_match_ratio >= 0.55:
-        recommendation = "YES"
-        recommendation_reason = "Very high technical skills match (verify other aspects)"
-        recommendation_confidence = "medium"  # Żółte kółko - technical >= 55%
-    elif tech_match_ratio >= 0.30 and keyword_match_ratio >= 0.30:
-        recommendation = "YES"
-        recommendation_reason = "Balanced technical + keyword match"
-        recommendation_confidence = "medium"
-    elif final_score >= 45:
-        recommendation = "YES"
-        recommendation_reason = "Acceptable overall match"
-        recommendation_confidence = "medium"
-    else:
-        recommendation_reason = "Insufficient match"
-        recommendation_confidence = "low"
-    
     return {
         "score": final_score,
         "strong_matches": strong_matches[:6],
@@ -440,9 +1161,9 @@ def analyze_candidate(resume_data, job_description):
             "resume_tech_count": len(resume_tech),
             "common_tech_required_count": len(common_tech_required),
             "common_tech_nice_count": len(common_tech_nice),
-            "job_tech_required": list(job_tech_required),
-            "job_tech_nice": list(job_tech_nice),
-            "resume_tech_terms": list(resume_tech)[:10],
+            "job_tech_required": sorted(job_tech_required),
+            "job_tech_nice": sorted(job_tech_nice),
+            "resume_tech_terms": sorted(resume_tech)[:10],
             "required_match_ratio": round(required_match_ratio, 3),
             "nice_match_ratio": round(nice_match_ratio, 3),
             "job_seniority": job_seniority,
@@ -0,0 +1,254 @@
+"""
+Wsadowa ocena kandydatów z linii poleceń (bez Streamlit).
+Dla każdej pary (CV, oferta) zapisuje wynik analyze_candidate jako wiersz JSONL albo CSV,
+strumieniowo - w miarę jak kolejne CV zostają sparsowane i ocenione.
+
+Przykład:
+    python batch_score.py --resumes data/resumes --jobs "data/job_descriptions/*.pdf" \
+        --output results.jsonl --workers 8 --resume
+"""
+import argparse
+import csv
+import glob
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from analyzer import JobProfile, score_candidate, get_embeddings, embed_resumes, cached_score, store_score
+from resume_parser import parse_resume, build_resume_data
+
+DOCUMENT_EXTENSIONS = (".pdf", ".txt", ".md")
+
+CSV_FIELDS = [
+    "resume", "job", "score", "recommendation", "recommendation_confidence",
+    "technical", "keywords", "experience", "embedding",
+    "strong_matches", "missing_requirements", "error",
+]
+
+
+def expand_inputs(patterns):
+    """Zamienia katalogi, globy i pojedyncze pliki na posortowaną listę dokumentów (bez duplikatów)."""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        else:
+            candidates = glob.glob(pattern) or [pattern]
+        for path in sorted(candidates):
+            if path.lower().endswith(DOCUMENT_EXTENSIONS) and os.path.isfile(path) and path not in paths:
+                paths.append(path)
+    return paths
+
+
+def load_document(path):
+    """Zwraca resume_data dokumentu - PDF przez Form Recognizer, pliki tekstowe bezpośrednio."""
+    if path.lower().endswith(".pdf"):
+        return parse_resume(path)
+    with open(path, encoding="utf-8") as f:
+        return build_resume_data(f.read())
+
+
+def output_format(path, explicit=None):
+    if explicit:
+        return explicit
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def complete_size(path):
+    """
+    Rozmiar pliku do końca ostatniej pełnej linii. Przerwany zapis zostawia na końcu
+    niepełny wiersz - nie jest on liczony jako wynik i jest obcinany przed dopisywaniem.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data or data.endswith(b"\n"):
+        return len(data)
+    return data.rfind(b"\n") + 1
+
+
+def load_completed(path, fmt):
+    """Pary (resume, job) zapisane już w pliku wynikowym bez błędu - do wznowienia przerwanego przebiegu."""
+    completed = set()
+    if not os.path.exists(path):
+        return completed
+    with open(path, "rb") as f:
+        lines = io.StringIO(f.read(complete_size(path)).decode("utf-8"), newline="")
+    if fmt == "csv":
+        rows = csv.DictReader(lines)
+    else:
+        rows = (json.loads(line) for line in lines if line.strip())
+    for row in rows:
+        if not row.get("error"):
+            completed.add((row["resume"], row["job"]))
+    return completed
+
+
+def result_row(resume_path, job_path, result=None, error=None):
+    row = {"resume": resume_path, "job": job_path}
+    if error:
+        row["error"] = error
+        return row
+    row.update({
+        "score": result["score"],
+        "recommendation": result["recommendation"],
+        "recommendation_confidence": result.get("recommendation_confidence"),
+        "similarity_scores": result.get("similarity_scores", {}),
+        "strong_matches": result["strong_matches"],
+        "missing_requirements": result["missing_requirements"],
+    })
+    return row
+
+
+class ResultWriter:
+    """
+    Zapisuje wiersze do JSONL/CSV i od razu je zrzuca na dysk. Bez `resume` plik jest zapisywany
+    od nowa; z `resume` wiersze są dopisywane po obcięciu niepełnej ostatniej linii.
+    """
+
+    def __init__(self, path, fmt, resume=False):
+        self.fmt = fmt
+        if resume and os.path.exists(path):
+            size = complete_size(path)
+            if size < os.path.getsize(path):
+                os.truncate(path, size)
+        is_new = not resume or not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "a" if resume else "w", encoding="utf-8", newline="")
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.DictWriter(self._file, fieldnames=CSV_FIELDS)
+            if is_new:
+                self._csv.writeheader()
+
+    def write(self, row):
+        if self._csv is not None:
+            scores = row.get("similarity_scores", {})
+            self._csv.writerow({
+                "resume": row["resume"],
+                "job": row["job"],
+                "score": row.get("score"),
+                "recommendation": row.get("recommendation"),
+                "recommendation_confidence": row.get("recommendation_confidence"),
+                "technical": scores.get("technical"),
+                "keywords": scores.get("keywords"),
+                "experience": scores.get("experience"),
+                "embedding": scores.get("embedding"),
+                "strong_matches": "; ".join(row.get("strong_matches", [])),
+                "missing_requirements": "; ".join(row.get("missing_requirements", [])),
+                "error": row.get("error", ""),
+            })
+        else:
+            self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def load_job_profiles(job_paths, log):
+    """Parsuje oferty i buduje dla każdej JobProfile (raz na cały przebieg)."""
+    profiles = {}
+    for job_path in job_paths:
+        try:
+            job_text = load_document(job_path).get("full_text", "")
+        except Exception as e:
+            log(f"❌ Oferta {job_path}: {type(e).__name__}: {e}")
+            continue
+        if not job_text.strip():
+            log(f"⚠ Oferta {job_path} jest pusta - pomijam")
+            continue
+        profiles[job_path] = JobProfile(job_text)
+
+    # Embeddingi ofert w jednej paczce, zanim wątki zaczną z nich korzystać
+    for profile, embedding in zip(profiles.values(), get_embeddings([p.description for p in profiles.values()])):
+        profile.set_embedding(embedding)
+    return profiles
+
+
+def score_resume(resume_path, profiles):
+    """Parsuje jedno CV i ocenia je względem wszystkich ofert; zwraca listę wierszy."""
+    try:
+        resume_data = load_document(resume_path)
+    except Exception as e:
+        return [result_row(resume_path, job_path, error=f"{type(e).__name__}: {e}") for job_path in profiles]
+
+    rows = []
+    resume_embeddings = None
+    for job_path, profile in profiles.items():
+        try:
+            key, result = cached_score(resume_data, profile.description)
+            if result is None:
+                # Sekcje CV embeddowane raz - dla kolejnych ofert potrzebny jest tylko embedding oferty
+                if resume_embeddings is None:
+                    resume_embeddings = embed_resumes([resume_data])[0]
+                result = score_candidate(resume_data, profile, resume_embeddings)
+                store_score(key, result, label=resume_path)
+            rows.append(result_row(resume_path, job_path, result))
+        except Exception as e:
+            rows.append(result_row(resume_path, job_path, error=f"{type(e).__name__}: {e}"))
+    return rows
+
+
+def run(resume_patterns, job_patterns, output, fmt=None, workers=4, resume=False, log=None):
+    """Uruchamia ocenę wsadową; zwraca liczbę zapisanych wierszy."""
+    log = log or (lambda message: print(message, file=sys.stderr, flush=True))
+    fmt = output_format(output, fmt)
+
+    resume_paths = expand_inputs(resume_patterns)
+    job_paths = expand_inputs(job_patterns)
+    profiles = load_job_profiles(job_paths, log)
+    if not resume_paths or not profiles:
+        log("Brak CV albo ofert do oceny.")
+        return 0
+
+    completed = load_completed(output, fmt) if resume else set()
+    todo = []
+    for resume_path in resume_paths:
+        pending = {job: profile for job, profile in profiles.items() if (resume_path, job) not in completed}
+        if pending:
+            todo.append((resume_path, pending))
+
+    total_resumes = len(todo)
+    skipped = len(resume_paths) - total_resumes
+    log(f"CV: {len(resume_paths)} (do oceny: {total_resumes}, pominięte: {skipped}), oferty: {len(profiles)}, wątki: {workers}")
+
+    writer = ResultWriter(output, fmt, resume=resume)
+    written = 0
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(score_resume, path, pending): path for path, pending in todo}
+            for done, future in enumerate(as_completed(futures), start=1):
+                rows = future.result()
+                for row in rows:
+                    writer.write(row)
+                written += len(rows)
+                errors = sum(1 for row in rows if row.get("error"))
+                best = max((row["score"] for row in rows if "score" in row), default=None)
+                elapsed = time.perf_counter() - started
+                log(f"[{done}/{total_resumes}] {futures[future]} - best score: {best}, błędy: {errors} ({elapsed:.1f}s)")
+    finally:
+        writer.close()
+
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Wsadowa ocena CV względem ofert pracy (JSONL/CSV).")
+    parser.add_argument("--resumes", nargs="+", required=True, help="Katalogi, globy albo pliki CV (PDF/TXT)")
+    parser.add_argument("--jobs", nargs="+", required=True, help="Katalogi, globy albo pliki ofert (PDF/TXT)")
+    parser.add_argument("--output", required=True, help="Plik wynikowy .jsonl albo .csv")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Format wyniku (domyślnie z rozszerzenia)")
+    parser.add_argument("--workers", type=int, default=4, help="Liczba równoległych wątków parsowania/oceny")
+    parser.add_argument("--resume", action="store_true", help="Pomiń pary (CV, oferta) już zapisane w pliku wynikowym")
+    args = parser.parse_args(argv)
+
+    written = run(args.resumes, args.jobs, args.output, fmt=args.format, workers=args.workers, resume=args.resume)
+    print(f"Zapisano {written} wyników do {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
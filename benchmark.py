@@ -0,0 +1,393 @@
+"""
+Benchmark funkcji analizy na syntetycznych CV i ofertach pracy.
+Klient Azure OpenAI jest zastąpiony atrapą zwracającą deterministyczne wektory,
+więc pomiar nie wymaga sieci ani poświadczeń. Wynik (przepustowość i percentyle
+opóźnień) zapisywany jest jako JSON, żeby porównywać go między commitami.
+
+Przykład:
+    python benchmark.py --sizes 2000 20000 --iterations 50 --output bench.json
+    python benchmark.py --compare bench_main.json --output bench.json
+    python benchmark.py --index-recall 5000 --output index_recall.json
+    python benchmark.py --index-recall-samples --output index_recall_samples.json
+    python benchmark.py --engine 1000000 --output engine.json
+"""
+import argparse
+import json
+import platform
+import random
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+
+import analyzer
+import resume_parser
+from embeddings import AzureOpenAIEmbeddingProvider, LocalHashingEmbeddingProvider
+from rate_limiter import AzureScheduler
+from batch_score import expand_inputs, load_document
+from vector_index import CandidateIndex, MappedCandidateIndex, STORAGE_DTYPES, recall_at_k
+
+SKILLS = [
+    "Python", "Java", "JavaScript", "TypeScript", "C#", "Go", "Rust", "React", "Angular", "Django", "Flask",
+    "Spring", "Node.js", "FastAPI", "Docker", "Kubernetes", "AWS", "Azure", "GCP", "Terraform", "Jenkins",
+    "PostgreSQL", "MySQL", "MongoDB", "Redis", "Elasticsearch", "Git", "Agile", "Scrum", "CI/CD", "REST",
+    "microservices", "machine learning", "NLP", "data science",
+]
+FILLER = [
+    "designed", "delivered", "team", "product", "customers", "platform", "reliable", "services", "improved",
+    "performance", "ownership", "stakeholders", "requirements", "mentoring", "features", "production",
+    "analysis", "quality", "reporting", "migration", "automation", "monitoring", "budget", "roadmap",
+]
+EMBEDDING_DIM = 256
+SAMPLE_RESUMES = os.path.join("data", "resumes")
+SAMPLE_JOBS = os.path.join("data", "job_descriptions")
+
+
+def generate_text(n_chars, skill_density, rng):
+    """Tekst o długości ok. n_chars, w którym ułamek skill_density słów to nazwy technologii."""
+    words = []
+    length = 0
+    while length < n_chars:
+        word = rng.choice(SKILLS) if rng.random() < skill_density else rng.choice(FILLER)
+        if rng.random() < 0.08:
+            word += ","
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def generate_resume(n_chars, skill_density, rng):
+    """Syntetyczne CV: tekst z nagłówkami sekcji (do parsera) i gotowe resume_data (do analizy)."""
+    third = max(n_chars // 3, 20)
+    skills = generate_text(third, min(1.0, skill_density * 3), rng)
+    start = rng.randint(2005, 2018)
+    experience = f"{rng.choice(['Senior', 'Mid', 'Junior'])} Developer {start}-{start + rng.randint(1, 6)}. " \
+                 + generate_text(third, skill_density, rng)
+    education = "MSc Computer Science. " + generate_text(third // 4, skill_density / 2, rng)
+    full_text = f"Jan Kowalski\nSkills:\n{skills}\nExperience:\n{experience}\nEducation:\n{education}\n"
+    resume_data = {"skills": [skills], "experience": [experience], "education": [education], "full_text": full_text}
+    return full_text, resume_data
+
+
+def generate_job_description(n_chars, skill_density, rng):
+    required = generate_text(n_chars // 2, skill_density, rng)
+    nice = generate_text(n_chars // 4, skill_density, rng)
+    return (f"Senior Software Engineer\n{rng.randint(2, 8)}+ years of experience\n"
+            f"Requirements:\n{required}\n\nNice to have:\n{nice}\n\nAbout us:\n"
+            + generate_text(n_chars // 4, 0.0, rng))
+
+
+def fake_embedding(text):
+    """Deterministyczny wektor zależny od treści (crc32 słów) - zamiast odpowiedzi Azure."""
+    vector = [0.0] * EMBEDDING_DIM
+    for word in text.lower().split():
+        vector[zlib.crc32(word.encode()) % EMBEDDING_DIM] += 1.0
+    return vector
+
+
+def stub_azure_provider(latency=0.0):
+    """Dostawca Azure z atrapą klienta: ta sama ścieżka kodu, bez sieci (opcjonalnie z symulowanym opóźnieniem)."""
+    provider = AzureOpenAIEmbeddingProvider(model="benchmark-stub")
+
+    def create(model, input):
+        if latency:
+            time.sleep(latency)
+        return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=fake_embedding(text))
+                                     for i, text in enumerate(input)])
+
+    provider._client = SimpleNamespace(embeddings=SimpleNamespace(create=create))
+    return provider
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def measure(func, inputs, iterations, input_chars=None):
+    """Wywołuje func dla kolejnych wejść, zwraca statystyki opóźnień (ms) i przepustowość."""
+    timings = []
+    for i in range(iterations):
+        args = inputs[i % len(inputs)]
+        started = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    total = sum(timings)
+    stats = {
+        "iterations": iterations,
+        "ops_per_sec": round(iterations / total, 2) if total else None,
+        "mean_ms": round(total / iterations * 1000, 4),
+        "p50_ms": round(percentile(timings, 50) * 1000, 4),
+        "p90_ms": round(percentile(timings, 90) * 1000, 4),
+        "p99_ms": round(percentile(timings, 99) * 1000, 4),
+        "max_ms": round(timings[-1] * 1000, 4),
+    }
+    if input_chars:
+        stats["mb_per_sec"] = round(input_chars * iterations / total / 1e6, 3) if total else None
+    return stats
+
+
+def run_benchmarks(sizes, iterations, skill_density=0.15, seed=1234, latency=0.0):
+    """Uruchamia wszystkie pomiary; zwraca słownik gotowy do zapisu jako JSON."""
+    rng = random.Random(seed)
+    results = {}
+
+    for size in sizes:
+        samples = [generate_resume(size, skill_density, rng) for _ in range(8)]
+        jobs = [generate_job_description(max(size // 2, 400), skill_density, rng) for _ in range(4)]
+        texts = [(text,) for text, _ in samples]
+        chars = sum(len(t) for t, _ in samples) // len(samples)
+        job_chars = sum(len(j) for j in jobs) // len(jobs)
+        vectors = [(fake_embedding(a[0]), fake_embedding(b[0])) for a, b in zip(texts, texts[1:])]
+
+        keywords = resume_parser.SECTION_KEYWORDS
+        cases = {
+            "analyzer.extract_experience_years": (analyzer.extract_experience_years, texts, chars),
+            "analyzer.extract_seniority_level": (analyzer.extract_seniority_level, texts, chars),
+            "analyzer.extract_keywords": (analyzer.extract_keywords, texts, chars),
+            "analyzer.extract_technical_terms": (analyzer.extract_technical_terms, texts, chars),
+            "analyzer.normalize_tech_term": (analyzer.normalize_tech_term, [(s,) for s in SKILLS], None),
+            "analyzer.parse_job_requirements": (analyzer.parse_job_requirements, [(j,) for j in jobs], job_chars),
+            "analyzer.extract_text_from_field": (analyzer.extract_text_from_field,
+                                                 [([{"content": t}, t],) for (t,) in texts], chars * 2),
+            "analyzer.cosine_similarity": (analyzer.cosine_similarity, vectors, None),
+            "analyzer.JobProfile": (analyzer.JobProfile, [(j,) for j in jobs], job_chars),
+            "resume_parser.extract_section": (lambda t: [resume_parser.extract_section(t, k) for k in keywords.values()],
+                                              texts, chars),
+            "resume_parser.segment_resume": (resume_parser.segment_resume, texts, chars),
+        }
+
+        provider = stub_azure_provider(latency)
+        # Harmonogram bez limitów RPM/TPM - inaczej pomiar to głównie czekanie na kubełki kwoty Azure
+        with mock.patch.object(analyzer, "get_provider", return_value=provider), \
+             mock.patch("embeddings.get_scheduler", return_value=AzureScheduler("benchmark-stub")), \
+             mock.patch.object(analyzer, "get_cache", return_value=None), \
+             mock.patch.object(analyzer, "get_score_cache", return_value=None), \
+             mock.patch.object(analyzer, "get_section_store", return_value=None):
+            cases["analyzer.analyze_candidate (stub embeddings)"] = (
+                analyzer.analyze_candidate, [(data, jobs[i % len(jobs)]) for i, (_, data) in enumerate(samples)], None)
+            profile = analyzer.JobProfile(jobs[0])
+            cases["analyzer.score_candidate (JobProfile, stub embeddings)"] = (
+                analyzer.score_candidate, [(data, profile) for _, data in samples], None)
+
+            size_results = {}
+            for name, (func, inputs, input_chars) in cases.items():
+                func(*inputs[0])  # rozgrzewka (kompilacja wzorców, leniwe inicjalizacje)
+                size_results[name] = measure(func, inputs, iterations, input_chars)
+
+        results[str(size)] = {"resume_chars": chars, "job_chars": job_chars, "functions": size_results}
+
+    return results
+
+
+def index_recall_report(candidates, queries=50, k=10, skill_density=0.15, seed=1234, dim=1024):
+    """
+    Porównuje formaty zapisu indeksu kandydatów (STORAGE_DTYPES) z float32 na syntetycznych CV
+    z lokalnymi embeddingami: recall@k, rozmiar wektora, czas otwarcia (mmap) i wyszukiwania.
+    """
+    rng = random.Random(seed)
+    resumes = [generate_resume(1500, skill_density, rng)[0] for _ in range(candidates)]
+    jobs = [generate_job_description(1200, skill_density, rng) for _ in range(queries)]
+    provider = LocalHashingEmbeddingProvider(dim=dim).fit(resumes)
+    index = CandidateIndex(dim=dim, capacity=candidates)
+    index.add_many([f"cv_{i}" for i in range(candidates)], [provider.embed_one(text) for text in resumes])
+    query_vectors = [provider.embed_one(text) for text in jobs]
+    formats = compare_index_formats(index, query_vectors, k)
+    return {"candidates": candidates, "queries": queries, "k": k, "dim": dim, "formats": formats}
+
+
+def sample_index_recall(resume_patterns=(SAMPLE_RESUMES,), job_patterns=(SAMPLE_JOBS,), k=3):
+    """
+    Jak index_recall_report, ale na prawdziwych dokumentach (domyślnie data/resumes i data/job_descriptions)
+    i embeddingach skonfigurowanego dostawcy - wektory CV jak w rankingu (analyzer.embed_resumes).
+    """
+    resume_paths = expand_inputs(resume_patterns)
+    job_paths = expand_inputs(job_patterns)
+    resumes = [load_document(path) for path in resume_paths]
+    pairs = analyzer.embed_resumes(resumes)
+    ids = [path for path, (vector, _) in zip(resume_paths, pairs) if vector is not None]
+    vectors = [vector for vector, _ in pairs if vector is not None]
+    jobs = [load_document(path).get("full_text", "") for path in job_paths]
+    query_vectors = [vector for vector in analyzer.get_embeddings(jobs) if vector is not None]
+    if not vectors or not query_vectors:
+        raise ValueError("Brak CV albo ofert z embeddingami")
+
+    index = CandidateIndex(dim=len(vectors[0]), capacity=len(vectors))
+    index.add_many(ids, vectors)
+    k = min(k, len(ids))
+    formats = compare_index_formats(index, query_vectors, k)
+    return {"candidates": len(ids), "queries": len(query_vectors), "k": k, "dim": index.dim, "formats": formats}
+
+
+def compare_index_formats(index, query_vectors, k):
+    """Zapisuje indeks w każdym z STORAGE_DTYPES i porównuje z float32 w pamięci."""
+    candidates = max(len(index), 1)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for dtype in STORAGE_DTYPES:
+            path = os.path.join(tmp, dtype)
+            index.save(path, dtype=dtype)
+            started = time.perf_counter()
+            mapped = MappedCandidateIndex(path)
+            opened = time.perf_counter() - started
+            started = time.perf_counter()
+            for query in query_vectors:
+                mapped.search(query, k)
+            search = (time.perf_counter() - started) / max(len(query_vectors), 1)
+            recall = recall_at_k(index, mapped, query_vectors, k)
+            results[dtype] = {
+                "bytes_per_vector": round(mapped.nbytes / candidates, 1),
+                "total_mb": round(mapped.nbytes / 1e6, 3),
+                "recall": round(recall, 4),
+                "open_ms": round(opened * 1000, 3),
+                "search_ms": round(search * 1000, 3),
+            }
+            del mapped
+    return results
+
+
+def engine_benchmark(candidates, iterations=5, seed=1234, scalar_sample=20000):
+    """
+    Czas wektorowej oceny (analyzer.score_components_batch) dla `candidates` kandydatów z gotowymi cechami
+    w porównaniu ze skalarnym score_components (mierzonym na próbce i przeliczonym na całą pulę).
+    """
+    rng = np.random.default_rng(seed)
+    profile = analyzer.JobProfile(generate_job_description(2000, 0.15, random.Random(seed)))
+    features = (
+        rng.integers(0, 4, candidates).astype(np.int8),
+        rng.integers(0, 15, candidates).astype(np.int32),
+        rng.integers(0, len(profile.keywords) + 1, candidates),
+        rng.integers(0, len(profile.tech_required) + 1, candidates),
+        rng.integers(0, len(profile.tech_nice) + 1, candidates),
+        rng.integers(0, len(profile.tech_all) + 1, candidates),
+        rng.uniform(0.0, 1.0, candidates),
+        rng.uniform(0.0, 1.0, candidates),
+    )
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        analyzer.score_components_batch(profile, *features)
+        timings.append(time.perf_counter() - started)
+
+    sample = min(scalar_sample, candidates)
+    rows = [tuple(column[i].item() for column in features) for i in range(sample)]
+    started = time.perf_counter()
+    for seniority, years, *rest in rows:
+        analyzer.score_components(profile, analyzer.SENIORITY_NAMES[seniority], years, *rest)
+    scalar = (time.perf_counter() - started) / sample * candidates
+
+    timings.sort()
+    return {
+        "candidates": candidates,
+        "batch_p50_s": round(percentile(timings, 50), 4),
+        "batch_min_s": round(timings[0], 4),
+        "candidates_per_sec": round(candidates / percentile(timings, 50)),
+        "scalar_estimate_s": round(scalar, 3),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline):
+    """Wypisuje zmianę mediany (p50) względem wcześniejszego wyniku."""
+    lines = []
+    for size, data in current["results"].items():
+        base_functions = baseline.get("results", {}).get(size, {}).get("functions", {})
+        for name, stats in data["functions"].items():
+            base = base_functions.get(name)
+            if not base or not base.get("p50_ms"):
+                continue
+            ratio = stats["p50_ms"] / base["p50_ms"]
+            lines.append(f"{size:>8} {name:<55} {base['p50_ms']:>10.4f} -> {stats['p50_ms']:>10.4f} ms  x{ratio:.2f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark analizy CV na danych syntetycznych.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 10000, 50000], help="Długości CV w znakach")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--skill-density", type=float, default=0.15, help="Ułamek słów będących technologiami")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--latency", type=float, default=0.0, help="Symulowane opóźnienie atrapy Azure (s)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="Wcześniejszy plik wyników do porównania")
+    parser.add_argument("--index-recall", type=int, metavar="N",
+                        help="Zamiast pomiaru funkcji: recall i rozmiar formatów indeksu dla N kandydatów")
+    parser.add_argument("--index-recall-samples", action="store_true",
+                        help="Jak --index-recall, ale na CV i ofertach z data/ (wymaga skonfigurowanych usług)")
+    parser.add_argument("--engine", type=int, metavar="N",
+                        help="Zamiast pomiaru funkcji: czas wektorowej oceny N kandydatów z gotowymi cechami")
+    args = parser.parse_args(argv)
+
+    if args.engine:
+        report = {"commit": git_commit(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                  "engine": engine_benchmark(args.engine, seed=args.seed)}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        data = report["engine"]
+        print(f"score_components_batch: {data['candidates']} kandydatów w {data['batch_p50_s']:.4f} s (p50), "
+              f"{data['candidates_per_sec']} kandydatów/s; skalarnie ok. {data['scalar_estimate_s']:.1f} s")
+        print(f"\nZapisano {args.output}")
+        return 0
+
+    if args.index_recall or args.index_recall_samples:
+        if args.index_recall_samples:
+            data = sample_index_recall()
+        else:
+            data = index_recall_report(args.index_recall, skill_density=args.skill_density, seed=args.seed)
+        report = {"commit": git_commit(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "index_recall": data}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        data = report["index_recall"]
+        print(f"=== Indeks: {data['candidates']} kandydatów, wymiar {data['dim']}, recall@{data['k']} "
+              f"względem float32 ===")
+        for dtype, stats in data["formats"].items():
+            print(f"{dtype:<8} {stats['bytes_per_vector']:>8} B/wektor  recall {stats['recall']:.4f}  "
+                  f"otwarcie {stats['open_ms']:>7.3f} ms  wyszukiwanie {stats['search_ms']:>7.3f} ms")
+        print(f"\nZapisano {args.output}")
+        return 0
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {"sizes": args.sizes, "iterations": args.iterations, "skill_density": args.skill_density,
+                   "seed": args.seed, "latency": args.latency},
+        "results": run_benchmarks(args.sizes, args.iterations, args.skill_density, args.seed, args.latency),
+    }
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    for size, data in report["results"].items():
+        print(f"\n=== CV ~{data['resume_chars']} znaków, oferta ~{data['job_chars']} znaków ===")
+        for name, stats in data["functions"].items():
+            print(f"{name:<55} p50 {stats['p50_ms']:>9.4f} ms  p99 {stats['p99_ms']:>9.4f} ms  "
+                  f"{stats['ops_per_sec']:>10} ops/s")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print("\n=== Porównanie p50 ===\n" + compare(report, json.load(f)))
+
+    print(f"\nZapisano {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+Pomiar narzutu połączeń klienta Form Recognizer na lokalnej atrapie usługi (HTTPS, certyfikat
+self-signed z openssl; bez openssl - zwykłe HTTP). Porównuje nowego klienta na każdy dokument
+(dawne zachowanie parse_resume) ze współdzielonym klientem z pulą połączeń (get_client).
+
+Przykład:
+    python benchmark_client.py --documents 50 --threads 4
+"""
+import argparse
+import json
+import os
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import resume_parser
+
+API_VERSION = "2023-07-31"
+SAMPLE_CONTENT = "Jan Kowalski\nSkills:\nPython, Docker\nExperience:\nSenior Developer 2015-2023\n"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Minimalna atrapa API analizy dokumentów: POST :analyze -> 202, GET wyniku -> succeeded."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, body=None, headers=None):
+        payload = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        model = self.path.split("/documentModels/")[1].split(":")[0]
+        location = (f"{self.server.base_url}formrecognizer/documentModels/{model}/analyzeResults/"
+                    f"{uuid.uuid4()}?api-version={API_VERSION}")
+        self._send_json(202, headers={"Operation-Location": location, "Retry-After": "0"})
+
+    def do_GET(self):
+        now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        self._send_json(200, {
+            "status": "succeeded",
+            "createdDateTime": now,
+            "lastUpdatedDateTime": now,
+            "analyzeResult": {"apiVersion": API_VERSION, "modelId": "prebuilt-document",
+                              "content": SAMPLE_CONTENT, "pages": []},
+        })
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Serwer atrapy liczący nawiązane połączenia TCP."""
+
+    daemon_threads = True
+
+    def __init__(self, tls_context=None):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.connections = 0
+        self._lock = threading.Lock()
+        scheme = "https" if tls_context else "http"
+        if tls_context:
+            self.socket = tls_context.wrap_socket(self.socket, server_side=True, do_handshake_on_connect=False)
+        self.base_url = f"{scheme}://127.0.0.1:{self.server_address[1]}/"
+
+    def get_request(self):
+        request = super().get_request()
+        with self._lock:
+            self.connections += 1
+        return request
+
+
+def self_signed_certificate(directory):
+    """Generuje certyfikat dla 127.0.0.1 przez openssl; zwraca (cert, klucz) albo None."""
+    if not shutil.which("openssl"):
+        return None
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-keyout", key, "-out", cert,
+         "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1"],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
+
+def measure(name, get_client, documents, threads, server):
+    """Analizuje `documents` dokumentów w `threads` wątkach; zwraca czasy i liczbę nowych połączeń."""
+    data = b"%PDF-1.4 stand-in"
+    connections_before = server.connections
+    timings = []
+
+    def analyze(_):
+        started = time.perf_counter()
+        result = resume_parser._analyze_document(get_client(), data)
+        timings.append(time.perf_counter() - started)
+        return result.content
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        contents = list(executor.map(analyze, range(documents)))
+    elapsed = time.perf_counter() - started
+    assert all(content == SAMPLE_CONTENT for content in contents)
+
+    timings.sort()
+    return {
+        "mode": name,
+        "documents": documents,
+        "threads": threads,
+        "total_s": round(elapsed, 3),
+        "mean_ms": round(sum(timings) / len(timings) * 1000, 2),
+        "p50_ms": round(timings[len(timings) // 2] * 1000, 2),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 2),
+        "connections": server.connections - connections_before,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Narzut połączeń klienta Form Recognizer na lokalnej atrapie.")
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--output", help="Opcjonalny plik JSON z wynikami")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        certificate = self_signed_certificate(tmp)
+        tls_context = None
+        client_options = {}
+        if certificate:
+            tls_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            tls_context.load_cert_chain(*certificate)
+            client_options["connection_verify"] = certificate[0]
+
+        server = StandInServer(tls_context)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        def new_client_per_document():
+            return resume_parser.create_client(server.base_url, "stand-in-key", **client_options)
+
+        shared = resume_parser.create_client(server.base_url, "stand-in-key", pool_size=args.threads,
+                                             **client_options)
+        try:
+            results = [
+                measure("client per document", new_client_per_document, args.documents, args.threads, server),
+                measure("shared pooled client", lambda: shared, args.documents, args.threads, server),
+            ]
+        finally:
+            shared.close()
+            server.shutdown()
+
+    print(f"Atrapa: {'HTTPS' if certificate else 'HTTP'} na 127.0.0.1")
+    for result in results:
+        print(f"{result['mode']:<22} {result['total_s']:>7.3f}s  mean {result['mean_ms']:>7.2f} ms  "
+              f"p95 {result['p95_ms']:>7.2f} ms  połączenia TCP: {result['connections']}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"tls": bool(certificate), "results": results}, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
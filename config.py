@@ -9,4 +9,61 @@ FORM_RECOGNIZER_KEY = os.getenv("FORM_RECOGNIZER_KEY", "<your-form-recognizer_ke
 AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT", "https://swedencentral.api.cognitive.microsoft.com/")
 AZURE_OPENAI_KEY = os.getenv("AZURE_OPENAI_KEY", "<your-azure_openai_key>")
 AZURE_OPENAI_MODEL = os.getenv("AZURE_OPENAI_MODEL", "gpt-4o")
-AZURE_OPENAI_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
\ No newline at end of file
+AZURE_OPENAI_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
+# Skrócony wymiar embeddingów (parametr `dimensions` modeli text-embedding-3); 0 = pełny wymiar modelu
+AZURE_OPENAI_EMBEDDING_DIMENSIONS = int(os.getenv("AZURE_OPENAI_EMBEDDING_DIMENSIONS", "0"))
+
+# Dostawca embeddingów (patrz embeddings.PROVIDERS)
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "azure")
+# Wymiar wektorów lokalnego dostawcy (EMBEDDING_PROVIDER=local)
+LOCAL_EMBEDDING_DIM = int(os.getenv("LOCAL_EMBEDDING_DIM", "2048"))
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "1") not in ("0", "false", "False", "")
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(".cache", "embeddings.sqlite"))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "50000"))
+EMBEDDING_CACHE_MAX_AGE_DAYS = float(os.getenv("EMBEDDING_CACHE_MAX_AGE_DAYS", "90"))
+
+# Limity jednego żądania embeddings (Azure OpenAI: do 2048 wejść na żądanie)
+EMBEDDING_BATCH_MAX_INPUTS = int(os.getenv("EMBEDDING_BATCH_MAX_INPUTS", "2048"))
+EMBEDDING_BATCH_MAX_TOKENS = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "250000"))
+
+DOCUMENT_CACHE_ENABLED = os.getenv("DOCUMENT_CACHE_ENABLED", "1") not in ("0", "false", "False", "")
+DOCUMENT_CACHE_PATH = os.getenv("DOCUMENT_CACHE_PATH", os.path.join(".cache", "documents.sqlite"))
+
+SKILL_TAXONOMY_PATH = os.getenv(
+    "SKILL_TAXONOMY_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "skills_taxonomy.json")
+)
+# Co ile sekund sprawdzać, czy plik taksonomii się zmienił (0 = bez przeładowania)
+SKILL_TAXONOMY_RELOAD_INTERVAL = float(os.getenv("SKILL_TAXONOMY_RELOAD_INTERVAL", "2"))
+
+# Pomiary czasu etapów analizy (instrumentation.py); JSON_LOG = jedna linia JSON w logu na żądanie
+INSTRUMENTATION_ENABLED = os.getenv("INSTRUMENTATION_ENABLED", "1") not in ("0", "false", "False", "")
+INSTRUMENTATION_JSON_LOG = os.getenv("INSTRUMENTATION_JSON_LOG", "0") not in ("0", "false", "False", "")
+
+# Limity wywołań Azure (rate_limiter.py) - kwota wdrożenia na minutę; 0 = bez limitu
+AZURE_OPENAI_RPM = int(os.getenv("AZURE_OPENAI_RPM", "2100"))
+AZURE_OPENAI_TPM = int(os.getenv("AZURE_OPENAI_TPM", "350000"))
+FORM_RECOGNIZER_RPM = int(os.getenv("FORM_RECOGNIZER_RPM", "900"))
+AZURE_MAX_CONCURRENCY = int(os.getenv("AZURE_MAX_CONCURRENCY", "8"))
+AZURE_MAX_RETRIES = int(os.getenv("AZURE_MAX_RETRIES", "6"))
+AZURE_RETRY_BASE_DELAY = float(os.getenv("AZURE_RETRY_BASE_DELAY", "1.0"))
+AZURE_RETRY_MAX_DELAY = float(os.getenv("AZURE_RETRY_MAX_DELAY", "60"))
+
+# Maksymalna liczba połączeń w puli współdzielonego klienta Form Recognizer
+FORM_RECOGNIZER_POOL_SIZE = int(os.getenv("FORM_RECOGNIZER_POOL_SIZE", "16"))
+
+# Magazyn wyników oceny (score_cache.py) - klucz: hash CV, hash oferty, wersja logiki oceny
+SCORE_CACHE_ENABLED = os.getenv("SCORE_CACHE_ENABLED", "1") not in ("0", "false", "False", "")
+SCORE_CACHE_PATH = os.getenv("SCORE_CACHE_PATH", os.path.join(".cache", "scores.sqlite"))
+
+# Embeddingi sekcji CV (section_embeddings.py) - domyślnie w tym samym pliku co cache dokumentów
+SECTION_EMBEDDINGS_ENABLED = os.getenv("SECTION_EMBEDDINGS_ENABLED", "1") not in ("0", "false", "False", "")
+SECTION_EMBEDDINGS_PATH = os.getenv("SECTION_EMBEDDINGS_PATH", DOCUMENT_CACHE_PATH)
+# Maksymalna długość fragmentu sekcji wysyłanego jako jedno wejście embeddingów (znaki)
+EMBEDDING_CHUNK_CHARS = int(os.getenv("EMBEDDING_CHUNK_CHARS", "8000"))
+
+# Kolumnowy magazyn cech kandydatów (feature_store.py) - katalog z plikami kolumn
+FEATURE_STORE_PATH = os.getenv("FEATURE_STORE_PATH", os.path.join(".cache", "features"))
+# Format wektorów w magazynie cech: float32 (dokładny), float16 albo int8 (skala na wiersz)
+FEATURE_STORE_VECTOR_DTYPE = os.getenv("FEATURE_STORE_VECTOR_DTYPE", "float32")
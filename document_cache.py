@@ -0,0 +1,67 @@
+"""
+Trwały cache sparsowanych dokumentów (SQLite).
+Klucz to SHA-256 bajtów pliku + nazwa modelu Form Recognizer. Przechowujemy
+surowy tekst (result.content) i wyprowadzone z niego sekcje wraz z wersją
+logiki ekstrakcji - gdy wersja się zmieni, sekcje liczone są na nowo
+z zapisanego tekstu, bez ponownego wysyłania PDF do Azure.
+"""
+import hashlib
+import json
+import time
+
+from config import DOCUMENT_CACHE_ENABLED, DOCUMENT_CACHE_PATH
+from sqlite_store import SQLiteStore, SharedInstance
+
+
+def file_digest(data):
+    """SHA-256 bajtów dokumentu."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class DocumentCache(SQLiteStore):
+    """Cache wyników parsowania dokumentów współdzielony między procesami przez plik SQLite."""
+
+    TABLE = "documents"
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS documents ("
+        " digest TEXT NOT NULL,"
+        " model TEXT NOT NULL,"
+        " content TEXT NOT NULL,"
+        " sections TEXT NOT NULL,"
+        " sections_version INTEGER NOT NULL,"
+        " created REAL NOT NULL,"
+        " PRIMARY KEY (digest, model))",
+    )
+
+    def get(self, digest, model):
+        """Zwraca (content, sections, sections_version) albo None."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT content, sections, sections_version FROM documents WHERE digest = ? AND model = ?",
+                (digest, model),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return row[0], json.loads(row[1]), row[2]
+
+    def put(self, digest, model, content, sections, sections_version):
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO documents (digest, model, content, sections, sections_version, created)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (digest, model, content, json.dumps(sections, ensure_ascii=False), sections_version, time.time()),
+            )
+            conn.commit()
+
+
+_default_cache = SharedInstance(lambda: DocumentCache(DOCUMENT_CACHE_PATH))
+
+
+def get_document_cache():
+    """Zwraca domyślny cache dokumentów albo None, jeśli jest wyłączony w konfiguracji."""
+    if not DOCUMENT_CACHE_ENABLED:
+        return None
+    return _default_cache.get()
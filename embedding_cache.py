@@ -0,0 +1,127 @@
+"""
+Trwały cache embeddingów w SQLite, adresowany treścią.
+Klucz to SHA-256 z (nazwa wdrożenia, przycięty tekst), więc ten sam tekst
+nigdy nie jest wysyłany do Azure OpenAI dwa razy - także po restarcie
+i między procesami (SQLite w trybie WAL).
+Rozmiar ograniczony liczbą wpisów (eviction LRU) i wiekiem wpisów.
+"""
+import hashlib
+import time
+from array import array
+
+from config import (
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    EMBEDDING_CACHE_MAX_AGE_DAYS,
+)
+from sqlite_store import SQLiteStore, SharedInstance
+
+# Co ile zapisów uruchamiamy eviction (COUNT(*) nie jest darmowy)
+EVICT_EVERY = 64
+
+
+def cache_key(model, text):
+    """Klucz cache: SHA-256 z nazwy wdrożenia i tekstu."""
+    digest = hashlib.sha256()
+    digest.update(model.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class EmbeddingCache(SQLiteStore):
+    """Cache embeddingów współdzielony między procesami przez plik SQLite."""
+
+    TABLE = "embeddings"
+    PRAGMAS = SQLiteStore.PRAGMAS + ("PRAGMA synchronous=NORMAL",)
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS embeddings ("
+        " key TEXT PRIMARY KEY,"
+        " vector BLOB NOT NULL,"
+        " created REAL NOT NULL,"
+        " last_access REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings(last_access)",
+    )
+
+    def __init__(self, path, max_entries=EMBEDDING_CACHE_MAX_ENTRIES, max_age_days=EMBEDDING_CACHE_MAX_AGE_DAYS):
+        super().__init__(path)
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_days * 86400 if max_age_days else None
+        self._puts_since_evict = 0
+
+    def _on_connect(self):
+        self._evict()
+
+    def get(self, model, text):
+        """Zwraca zapisany embedding (lista floatów) albo None."""
+        key = cache_key(model, text)
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT vector, created FROM embeddings WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            if row is None or (self.max_age_seconds and now - row[1] > self.max_age_seconds):
+                self.misses += 1
+                return None
+            conn.execute("UPDATE embeddings SET last_access = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+        vector = array("d")
+        vector.frombytes(row[0])
+        return vector.tolist()
+
+    def put(self, model, text, embedding):
+        """Zapisuje embedding; co EVICT_EVERY zapisów usuwa najstarsze wpisy."""
+        key = cache_key(model, text)
+        blob = array("d", embedding).tobytes()
+        with self._lock:
+            conn = self._connect()
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector, created, last_access) VALUES (?, ?, ?, ?)",
+                (key, blob, now, now),
+            )
+            conn.commit()
+            self._puts_since_evict += 1
+            if self._puts_since_evict >= EVICT_EVERY:
+                self._evict()
+
+    def _evict(self):
+        """Usuwa wpisy starsze niż limit wieku i nadmiarowe wpisy wg LRU."""
+        conn = self._conn
+        self._puts_since_evict = 0
+        if self.max_age_seconds:
+            conn.execute("DELETE FROM embeddings WHERE created < ?", (time.time() - self.max_age_seconds,))
+        if self.max_entries:
+            count = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,),
+                )
+        conn.commit()
+
+    def stats(self):
+        """Liczniki trafień/chybień bieżącego procesu i liczba wpisów w cache."""
+        stats = super().stats()
+        lookups = self.hits + self.misses
+        stats["hit_rate"] = round(self.hits / lookups, 3) if lookups else 0.0
+        return stats
+
+
+_default_cache = SharedInstance(lambda: EmbeddingCache(EMBEDDING_CACHE_PATH))
+
+
+def get_cache():
+    """Zwraca domyślny cache procesu albo None, jeśli cache jest wyłączony w konfiguracji."""
+    if not EMBEDDING_CACHE_ENABLED:
+        return None
+    return _default_cache.get()
+
+
+def cache_stats():
+    """Liczniki domyślnego cache (pusty słownik, gdy cache wyłączony)."""
+    cache = get_cache()
+    return cache.stats() if cache else {}
@@ -0,0 +1,205 @@
+"""
+Dostawcy embeddingów wybierani przez EMBEDDING_PROVIDER w config.py.
+Klient (i ciężki import SDK) tworzony jest leniwie, przy pierwszym żądaniu,
+więc sam import analyzer nie wymaga SDK ani poświadczeń.
+"""
+import hashlib
+import re
+import threading
+import zlib
+from collections import Counter
+
+import numpy as np
+
+from config import (
+    EMBEDDING_PROVIDER,
+    LOCAL_EMBEDDING_DIM,
+    AZURE_OPENAI_KEY,
+    AZURE_OPENAI_ENDPOINT,
+    AZURE_OPENAI_MODEL,
+    AZURE_OPENAI_API_VERSION,
+    AZURE_OPENAI_EMBEDDING_DIMENSIONS,
+)
+from rate_limiter import get_scheduler
+
+_WORD_PATTERN = re.compile(r'[a-z0-9+#][a-z0-9+#\.]*|[^\W\d_]+')
+
+
+def estimate_tokens(text):
+    """Zgrubne (zawyżone) oszacowanie liczby tokenów - ok. 3 znaki na token."""
+    return len(text) // 3 + 1
+
+
+class EmbeddingProvider:
+    """
+    Interfejs dostawcy embeddingów.
+    `cache_namespace` rozdziela wpisy w cache embeddingów między dostawcami/modelami,
+    a `embed_batch` zwraca wektory dla listy niepustych tekstów w kolejności wejścia.
+    """
+
+    name = None
+    # Czy embed_batch wykonuje żądania sieciowe (wtedy pakujemy teksty pod limity API i używamy cache)
+    remote = True
+
+    @property
+    def cache_namespace(self):
+        raise NotImplementedError
+
+    def embed_batch(self, texts):
+        raise NotImplementedError
+
+
+class AzureOpenAIEmbeddingProvider(EmbeddingProvider):
+    """Embeddingi z wdrożenia Azure OpenAI (AZURE_OPENAI_MODEL)."""
+
+    name = "azure"
+
+    def __init__(self, model=AZURE_OPENAI_MODEL, dimensions=AZURE_OPENAI_EMBEDDING_DIMENSIONS):
+        self.model = model
+        self.dimensions = dimensions
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def cache_namespace(self):
+        # Skrócone wektory nie mogą trafiać pod klucze pełnego wymiaru
+        if self.dimensions:
+            return f"{self.model}@{self.dimensions}"
+        # Sama nazwa wdrożenia - zgodnie z kluczami zapisanymi wcześniej w cache
+        return self.model
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from openai import AzureOpenAI
+
+                    # Ponowienia i limity obsługuje rate_limiter - bez drugiej warstwy retry w SDK
+                    self._client = AzureOpenAI(
+                        api_key=AZURE_OPENAI_KEY,
+                        api_version=AZURE_OPENAI_API_VERSION,
+                        azure_endpoint=AZURE_OPENAI_ENDPOINT,
+                        max_retries=0
+                    )
+        return self._client
+
+    def embed_batch(self, texts):
+        scheduler = get_scheduler("openai")
+        estimated = sum(estimate_tokens(text) for text in texts)
+        options = {"dimensions": self.dimensions} if self.dimensions else {}
+        response = scheduler.call(
+            self.client.embeddings.create,
+            model=self.model,
+            input=texts,
+            tokens=estimated,
+            **options
+        )
+        # Rozliczenie kubełka TPM z rzeczywistym zużyciem - przepustowość trzyma się kwoty, a nie szacunku
+        usage = getattr(response, "usage", None)
+        used = getattr(usage, "prompt_tokens", None) or getattr(usage, "total_tokens", None)
+        if isinstance(used, int):
+            # reserve pobrało cały szacunek, więc zwracamy co najwyżej tyle, ile pobrano
+            scheduler.tokens.refund(min(estimated, estimated - used))
+        embeddings = [None] * len(texts)
+        for item in response.data:
+            embeddings[item.index] = item.embedding
+        return embeddings
+
+
+class LocalHashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Lokalne embeddingi bez sieci: haszowane cechy (słowa, bigramy słów, trigramy znaków)
+    z logarytmicznym TF i opcjonalnym IDF, znormalizowane L2. Liczone w NumPy w procesie.
+    Haszowanie crc32 jest deterministyczne, więc wektory są identyczne między procesami.
+    """
+
+    name = "local"
+    remote = False
+
+    def __init__(self, dim=LOCAL_EMBEDDING_DIM):
+        self.dim = dim
+        self.idf = None
+
+    @property
+    def cache_namespace(self):
+        # Wagi IDF zmieniają każdy wektor - inny korpus to inna przestrzeń w cache i magazynach
+        if self.idf is not None:
+            idf_digest = hashlib.sha256(np.asarray(self.idf, dtype="<f8").tobytes()).hexdigest()
+            return f"local-hashing-{self.dim}-{idf_digest[:12]}"
+        return f"local-hashing-{self.dim}"
+
+    def _features(self, text):
+        words = _WORD_PATTERN.findall(text.lower())
+        features = Counter(words)
+        features.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+        for word in words:
+            padded = f"<{word}>"
+            features.update(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def _hashed(self, features):
+        """Zwraca (indeksy kubełków, znaki, wagi TF) dla cech tekstu."""
+        hashes = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in features), dtype=np.uint64, count=len(features))
+        counts = np.fromiter(features.values(), dtype=np.float64, count=len(features))
+        buckets = (hashes % self.dim).astype(np.intp)
+        signs = np.where((hashes >> np.uint64(31)) & np.uint64(1), -1.0, 1.0)
+        return buckets, signs, 1.0 + np.log(counts)
+
+    def fit(self, corpus):
+        """Wylicza wagi IDF kubełków na korpusie (np. puli CV); bez fit wszystkie wagi IDF = 1."""
+        document_frequency = np.zeros(self.dim)
+        n_documents = 0
+        for text in corpus:
+            if not text or not text.strip():
+                continue
+            buckets, _, _ = self._hashed(self._features(text))
+            document_frequency[np.unique(buckets)] += 1
+            n_documents += 1
+        self.idf = np.log((1 + n_documents) / (1 + document_frequency)) + 1.0
+        return self
+
+    def embed_one(self, text):
+        features = self._features(text)
+        if not features:
+            return np.zeros(self.dim, dtype=np.float32)
+        buckets, signs, tf = self._hashed(features)
+        vector = np.bincount(buckets, weights=signs * tf, minlength=self.dim)
+        if self.idf is not None:
+            vector *= self.idf
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.astype(np.float32)
+
+    def embed_batch(self, texts):
+        return [self.embed_one(text).tolist() for text in texts]
+
+
+PROVIDERS = {
+    "azure": AzureOpenAIEmbeddingProvider,
+    "local": LocalHashingEmbeddingProvider,
+}
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def register_provider(name, factory):
+    """Rejestruje dostawcę pod nazwą używaną w EMBEDDING_PROVIDER."""
+    PROVIDERS[name] = factory
+
+
+def get_provider(name=None):
+    """Zwraca (tworzony raz na proces) dostawcę embeddingów wskazanego w konfiguracji."""
+    name = name or EMBEDDING_PROVIDER
+    provider = _providers.get(name)
+    if provider is None:
+        with _providers_lock:
+            provider = _providers.get(name)
+            if provider is None:
+                if name not in PROVIDERS:
+                    raise ValueError(f"Nieznany dostawca embeddingów: {name!r} (dostępni: {', '.join(PROVIDERS)})")
+                provider = PROVIDERS[name]()
+                _providers[name] = provider
+    return provider
@@ -0,0 +1,353 @@
+"""
+Kolumnowy magazyn cech kandydatów na dysku.
+Cechy CV, od których zależy ocena (poziom, lata doświadczenia, słowa kluczowe, terminy techniczne,
+wektory CV i skills), liczone są raz - przy ingestii - i zapisywane jako osobne pliki kolumn
+(surowe tablice NumPy). Odczyt mapuje kolumny w pamięć, więc pula 500k CV otwiera się od razu,
+a ocena względem nowej oferty nie uruchamia ponownie ekstraktorów regex.
+
+Układ katalogu:
+    meta.json                    schemat, liczba wierszy i zatwierdzone rozmiary plików
+    resume_hash.bin, flags.bin, seniority.bin, years.bin, tech_count.bin, keyword_count.bin
+    tech_ids.bin, keyword_ids.bin  identyfikatory terminów (listy zmiennej długości, kolejno wiersz po wierszu)
+    tech.vocab, keywords.vocab     słowniki terminów - jeden na linię, numer linii = identyfikator
+    embedding.bin, skills_embedding.bin  wektory (wiersz x wymiar) w formacie vector_dtype z meta.json:
+                                 float32, float16 albo int8 (vector_index.quantize)
+    embedding.scales.bin, skills_embedding.scales.bin  skale wierszy float32 (tylko int8)
+    labels.jsonl                 etykiety kandydatów (np. nazwy plików)
+
+Nowe CV są dopisywane na końcu plików; meta.json zapisywany jest atomowo na końcu, więc czytelnik
+widzi albo stan sprzed dopisania, albo po nim. Zmiana schematu (kodu ekstraktorów, taksonomii,
+dostawcy embeddingów) czyści magazyn - cechy trzeba wtedy policzyć od nowa (analyzer.ingest_features).
+Jeden proces zapisujący naraz; czytać może dowolnie wiele procesów.
+"""
+import json
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from config import FEATURE_STORE_PATH
+from skill_bitsets import pack_rows
+from vector_index import STORAGE_DTYPES, dequantize, quantize
+
+# Cechy leksykalne jednego CV (wynik analyzer.extract_resume_features)
+ResumeFeatures = namedtuple("ResumeFeatures", ["seniority", "years", "keywords", "tech"])
+# Jeden wiersz do zapisu; features = None oznacza puste CV
+FeatureRecord = namedtuple("FeatureRecord", ["resume_hash", "label", "features", "embedding", "skills_embedding"])
+
+SENIORITY_CODES = {None: 0, "junior": 1, "mid": 2, "senior": 3}
+SENIORITY_NAMES = {code: name for name, code in SENIORITY_CODES.items()}
+# Górna granica lat doświadczenia w kolumnie years - absurdalne "99999999999 years" nie przepełnia int32
+MAX_YEARS = 80
+
+# Bity kolumny flags
+EMPTY = 1
+HAS_EMBEDDING = 2
+HAS_SKILLS_EMBEDDING = 4
+
+# Kolumny o stałej szerokości: nazwa -> typ elementu
+COLUMNS = {
+    "resume_hash": np.dtype("V32"),  # surowe bajty SHA-256 (S32 obcinałby końcowe zera)
+    "flags": np.dtype(np.uint8),
+    "seniority": np.dtype(np.int8),
+    "years": np.dtype(np.int32),
+    "tech_count": np.dtype(np.uint32),
+    "keyword_count": np.dtype(np.uint32),
+}
+# Listy terminów: rodzaj -> (kolumna liczności, kolumna identyfikatorów, plik słownika)
+TERM_LISTS = {
+    "tech": ("tech_count", "tech_ids", "tech.vocab"),
+    "keywords": ("keyword_count", "keyword_ids", "keywords.vocab"),
+}
+VECTOR_COLUMNS = ("embedding", "skills_embedding")
+TERM_ID_DTYPE = np.dtype(np.uint32)
+SCALE_DTYPE = np.dtype(np.float32)
+
+
+class FeatureStore:
+    """Cechy kandydatów w plikach kolumn, adresowane hashem treści CV."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._meta = None
+        self._views = {}
+        self._rows_by_hash = None
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    @property
+    def meta(self):
+        if self._meta is None:
+            try:
+                with open(self._file("meta.json"), encoding="utf-8") as f:
+                    self._meta = json.load(f)
+            except FileNotFoundError:
+                self._meta = {"schema": None, "rows": 0, "dim": 0, "sizes": {}}
+        return self._meta
+
+    @property
+    def vector_dtype(self):
+        """Format zapisu wektorów (STORAGE_DTYPES) - ustalany przy reset()."""
+        return self.meta.get("vector_dtype", "float32")
+
+    def reload(self):
+        """Odczytuje meta.json ponownie - np. żeby zobaczyć wiersze dopisane przez inny proces."""
+        with self._lock:
+            self._meta = None
+            self._views.clear()
+            self._rows_by_hash = None
+
+    @property
+    def schema(self):
+        return self.meta["schema"]
+
+    @property
+    def dim(self):
+        return self.meta["dim"]
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    def _write_meta(self, meta):
+        os.makedirs(self.path, exist_ok=True)
+        tmp = self._file("meta.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._file("meta.json"))
+        self._meta = meta
+        self._views.clear()
+
+    def _data_files(self):
+        files = [f"{name}.bin" for name in COLUMNS] + [f"{ids}.bin" for _, ids, _ in TERM_LISTS.values()]
+        files += [vocab for _, _, vocab in TERM_LISTS.values()]
+        files += [f"{name}.bin" for name in VECTOR_COLUMNS] + [f"{name}.scales.bin" for name in VECTOR_COLUMNS]
+        return files + ["labels.jsonl"]
+
+    def reset(self, schema, vector_dtype="float32"):
+        """Usuwa wszystkie wiersze i ustawia nowy schemat oraz format zapisu wektorów."""
+        if vector_dtype not in STORAGE_DTYPES:
+            raise ValueError(f"Nieznany format zapisu: {vector_dtype!r} (dostępne: {', '.join(STORAGE_DTYPES)})")
+        with self._lock:
+            for name in self._data_files():
+                if os.path.exists(self._file(name)):
+                    os.remove(self._file(name))
+            self._write_meta({"schema": schema, "rows": 0, "dim": 0, "sizes": {}, "vector_dtype": vector_dtype})
+            self._rows_by_hash = None
+
+    def _discard_uncommitted(self, sizes):
+        """Obcina pliki do zatwierdzonych rozmiarów (pozostałości przerwanego dopisywania)."""
+        for name in self._data_files():
+            path = self._file(name)
+            if os.path.exists(path) and os.path.getsize(path) > sizes.get(name, 0):
+                with open(path, "r+b") as f:
+                    f.truncate(sizes.get(name, 0))
+
+    def append(self, records):
+        """Dopisuje wiersze FeatureRecord; zwraca numer pierwszego z nich."""
+        records = list(records)
+        with self._lock:
+            self._meta = None
+            meta = self.meta
+            first_row = meta["rows"]
+            if not records:
+                return first_row
+            self._discard_uncommitted(meta["sizes"])
+
+            dim = meta["dim"]
+            for record in records:
+                if record.embedding is not None:
+                    dim = dim or len(record.embedding)
+                    if len(record.embedding) != dim:
+                        raise ValueError(f"Wektor o wymiarze {len(record.embedding)}, magazyn ma {dim}")
+
+            columns = {name: np.zeros(len(records), dtype=dtype) for name, dtype in COLUMNS.items()}
+            term_ids = {kind: [] for kind in TERM_LISTS}
+            new_terms = {kind: [] for kind in TERM_LISTS}
+            vocabs = {kind: self._vocab_index(kind) for kind in TERM_LISTS}
+            vectors = {name: np.zeros((len(records), dim), dtype=np.float32) for name in VECTOR_COLUMNS}
+
+            for n, record in enumerate(records):
+                columns["resume_hash"][n] = bytes.fromhex(record.resume_hash)
+                flags = 0
+                features = record.features
+                if features is None:
+                    flags |= EMPTY
+                else:
+                    columns["seniority"][n] = SENIORITY_CODES[features.seniority]
+                    columns["years"][n] = min(max(features.years, 0), MAX_YEARS)
+                    for kind, terms in (("tech", features.tech), ("keywords", features.keywords)):
+                        vocab = vocabs[kind]
+                        for term in sorted(terms):
+                            if term not in vocab:
+                                vocab[term] = len(vocab)
+                                new_terms[kind].append(term)
+                            term_ids[kind].append(vocab[term])
+                        columns[TERM_LISTS[kind][0]][n] = len(terms)
+                for name, flag in (("embedding", HAS_EMBEDDING), ("skills_embedding", HAS_SKILLS_EMBEDDING)):
+                    vector = getattr(record, name)
+                    if vector is not None and dim:
+                        vectors[name][n] = vector
+                        flags |= flag
+                columns["flags"][n] = flags
+
+            for name, values in columns.items():
+                self._append_bytes(f"{name}.bin", values.tobytes())
+            for kind, (_, ids_column, vocab_file) in TERM_LISTS.items():
+                self._append_bytes(f"{ids_column}.bin", np.asarray(term_ids[kind], dtype=TERM_ID_DTYPE).tobytes())
+                self._append_bytes(vocab_file, "".join(f"{term}\n" for term in new_terms[kind]).encode("utf-8"))
+            if dim:
+                # Pierwsze wektory po wierszach bez nich (same puste CV) - wcześniejsze wiersze dostają zera
+                backfill = first_row if not meta["dim"] else 0
+                itemsize = np.dtype(self.vector_dtype).itemsize
+                for name, values in vectors.items():
+                    data, scales = quantize(values, self.vector_dtype)
+                    if backfill:
+                        self._append_bytes(f"{name}.bin", bytes(backfill * dim * itemsize))
+                    self._append_bytes(f"{name}.bin", data.tobytes())
+                    if scales is not None:
+                        if backfill:
+                            self._append_bytes(f"{name}.scales.bin", bytes(backfill * SCALE_DTYPE.itemsize))
+                        self._append_bytes(f"{name}.scales.bin", scales.tobytes())
+            self._append_bytes("labels.jsonl", "".join(
+                json.dumps(record.label, ensure_ascii=False) + "\n" for record in records).encode("utf-8"))
+
+            sizes = {name: os.path.getsize(self._file(name)) for name in self._data_files()
+                     if os.path.exists(self._file(name))}
+            self._write_meta({**meta, "rows": first_row + len(records), "dim": dim, "sizes": sizes})
+            if self._rows_by_hash is not None:
+                for n, record in enumerate(records):
+                    self._rows_by_hash.setdefault(record.resume_hash, first_row + n)
+            return first_row
+
+    def _append_bytes(self, name, data):
+        os.makedirs(self.path, exist_ok=True)
+        with open(self._file(name), "ab") as f:
+            f.write(data)
+
+    def _vocab_index(self, kind):
+        return {term: n for n, term in enumerate(self.vocab(kind))}
+
+    def _read_committed(self, name):
+        size = self.meta["sizes"].get(name, 0)
+        if not size:
+            return b""
+        with open(self._file(name), "rb") as f:
+            return f.read(size)
+
+    def _view(self, key, build):
+        view = self._views.get(key)
+        if view is None:
+            view = self._views[key] = build()
+        return view
+
+    def _mapped(self, name, dtype, tail=()):
+        """Zatwierdzona część pliku kolumny jako tablica mapowana w pamięć (tylko do odczytu)."""
+        file_name = f"{name}.bin"
+        dtype = np.dtype(dtype)
+        count = self.meta["sizes"].get(file_name, 0) // (dtype.itemsize * int(np.prod(tail, dtype=np.int64)))
+        if not count:
+            return np.empty((0,) + tuple(tail), dtype=dtype)
+        return np.memmap(self._file(file_name), dtype=dtype, mode="r", shape=(count,) + tuple(tail))
+
+    def column(self, name):
+        """
+        Kolumna o stałej szerokości (COLUMNS), wektory (VECTOR_COLUMNS - w formacie zapisu, bez skal)
+        albo identyfikatory terminów.
+        """
+        if name in COLUMNS:
+            return self._view(name, lambda: self._mapped(name, COLUMNS[name]))
+        if name in VECTOR_COLUMNS:
+            return self._view(name, lambda: self._mapped(name, self.vector_dtype, (self.dim,)))
+        if name in {ids for _, ids, _ in TERM_LISTS.values()}:
+            return self._view(name, lambda: self._mapped(name, TERM_ID_DTYPE))
+        raise KeyError(name)
+
+    def scales(self, name):
+        """Skale wierszy kolumny wektorów int8 albo None dla float32 / float16."""
+        if self.vector_dtype != "int8":
+            return None
+        return self._view(f"{name}.scales", lambda: self._mapped(f"{name}.scales", SCALE_DTYPE))
+
+    def vectors(self, name, start=0, stop=None):
+        """Wiersze start:stop kolumny wektorów jako float32 (dla float32 - widok mapowanego pliku)."""
+        data = self.column(name)[start:stop]
+        if self.vector_dtype == "float32":
+            return data
+        scales = self.scales(name)
+        return dequantize(data, scales[start:stop] if scales is not None else None)
+
+    def offsets(self, kind):
+        """Początki list terminów kolejnych wierszy w kolumnie identyfikatorów (rows + 1 wartości)."""
+        def build():
+            counts = self.column(TERM_LISTS[kind][0])
+            return np.concatenate([[0], np.cumsum(counts, dtype=np.int64)])
+        return self._view(f"{kind}_offsets", build)
+
+    def vocab(self, kind):
+        """Słownik terminów danego rodzaju - lista, indeks = identyfikator."""
+        return self._view(f"{kind}_vocab",
+                          lambda: self._read_committed(TERM_LISTS[kind][2]).decode("utf-8").splitlines())
+
+    def vocab_index(self, kind):
+        """Odwrotność vocab: {termin: identyfikator}."""
+        return self._view(f"{kind}_index", lambda: self._vocab_index(kind))
+
+    def tech_bits(self):
+        """Terminy techniczne wszystkich wierszy jako maski bitowe (wiersze x słowa uint64, bit = identyfikator)."""
+        return self._view("tech_bits", lambda: pack_rows(self.offsets("tech"), self.column("tech_ids"),
+                                                         len(self.vocab("tech"))))
+
+    def labels(self):
+        return self._view("labels", lambda: [json.loads(line) for line in
+                                             self._read_committed("labels.jsonl").decode("utf-8").splitlines()])
+
+    def find(self, resume_hash):
+        """Numer wiersza CV o danym hashu albo None."""
+        if self._rows_by_hash is None:
+            raw = self.column("resume_hash").tobytes()
+            rows = {}
+            for row, offset in enumerate(range(0, len(raw), 32)):
+                rows.setdefault(raw[offset:offset + 32].hex(), row)
+            self._rows_by_hash = rows
+        return self._rows_by_hash.get(resume_hash)
+
+    def terms(self, kind, row):
+        offsets = self.offsets(kind)
+        vocab = self.vocab(kind)
+        return {vocab[i] for i in self.column(TERM_LISTS[kind][1])[offsets[row]:offsets[row + 1]].tolist()}
+
+    def features(self, row):
+        """ResumeFeatures zapisanego wiersza albo None dla pustego CV."""
+        if self.column("flags")[row] & EMPTY:
+            return None
+        return ResumeFeatures(
+            seniority=SENIORITY_NAMES[int(self.column("seniority")[row])],
+            years=int(self.column("years")[row]),
+            keywords=self.terms("keywords", row),
+            tech=self.terms("tech", row),
+        )
+
+    def embeddings(self, row):
+        """(wektor CV, wektor skills) wiersza - None tam, gdzie wektora nie było."""
+        flags = self.column("flags")[row]
+        return (self.vectors("embedding", row, row + 1)[0] if flags & HAS_EMBEDDING else None,
+                self.vectors("skills_embedding", row, row + 1)[0] if flags & HAS_SKILLS_EMBEDDING else None)
+
+    def stats(self):
+        meta = self.meta
+        return {"rows": meta["rows"], "schema": meta["schema"], "dim": meta["dim"],
+                "vector_dtype": self.vector_dtype, "bytes": sum(meta["sizes"].values()), "path": self.path}
+
+
+_default_store = None
+
+
+def get_feature_store():
+    """Zwraca domyślny magazyn cech (FEATURE_STORE_PATH)."""
+    global _default_store
+    if _default_store is None:
+        _default_store = FeatureStore(FEATURE_STORE_PATH)
+    return _default_store
@@ -0,0 +1,211 @@
+"""
+Lekka instrumentacja etapów analizy: czas, liczba wywołań i rozmiar wejścia.
+Pomiary trafiają do śladu bieżącego żądania (result["debug"]["timings"]) oraz do
+sumarycznych liczników procesu, eksportowanych w formacie Prometheus.
+Po wyłączeniu (INSTRUMENTATION_ENABLED=0) opakowane funkcje wołane są bezpośrednio
+- koszt to jedno sprawdzenie flagi.
+
+Czasy etapów są włącznie z etapami zagnieżdżonymi (np. job_profile zawiera ekstraktory).
+"""
+import contextvars
+import functools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from config import INSTRUMENTATION_ENABLED, INSTRUMENTATION_JSON_LOG
+
+logger = logging.getLogger(__name__)
+
+_enabled = INSTRUMENTATION_ENABLED
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+class StageStats:
+    __slots__ = ("calls", "seconds", "input_size")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.input_size = 0
+
+    def add(self, seconds, size):
+        self.calls += 1
+        self.seconds += seconds
+        self.input_size += size
+
+
+class Trace:
+    """Pomiary jednego żądania (np. jednej analizy kandydata)."""
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.finished = None
+        self.stages = {}
+
+    def record(self, stage, seconds, size=0):
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages[stage] = StageStats()
+        stats.add(seconds, size)
+
+    def as_dict(self):
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return {
+            "request": self.name,
+            "total_ms": round((end - self.started) * 1000, 3),
+            "stages": {
+                stage: {"calls": s.calls, "ms": round(s.seconds * 1000, 3), "input_size": s.input_size}
+                for stage, s in self.stages.items()
+            },
+        }
+
+
+class MetricsRegistry:
+    """Sumaryczne liczniki etapów w procesie (od startu albo od reset())."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._requests = {}
+
+    def record(self, stage, seconds, size=0):
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = StageStats()
+            stats.add(seconds, size)
+
+    def record_request(self, name):
+        with self._lock:
+            self._requests[name] = self._requests.get(name, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": dict(self._requests),
+                "stages": {stage: {"calls": s.calls, "seconds": s.seconds, "input_size": s.input_size}
+                           for stage, s in self._stages.items()},
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._requests.clear()
+
+    def render_prometheus(self, prefix="hr_analyzer"):
+        """Liczniki w formacie tekstowym Prometheus (do wystawienia pod /metrics)."""
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_requests_total Number of instrumented requests.",
+            f"# TYPE {prefix}_requests_total counter",
+        ]
+        lines += [f'{prefix}_requests_total{{request="{name}"}} {count}'
+                  for name, count in sorted(snapshot["requests"].items())]
+        for metric, key, help_text in (
+            ("stage_calls_total", "calls", "Number of calls per stage."),
+            ("stage_seconds_total", "seconds", "Wall time spent per stage (inclusive)."),
+            ("stage_input_size_total", "input_size", "Input size per stage (characters, bytes or texts)."),
+        ):
+            lines.append(f"# HELP {prefix}_{metric} {help_text}")
+            lines.append(f"# TYPE {prefix}_{metric} counter")
+            for stage, stats in sorted(snapshot["stages"].items()):
+                value = stats[key]
+                value = f"{value:.6f}" if isinstance(value, float) else value
+                lines.append(f'{prefix}_{metric}{{stage="{stage}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+def is_enabled():
+    return _enabled
+
+
+def set_enabled(enabled):
+    """Włącza/wyłącza instrumentację w czasie działania (np. w testach)."""
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def record(stage, seconds, size=0):
+    """Zapisuje pomiar w bieżącym śladzie (jeśli jest) i w licznikach procesu."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.record(stage, seconds, size)
+    metrics.record(stage, seconds, size)
+
+
+def input_size(value):
+    """Rozmiar wejścia: długość tekstu/bajtów albo suma długości elementów listy."""
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(len(v) for v in value if isinstance(v, (str, bytes)))
+    return 0
+
+
+@contextmanager
+def stage(name, size=0):
+    """Mierzy blok kodu jako etap `name`."""
+    if not _enabled:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started, size)
+
+
+def instrumented(name=None):
+    """Dekorator mierzący wywołania funkcji; rozmiar wejścia liczony z pierwszego argumentu."""
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(stage_name, time.perf_counter() - started, input_size(args[0]) if args else 0)
+
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def request_trace(name):
+    """
+    Ślad jednego żądania. Zagnieżdżone wywołanie dołącza do już otwartego śladu
+    (np. main.py obejmuje nim parse_resume i analyze_candidate), więc wszystkie etapy
+    lądują w jednym miejscu. Zwraca None, gdy instrumentacja jest wyłączona.
+    """
+    if not _enabled:
+        yield None
+        return
+    trace = _current_trace.get()
+    if trace is not None:
+        yield trace
+        return
+    trace = Trace(name)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        trace.finished = time.perf_counter()
+        metrics.record_request(name)
+        if INSTRUMENTATION_JSON_LOG:
+            logger.info(json.dumps(trace.as_dict(), ensure_ascii=False))
@@ -1,22 +1,188 @@
 import streamlit as st
 import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from resume_parser import parse_resume
-from analyzer import analyze_candidate
+from analyzer import analyze_candidate, rank_candidates, get_embedding, JobProfile
+from instrumentation import request_trace
 import os
 import json
 
+# Liczba CV parsowanych równolegle w trybie rankingu
+PARSE_WORKERS = 8
+
+
+@st.cache_data(show_spinner=False)
+def load_job_text(job_desc_path):
+    """Tekst oferty z PDF - parsowany raz, kolejne reruny biorą go z cache Streamlit."""
+    return parse_resume(job_desc_path).get('full_text', '')
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def load_job_profile(job_desc_text):
+    """Profil oferty razem z embeddingiem - liczony raz na treść oferty i współdzielony między rerunami."""
+    profile = JobProfile(job_desc_text)
+    profile.set_embedding(get_embedding(job_desc_text))
+    return profile
+
+
+def render_result(result, resume_data):
+    """Szczegóły oceny jednego kandydata (wynik, breakdown, debug, JSON)."""
+    # Wyświetl wynik 
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Match Score", f"{result.get('score', 0)}%")
+    with col2:
+        rec = result.get('recommendation', 'NO')
+        confidence = result.get('recommendation_confidence', 'low')
+
+        # Wybierz kolor w zależności od confidence
+        if rec == "YES":
+            if confidence == "high":
+                rec_color = "🟢"  # Zielone - wysoki match
+            elif confidence == "medium":
+                rec_color = "🟡"  # Żółte - tylko technical lub umiarkowany
+            else:
+                rec_color = "🟠"  # Pomarańczowe - niski
+        else:
+            rec_color = "🔴"  # Czerwone - NO
+
+        st.metric("Recommendation", f"{rec_color} {rec}")
+
+    if 'recommendation_reason' in result:
+        confidence_label = {
+            "high": "High confidence",
+            "medium": "Medium confidence - review carefully",
+            "low": "Low confidence"
+        }.get(confidence, "")
+        st.info(f"💡 {result['recommendation_reason']}\n\n*{confidence_label}*")
+
+    if 'similarity_scores' in result:
+        st.write("**📈 Match Breakdown (weights: Technical 45%, Keywords 25%, Experience 20%, Embedding 10%):**")
+        scores = result['similarity_scores']
+        col_a, col_b, col_c, col_d = st.columns(4)
+        with col_a:
+            tech_score = scores.get('technical', 0)*100
+            st.metric("🔧 Technical", f"{tech_score:.1f}%", 
+                     delta="Primary factor" if tech_score >= 40 else None)
+        with col_b:
+            st.metric("🔑 Keywords", f"{scores.get('keywords', 0)*100:.1f}%")
+        with col_c:
+            st.metric("👔 Experience", f"{scores.get('experience', 0)*100:.1f}%")
+        with col_d:
+            st.metric("🧠 Embedding", f"{scores.get('embedding', 0)*100:.1f}%")
+
+    st.write("**✅ Strong Matches:**")
+    for match in result.get('strong_matches', []):
+        st.write(f"- {match}")
+
+    st.write("**❌ Missing Requirements:**")
+    for req in result.get('missing_requirements', []):
+        st.write(f"- {req}")
+
+    if 'debug' in result:
+        with st.expander("🐛 Debug Info"):
+            debug = result['debug']
+            st.write("**Job Requirements Breakdown:**")
+            col_d1, col_d2 = st.columns(2)
+            with col_d1:
+                st.write(f"🔴 Required tech: {debug.get('job_tech_required_count', 0)}")
+                if debug.get('job_tech_required'):
+                    st.write(f"   → {', '.join(debug['job_tech_required'])}")
+            with col_d2:
+                st.write(f"🟡 Nice-to-have tech: {debug.get('job_tech_nice_count', 0)}")
+                if debug.get('job_tech_nice'):
+                    st.write(f"   → {', '.join(debug['job_tech_nice'])}")
+
+            st.write(f"\n**Resume:**")
+            st.write(f"- Keywords found: {debug.get('resume_keywords_count', 0)}")
+            st.write(f"- Technical terms: {debug.get('resume_tech_count', 0)}")
+            if 'resume_tech_terms' in debug:
+                st.write(f"   → {', '.join(debug['resume_tech_terms'])}")
+
+            st.write(f"\n**Seniority & Experience:**")
+            st.write(f"- Job requires: {debug.get('job_seniority', 'Not specified')} level, {debug.get('job_years', 0)}+ years")
+            st.write(f"- Resume shows: {debug.get('resume_seniority', 'Not specified')} level, {debug.get('resume_years', 0)} years")
+            st.write(f"- Seniority match: {debug.get('seniority_match', 0)*100:.1f}%")
+            st.write(f"- Experience match: {debug.get('experience_match', 0)*100:.1f}%")
+
+            st.write(f"\n**Match Ratios:**")
+            st.write(f"- Required tech match: {debug.get('required_match_ratio', 0)*100:.1f}%")
+            st.write(f"- Nice-to-have match: {debug.get('nice_match_ratio', 0)*100:.1f}%")
+            st.write(f"- Keywords match: {debug.get('common_keywords_count', 0)}/{debug.get('job_keywords_count', 0)}")
+
+            if 'timings' in debug:
+                timings = debug['timings']
+                st.write(f"\n**Timings ({timings['total_ms']:.0f} ms total):**")
+                st.table([
+                    {"stage": name, "calls": stats["calls"], "ms": stats["ms"], "input size": stats["input_size"]}
+                    for name, stats in sorted(timings["stages"].items(), key=lambda item: -item[1]["ms"])
+                ])
+
+    with st.expander("🔍 View Full Analysis (JSON)"):
+        st.json(result)
+
+    with st.expander("📄 View Parsed Resume"):
+        st.json(resume_data)
+
+
+def save_upload(uploaded_file):
+    """Zapisuje wgrany plik do pliku tymczasowego i zwraca jego ścieżkę."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
+        tmp.write(uploaded_file.getvalue())
+        return tmp.name
+
+
+def parse_resumes_concurrently(paths, progress):
+    """Parsuje CV w puli wątków; zwraca ({id: resume_data}, {id: błąd}) i aktualizuje pasek postępu."""
+    resumes, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=PARSE_WORKERS) as executor:
+        futures = {executor.submit(parse_resume, path): candidate_id for candidate_id, path in paths.items()}
+        for done, future in enumerate(as_completed(futures), start=1):
+            candidate_id = futures[future]
+            try:
+                resumes[candidate_id] = future.result()
+            except Exception as e:
+                errors[candidate_id] = f"{type(e).__name__}: {e}"
+            progress.progress(done / len(futures), text=f"Parsed {done}/{len(futures)}: {candidate_id}")
+    # Kolejność jak na wejściu (as_completed zwraca w kolejności ukończenia)
+    return {cid: resumes[cid] for cid in paths if cid in resumes}, errors
+
+
+def ranking_rows(results):
+    rows = []
+    for rank, result in enumerate(results, start=1):
+        scores = result.get('similarity_scores', {})
+        rows.append({
+            "Rank": rank,
+            "Candidate": result["candidate_id"],
+            "Score": result.get('score', 0),
+            "Recommendation": result.get('recommendation', 'NO'),
+            "Confidence": result.get('recommendation_confidence', 'low'),
+            "Technical %": round(scores.get('technical', 0) * 100, 1),
+            "Keywords %": round(scores.get('keywords', 0) * 100, 1),
+            "Experience %": round(scores.get('experience', 0) * 100, 1),
+            "Embedding %": round(scores.get('embedding', 0) * 100, 1),
+        })
+    return rows
+
+
 st.set_page_config(page_title="AI HR Candidate Analyzer")
 st.title("AI HR Candidate Analyzer")
 st.caption("🎓 Wersja studencka - analiza za pomocą embeddings (text-embedding-3-large)")
 
-uploaded_file = st.file_uploader("Upload Candidate Resume (PDF)", type=["pdf"])
+mode = st.radio("Mode", ["Single resume", "Rank many resumes"], horizontal=True)
 
 resumes_dir = "data/resumes"
-sample_options = ["-- none --"]
+sample_files = []
 if os.path.exists(resumes_dir):
-    sample_options += [f for f in os.listdir(resumes_dir) if f.endswith('.pdf')]
+    sample_files = sorted(f for f in os.listdir(resumes_dir) if f.endswith('.pdf'))
 
-sample_select = st.selectbox("Or pick a sample resume:", options=sample_options)
+if mode == "Single resume":
+    uploaded_file = st.file_uploader("Upload Candidate Resume (PDF)", type=["pdf"])
+    sample_select = st.selectbox("Or pick a sample resume:", options=["-- none --"] + sample_files)
+else:
+    uploaded_files = st.file_uploader("Upload Candidate Resumes (PDF)", type=["pdf"], accept_multiple_files=True)
+    selected_samples = st.multiselect("Add sample resumes:", options=sample_files)
 
 st.divider()
 job_description = st.text_area("Paste Job Description here", height=250)
@@ -28,24 +194,23 @@ if os.path.exists(job_desc_dir):
 
 job_desc_select = st.selectbox("Or pick a sample job description:", options=job_desc_options)
 
-if st.button("Analyze Candidate"):
+
+def selected_job_text():
+    if job_desc_select and job_desc_select != "-- none --":
+        with st.spinner("Parsing job description..."):
+            return load_job_text(os.path.join(job_desc_dir, job_desc_select))
+    return job_description
+
+
+if mode == "Single resume" and st.button("Analyze Candidate"):
     tmp_path = None
-    job_desc_text = None
     
     if sample_select and sample_select != "-- none --":
         tmp_path = os.path.join(resumes_dir, sample_select)
     elif uploaded_file:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            tmp.write(uploaded_file.read())
-            tmp_path = tmp.name
+        tmp_path = save_upload(uploaded_file)
     
-    if job_desc_select and job_desc_select != "-- none --":
-        job_desc_path = os.path.join(job_desc_dir, job_desc_select)
-        with st.spinner("Parsing job description..."):
-            job_desc_data = parse_resume(job_desc_path)
-            job_desc_text = job_desc_data.get('full_text', '')
-    elif job_description:
-        job_desc_text = job_description
+    job_desc_text = selected_job_text()
     
     if not tmp_path:
         st.error("Please upload a PDF resume or select a sample.")
@@ -53,102 +218,67 @@ if st.button("Analyze Candidate"):
         st.error("Please paste a job description or select a sample.")
     else:  
 
-        with st.spinner("Parsing resume..."):
-            resume_data = parse_resume(tmp_path)
-        
-        if not resume_data or all(not resume_data.get(key) for key in ['skills', 'experience', 'education']):
-            st.warning("⚠️ CV może być puste lub niepoprawnie sparsowane. Sprawdź 'View Parsed Resume' poniżej.")
+        # Jeden ślad dla parsowania i analizy - czasy obu trafiają do result["debug"]["timings"]
+        with request_trace("screening"):
+            with st.spinner("Parsing resume..."):
+                resume_data = parse_resume(tmp_path)
+            
+            if not resume_data or all(not resume_data.get(key) for key in ['skills', 'experience', 'education']):
+                st.warning("⚠️ CV może być puste lub niepoprawnie sparsowane. Sprawdź 'View Parsed Resume' poniżej.")
 
-        with st.spinner("Analyzing candidate with Azure OpenAI Embeddings..."):
-            result = analyze_candidate(resume_data, job_desc_text)
+            with st.spinner("Analyzing candidate with Azure OpenAI Embeddings..."):
+                result = analyze_candidate(resume_data, job_desc_text)
 
         st.subheader("📊 Analysis Result")
+        render_result(result, resume_data)
+
+if mode == "Rank many resumes":
+    if st.button("Rank Candidates"):
+        paths = {name: os.path.join(resumes_dir, name) for name in selected_samples}
+        temp_paths = []
+        for uploaded in uploaded_files or []:
+            candidate_id = uploaded.name
+            suffix = 2
+            while candidate_id in paths:
+                candidate_id = f"{uploaded.name} ({suffix})"
+                suffix += 1
+            paths[candidate_id] = save_upload(uploaded)
+            temp_paths.append(paths[candidate_id])
+        
+        job_desc_text = selected_job_text()
         
-        # Wyświetl wynik 
-        col1, col2 = st.columns(2)
-        with col1:
-            st.metric("Match Score", f"{result.get('score', 0)}%")
-        with col2:
-            rec = result.get('recommendation', 'NO')
-            confidence = result.get('recommendation_confidence', 'low')
+        if not paths:
+            st.error("Please upload PDF resumes or select samples.")
+        elif not job_desc_text:
+            st.error("Please paste a job description or select a sample.")
+        else:
+            try:
+                resumes, errors = parse_resumes_concurrently(paths, st.progress(0.0, text="Parsing resumes..."))
+            finally:
+                for path in temp_paths:
+                    os.unlink(path)
             
-            # Wybierz kolor w zależności od confidence
-            if rec == "YES":
-                if confidence == "high":
-                    rec_color = "🟢"  # Zielone - wysoki match
-                elif confidence == "medium":
-                    rec_color = "🟡"  # Żółte - tylko technical lub umiarkowany
-                else:
-                    rec_color = "🟠"  # Pomarańczowe - niski
-            else:
-                rec_color = "🔴"  # Czerwone - NO
+            with st.spinner(f"Scoring {len(resumes)} candidates..."):
+                job_profile = load_job_profile(job_desc_text)
+                results = rank_candidates(resumes, job_profile) if resumes else []
             
-            st.metric("Recommendation", f"{rec_color} {rec}")
-        
-        if 'recommendation_reason' in result:
-            confidence_label = {
-                "high": "High confidence",
-                "medium": "Medium confidence - review carefully",
-                "low": "Low confidence"
-            }.get(confidence, "")
-            st.info(f"💡 {result['recommendation_reason']}\n\n*{confidence_label}*")
-        
-        if 'similarity_scores' in result:
-            st.write("**📈 Match Breakdown (weights: Technical 45%, Keywords 25%, Experience 20%, Embedding 10%):**")
-            scores = result['similarity_scores']
-            col_a, col_b, col_c, col_d = st.columns(4)
-            with col_a:
-                tech_score = scores.get('technical', 0)*100
-                st.metric("🔧 Technical", f"{tech_score:.1f}%", 
-                         delta="Primary factor" if tech_score >= 40 else None)
-            with col_b:
-                st.metric("🔑 Keywords", f"{scores.get('keywords', 0)*100:.1f}%")
-            with col_c:
-                st.metric("👔 Experience", f"{scores.get('experience', 0)*100:.1f}%")
-            with col_d:
-                st.metric("🧠 Embedding", f"{scores.get('embedding', 0)*100:.1f}%")
-        
-        st.write("**✅ Strong Matches:**")
-        for match in result.get('strong_matches', []):
-            st.write(f"- {match}")
-        
-        st.write("**❌ Missing Requirements:**")
-        for req in result.get('missing_requirements', []):
-            st.write(f"- {req}")
-        
-        if 'debug' in result:
-            with st.expander("🐛 Debug Info"):
-                debug = result['debug']
-                st.write("**Job Requirements Breakdown:**")
-                col_d1, col_d2 = st.columns(2)
-                with col_d1:
-                    st.write(f"🔴 Required tech: {debug.get('job_tech_required_count', 0)}")
-                    if debug.get('job_tech_required'):
-                        st.write(f"   → {', '.join(debug['job_tech_required'])}")
-                with col_d2:
-                    st.write(f"🟡 Nice-to-have tech: {debug.get('job_tech_nice_count', 0)}")
-                    if debug.get('job_tech_nice'):
-                        st.write(f"   → {', '.join(debug['job_tech_nice'])}")
-                
-                st.write(f"\n**Resume:**")
-                st.write(f"- Keywords found: {debug.get('resume_keywords_count', 0)}")
-                st.write(f"- Technical terms: {debug.get('resume_tech_count', 0)}")
-                if 'resume_tech_terms' in debug:
-                    st.write(f"   → {', '.join(debug['resume_tech_terms'])}")
-                
-                st.write(f"\n**Seniority & Experience:**")
-                st.write(f"- Job requires: {debug.get('job_seniority', 'Not specified')} level, {debug.get('job_years', 0)}+ years")
-                st.write(f"- Resume shows: {debug.get('resume_seniority', 'Not specified')} level, {debug.get('resume_years', 0)} years")
-                st.write(f"- Seniority match: {debug.get('seniority_match', 0)*100:.1f}%")
-                st.write(f"- Experience match: {debug.get('experience_match', 0)*100:.1f}%")
-                
-                st.write(f"\n**Match Ratios:**")
-                st.write(f"- Required tech match: {debug.get('required_match_ratio', 0)*100:.1f}%")
-                st.write(f"- Nice-to-have match: {debug.get('nice_match_ratio', 0)*100:.1f}%")
-                st.write(f"- Keywords match: {debug.get('common_keywords_count', 0)}/{debug.get('job_keywords_count', 0)}")
-        
-        with st.expander("🔍 View Full Analysis (JSON)"):
-            st.json(result)
+            # Wyniki w session_state - przetrwają reruny wywołane wyborem kandydata w tabeli
+            st.session_state["ranking"] = {"results": results, "resumes": resumes, "errors": errors}
 
-        with st.expander("📄 View Parsed Resume"):
-            st.json(resume_data)
\ No newline at end of file
+    ranking = st.session_state.get("ranking")
+    if ranking:
+        st.subheader(f"🏆 Ranking ({len(ranking['results'])} candidates)")
+        for candidate_id, error in ranking["errors"].items():
+            st.error(f"❌ {candidate_id}: {error}")
+        
+        if ranking["results"]:
+            st.dataframe(ranking_rows(ranking["results"]), hide_index=True)
+            
+            results_by_id = {result["candidate_id"]: result for result in ranking["results"]}
+            selected = st.selectbox(
+                "Candidate details:",
+                options=list(results_by_id),
+                format_func=lambda cid: f"{cid} - {results_by_id[cid]['score']}% ({results_by_id[cid]['recommendation']})"
+            )
+            st.subheader(f"📊 {selected}")
+            render_result(results_by_id[selected], ranking["resumes"][selected])
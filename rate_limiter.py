@@ -0,0 +1,332 @@
+"""
+Wspólny harmonogram wywołań Azure (OpenAI, Form Recognizer).
+Każda usługa ma swój AzureScheduler: kubełki żetonów dla limitu żądań (RPM) i tokenów (TPM),
+adaptacyjny limit współbieżności (AIMD - rośnie powoli przy sukcesach, spada o połowę przy 429)
+oraz ponowienia błędów przejściowych z losowym opóźnieniem. Retry-After z odpowiedzi 429
+wstrzymuje wszystkie wywołania danej usługi, a nie tylko to jedno.
+
+Kubełki działają na zasadzie rezerwacji: każde wywołanie dostaje własny termin startu,
+więc żądania rozkładają się równo w czasie zamiast ruszać naraz po odblokowaniu.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from config import (
+    AZURE_OPENAI_RPM,
+    AZURE_OPENAI_TPM,
+    FORM_RECOGNIZER_RPM,
+    AZURE_MAX_CONCURRENCY,
+    AZURE_MAX_RETRIES,
+    AZURE_RETRY_BASE_DELAY,
+    AZURE_RETRY_MAX_DELAY,
+)
+
+logger = logging.getLogger(__name__)
+
+THROTTLED_STATUS = {429}
+TRANSIENT_STATUS = {408, 500, 502, 503, 504}
+# Błędy sieci z SDK (openai / azure-core) rozpoznawane po nazwie, bez importowania SDK
+TRANSIENT_ERRORS = {
+    "APIConnectionError", "APITimeoutError", "ServiceRequestError", "ServiceResponseError",
+    "ServiceRequestTimeoutError", "ServiceResponseTimeoutError",
+}
+# Ile sekund limitu mieści kubełek (Azure rozlicza kwotę minutową w krótszych oknach)
+BURST_SECONDS = 10
+
+
+class TokenBucket:
+    """
+    Kubełek żetonów z rezerwacjami: reserve(n) zwraca, ile trzeba poczekać, zanim
+    wolno zużyć n żetonów (stan może zejść poniżej zera - to kolejka rezerwacji).
+    Żądanie większe niż kubełek jest obciążane w całości i czeka proporcjonalnie dłużej,
+    więc przepustowość nie przekracza limitu niezależnie od rozmiaru żądań.
+    `per_minute` = 0 wyłącza limit.
+    """
+
+    def __init__(self, per_minute, burst_seconds=BURST_SECONDS, clock=time.monotonic):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = clock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount=1.0):
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens -= amount
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def refund(self, amount):
+        """
+        Zwraca (albo dolicza, gdy amount < 0) żetony - np. po rozliczeniu rzeczywistego zużycia tokenów.
+        Zwrot nie powinien przekraczać kwoty pobranej w reserve.
+        """
+        if not self.rate:
+            return
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class AdaptiveConcurrency:
+    """
+    Limit równoległych wywołań: +1 na pełne okno sukcesów, połowa przy throttlingu.
+    Korutyny czekające na miejsce stoją w kolejce FIFO (future + pętla zdarzeń), którą budzą
+    release i wzrost limitu - bez odpytywania i w kolejności zgłoszeń, także między pętlami.
+    """
+
+    def __init__(self, maximum, minimum=1, clock=time.monotonic, decrease_cooldown=1.0):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.limit = float(maximum)
+        self.in_flight = 0
+        self._clock = clock
+        self._decrease_cooldown = decrease_cooldown
+        self._last_decrease = None
+        self._condition = threading.Condition()
+        self._async_waiters = deque()
+
+    def try_acquire(self):
+        with self._condition:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    async def acquire_async(self):
+        loop = asyncio.get_running_loop()
+        with self._condition:
+            if not self._async_waiters and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return
+            waiter = (loop, loop.create_future())
+            self._async_waiters.append(waiter)
+        future = waiter[1]
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._condition:
+                try:
+                    self._async_waiters.remove(waiter)
+                except ValueError:
+                    pass  # miejsce zostało już przydzielone
+            # Przydzielone miejsce wraca do puli (anulowany future zwalnia je w _grant)
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def _wake_async(self):
+        """Przydziela wolne miejsca czekającym korutynom (wywoływane pod self._condition)."""
+        while self._async_waiters and self.in_flight < int(self.limit):
+            loop, future = self._async_waiters.popleft()
+            if future.done():
+                continue
+            self.in_flight += 1
+            loop.call_soon_threadsafe(self._grant, future)
+
+    def _grant(self, future):
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._wake_async()
+            self._condition.notify()
+
+    def on_success(self):
+        with self._condition:
+            if self.limit < self.maximum:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+                self._wake_async()
+                self._condition.notify_all()
+
+    def on_throttle(self):
+        with self._condition:
+            now = self._clock()
+            # Kilka 429 z tej samej fali liczy się jako jedno przeciążenie
+            if self._last_decrease is not None and now - self._last_decrease < self._decrease_cooldown:
+                return
+            self._last_decrease = now
+            self.limit = max(self.minimum, self.limit / 2)
+
+
+def error_status(error):
+    """Kod HTTP błędu SDK (openai: status_code, azure-core: status_code / response.status_code)."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def retry_after(error):
+    """Czas z nagłówków Retry-After / retry-after-ms odpowiedzi (sekundy) albo None."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    for header, scale in (("retry-after-ms", 0.001), ("x-ms-retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(header)
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value) * scale)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def classify_error(error):
+    """'throttled', 'transient' albo None (błąd, którego nie ma sensu ponawiać)."""
+    status = error_status(error)
+    if status in THROTTLED_STATUS:
+        return "throttled"
+    if status in TRANSIENT_STATUS:
+        return "transient"
+    if status is None and (isinstance(error, (ConnectionError, TimeoutError))
+                           or type(error).__name__ in TRANSIENT_ERRORS):
+        return "transient"
+    return None
+
+
+class AzureScheduler:
+    """Harmonogram wywołań jednej usługi Azure - współdzielony przez wszystkie wątki procesu."""
+
+    def __init__(self, name, rpm=0, tpm=0, max_concurrency=AZURE_MAX_CONCURRENCY, max_retries=AZURE_MAX_RETRIES,
+                 base_delay=AZURE_RETRY_BASE_DELAY, max_delay=AZURE_RETRY_MAX_DELAY,
+                 clock=time.monotonic, sleep=time.sleep, rng=None):
+        self.name = name
+        self.requests = TokenBucket(rpm, clock=clock)
+        self.tokens = TokenBucket(tpm, clock=clock)
+        self.concurrency = AdaptiveConcurrency(max_concurrency, clock=clock)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._clock = clock
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self.stats = {"calls": 0, "retries": 0, "throttled": 0, "failures": 0}
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _start_delay(self, tokens):
+        """Rezerwuje miejsce w limitach; zwraca czas oczekiwania przed wysłaniem żądania."""
+        delay = max(self.requests.reserve(1), self.tokens.reserve(tokens) if tokens else 0.0)
+        with self._lock:
+            return max(delay, self._paused_until - self._clock())
+
+    def _retry_delay(self, error, attempt):
+        """Decyduje o ponowieniu; zwraca opóźnienie albo None, gdy błąd trzeba zgłosić dalej."""
+        kind = classify_error(error)
+        if kind is None or attempt >= self.max_retries:
+            self._count("failures")
+            return None
+        self._count("retries")
+        # Pełny jitter: losowo z [0, base * 2^attempt], żeby ponowienia wielu wątków się rozjechały
+        delay = self._rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if kind == "throttled":
+            self._count("throttled")
+            self.concurrency.on_throttle()
+            server_delay = retry_after(error)
+            if server_delay is not None:
+                delay = min(self.max_delay, server_delay) + self._rng.uniform(0, self.base_delay / 4)
+                with self._lock:
+                    self._paused_until = max(self._paused_until, self._clock() + delay)
+        logger.warning("%s: %s (próba %d/%d), ponowienie za %.1fs", self.name, kind, attempt + 1,
+                       self.max_retries + 1, delay)
+        return delay
+
+    @contextmanager
+    def _slot(self):
+        self.concurrency.acquire()
+        try:
+            yield
+        finally:
+            self.concurrency.release()
+
+    def call(self, func, *args, tokens=0, **kwargs):
+        """Wywołuje func(*args, **kwargs) w limitach usługi, ponawiając błędy przejściowe i 429."""
+        self._count("calls")
+        attempt = 0
+        while True:
+            delay = self._start_delay(tokens)
+            if delay > 0:
+                self._sleep(delay)
+            with self._slot():
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt)
+                    if delay is None:
+                        raise
+                else:
+                    self.concurrency.on_success()
+                    return result
+            self._sleep(delay)
+            attempt += 1
+
+    async def call_async(self, func, *args, tokens=0, **kwargs):
+        """Asynchroniczny odpowiednik call - func zwraca korutynę."""
+        self._count("calls")
+        attempt = 0
+        while True:
+            delay = self._start_delay(tokens)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self.concurrency.acquire_async()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+            else:
+                self.concurrency.on_success()
+                return result
+            finally:
+                self.concurrency.release()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+SCHEDULER_LIMITS = {
+    "openai": {"rpm": AZURE_OPENAI_RPM, "tpm": AZURE_OPENAI_TPM},
+    "form_recognizer": {"rpm": FORM_RECOGNIZER_RPM},
+}
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(name):
+    """Zwraca (tworzony raz na proces) harmonogram usługi z SCHEDULER_LIMITS."""
+    scheduler = _schedulers.get(name)
+    if scheduler is None:
+        with _schedulers_lock:
+            scheduler = _schedulers.get(name)
+            if scheduler is None:
+                scheduler = _schedulers[name] = AzureScheduler(name, **SCHEDULER_LIMITS.get(name, {}))
+    return scheduler
@@ -1,24 +1,197 @@
-from azure.ai.formrecognizer import DocumentAnalysisClient
-from azure.core.credentials import AzureKeyCredential
-from config import FORM_RECOGNIZER_ENDPOINT, FORM_RECOGNIZER_KEY
+from config import FORM_RECOGNIZER_ENDPOINT, FORM_RECOGNIZER_KEY, FORM_RECOGNIZER_POOL_SIZE
+from document_cache import get_document_cache, file_digest
+from instrumentation import instrumented, stage
+from rate_limiter import get_scheduler
+from bisect import bisect_right
+from functools import lru_cache
+import asyncio
 import json
+import os
 import re
+import threading
+
+DOCUMENT_MODEL = "prebuilt-document"
+
+# Wersja logiki dzielenia tekstu na sekcje - podbij przy każdej zmianie
+# build_resume_data / extract_section, aby unieważnić sekcje w cache dokumentów.
+SECTION_EXTRACTION_VERSION = 2
+
+# Współdzielony klient Form Recognizer (get_client) - jeden na proces
+_client = None
+_client_lock = threading.Lock()
 
 def parse_resume(file_path: str):
     """
     Parsuje CV używając Azure Document Intelligence.
     Model prebuilt-document ekstrahuje cały tekst, a następnie dzielimy go na sekcje.
+    Wynik zapisywany jest w cache dokumentów pod SHA-256 pliku, więc ponowne
+    parsowanie tego samego pliku nie wysyła go do Azure.
+    """
+    with open(file_path, "rb") as f:
+        data = f.read()
+
+    with stage("parse_resume", size=len(data)):
+        digest = file_digest(data)
+        resume_data = load_cached_resume(digest)
+        if resume_data is not None:
+            return resume_data
+
+        client = get_client()
+
+        with stage("form_recognizer", size=len(data)):
+            result = get_scheduler("form_recognizer").call(_analyze_document, client, data)
+
+        return store_parsed_resume(digest, result.content or "")
+
+def _analyze_document(client, data):
+    """Jedno pełne wywołanie analizy (żądanie + odpytywanie) - ponawiane w całości przez harmonogram."""
+    poller = client.begin_analyze_document(DOCUMENT_MODEL, document=data)
+    return poller.result()
+
+async def _analyze_document_async(client, data):
+    poller = await client.begin_analyze_document(DOCUMENT_MODEL, document=data)
+    return await poller.result()
+
+def get_client():
+    """
+    Zwraca współdzielonego klienta Form Recognizer (tworzonego przy pierwszym użyciu).
+    Klient SDK jest bezpieczny wątkowo, a jego pula połączeń pozwala kolejnym dokumentom
+    korzystać z otwartych już połączeń TLS zamiast zestawiać nowe.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = create_client()
+    return _client
+
+def close_client():
+    """Zamyka współdzielonego klienta (kolejne get_client utworzy nowego)."""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
+
+def create_client(endpoint=None, key=None, pool_size=FORM_RECOGNIZER_POOL_SIZE, **kwargs):
+    """
+    Tworzy klienta Form Recognizer z pulą do `pool_size` połączeń (SDK Azure importowany dopiero tutaj).
+    Dodatkowe argumenty trafiają do transportu HTTP (np. connection_verify, connection_timeout).
     """
-    client = DocumentAnalysisClient(
+    import requests
+    from azure.ai.formrecognizer import DocumentAnalysisClient
+    from azure.core.credentials import AzureKeyCredential
+    from azure.core.pipeline.transport import RequestsTransport
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    # Ponowienia i limity obsługuje rate_limiter - bez drugiej warstwy retry w SDK
+    return DocumentAnalysisClient(
+        endpoint or FORM_RECOGNIZER_ENDPOINT,
+        AzureKeyCredential(key or FORM_RECOGNIZER_KEY),
+        transport=RequestsTransport(session=session, session_owner=True, **kwargs),
+        retry_total=0
+    )
+
+def create_async_client():
+    """Tworzy asynchronicznego klienta Form Recognizer (SDK Azure importowany dopiero tutaj)."""
+    from azure.ai.formrecognizer.aio import DocumentAnalysisClient
+    from azure.core.credentials import AzureKeyCredential
+
+    # Ponowienia i limity obsługuje rate_limiter - bez drugiej warstwy retry w SDK
+    return DocumentAnalysisClient(
         FORM_RECOGNIZER_ENDPOINT,
-        AzureKeyCredential(FORM_RECOGNIZER_KEY)
+        AzureKeyCredential(FORM_RECOGNIZER_KEY),
+        retry_total=0
     )
 
+def load_cached_resume(digest):
+    """Zwraca sekcje z cache dokumentów (przeliczone, jeśli zmieniła się wersja ekstrakcji) albo None."""
+    cache = get_document_cache()
+    if cache is None:
+        return None
+    cached = cache.get(digest, DOCUMENT_MODEL)
+    if cached is None:
+        return None
+    content, resume_data, version = cached
+    if version == SECTION_EXTRACTION_VERSION:
+        return resume_data
+    resume_data = build_resume_data(content)
+    cache.put(digest, DOCUMENT_MODEL, content, resume_data, SECTION_EXTRACTION_VERSION)
+    return resume_data
+
+def store_parsed_resume(digest, content):
+    """Dzieli tekst na sekcje i zapisuje wynik w cache dokumentów (puste dokumenty nie są zapisywane)."""
+    resume_data = build_resume_data(content)
+    cache = get_document_cache()
+    if cache is not None and content.strip():
+        cache.put(digest, DOCUMENT_MODEL, content, resume_data, SECTION_EXTRACTION_VERSION)
+    return resume_data
+
+def list_resume_files(folder):
+    """Zwraca posortowane ścieżki plików PDF z folderu."""
+    return sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.lower().endswith(".pdf")
+    )
+
+async def parse_resumes_async(paths, max_concurrency=8):
+    """
+    Asynchronicznie parsuje wiele CV, trzymając do `max_concurrency` dokumentów naraz w Azure.
+    Limit jest obniżany do współbieżności harmonogramu Form Recognizer (AZURE_MAX_CONCURRENCY),
+    a ten może go dalej zmniejszać po 429.
+    Async generator - zwraca słowniki {"path", "data", "error"} w kolejności ukończenia.
+    Błąd jednego pliku trafia do jego "error" i nie przerywa całej partii.
+    """
+    max_concurrency = min(max_concurrency, get_scheduler("form_recognizer").concurrency.maximum)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async with create_async_client() as client:
+
+        async def parse_one(path):
+            async with semaphore:
+                try:
+                    return {"path": path, "data": await _parse_resume_with_client(client, path), "error": None}
+                except Exception as e:
+                    return {"path": path, "data": None, "error": f"{type(e).__name__}: {e}"}
+
+        tasks = [asyncio.create_task(parse_one(path)) for path in paths]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+async def _parse_resume_with_client(client, file_path):
+    """
+    Asynchroniczny odpowiednik parse_resume, korzystający ze współdzielonego klienta.
+    Odczyt pliku, cache dokumentów (SQLite) i podział na sekcje działają w wątku (asyncio.to_thread),
+    żeby nie blokować pętli zdarzeń z pozostałymi dokumentami w locie.
+    """
+    data = await asyncio.to_thread(_read_file, file_path)
+
+    digest = file_digest(data)
+    resume_data = await asyncio.to_thread(load_cached_resume, digest)
+    if resume_data is not None:
+        return resume_data
+
+    with stage("form_recognizer", size=len(data)):
+        result = await get_scheduler("form_recognizer").call_async(_analyze_document_async, client, data)
+
+    return await asyncio.to_thread(store_parsed_resume, digest, result.content or "")
+
+def _read_file(file_path):
     with open(file_path, "rb") as f:
-        poller = client.begin_analyze_document("prebuilt-document", document=f)
-        result = poller.result()
+        return f.read()
 
-    if not result.content or not result.content.strip():
+@instrumented()
+def build_resume_data(full_text):
+    """Dzieli tekst wyciągnięty z dokumentu na sekcje (skills, experience, education)."""
+    if not full_text or not full_text.strip():
         return {
             "skills": [],
             "experience": [],
@@ -26,12 +199,12 @@ def parse_resume(file_path: str):
             "full_text": "",
             "error": "Nie udało się wyciągnąć tekstu z PDF"
         }
-
-    full_text = result.content
     
-    skills = extract_section(full_text, ["skills", "umiejętności", "kompetencje", "technical skills", "technologies"])
-    experience = extract_section(full_text, ["experience", "employment", "work history", "doświadczenie", "praca", "career"])
-    education = extract_section(full_text, ["education", "wykształcenie", "studia", "academic"])
+    sections = segment_resume(full_text)
+    skills = sections["skills"]["text"] if "skills" in sections else ""
+    experience = sections["experience"]["text"] if "experience" in sections else ""
+    education = sections["education"]["text"] if "education" in sections else ""
+    section_offsets = {name: [section["start"], section["end"]] for name, section in sections.items()}
     
     if not skills and not experience and not education:
         text_preview = full_text[:2000] if len(full_text) > 2000 else full_text
@@ -39,50 +212,124 @@ def parse_resume(file_path: str):
             "skills": [],
             "experience": [text_preview],
             "education": [],
-            "full_text": full_text
+            "full_text": full_text,
+            "section_offsets": section_offsets
         }
     
     return {
         "skills": [skills] if skills else [],
         "experience": [experience] if experience else [],
         "education": [education] if education else [],
-        "full_text": full_text
+        "full_text": full_text,
+        "section_offsets": section_offsets
     }
 
-def extract_section(text, keywords):
+# Słowa kluczowe nagłówków - kolejność ma znaczenie (pierwsze znalezione słowo wygrywa)
+SECTION_KEYWORDS = {
+    "skills": ["skills", "umiejętności", "kompetencje", "technical skills", "technologies"],
+    "experience": ["experience", "employment", "work history", "doświadczenie", "praca", "career"],
+    "education": ["education", "wykształcenie", "studia", "academic"],
+}
+
+# Co może stać po słowie kluczowym nagłówka, w kolejności priorytetu:
+# "Skills:", "Skills" na końcu linii, "Skills -"
+_HEADER_SUFFIX_PATTERNS = [
+    re.compile(r'\s*[:：]\s*'),
+    re.compile(r'\s*\n'),
+    re.compile(r'\s*[-—]\s*'),
+]
+# Początek kolejnej sekcji (dowolny nagłówek z wielkiej litery)
+_NEXT_HEADER_PATTERN = re.compile(r'\n\s*[A-Z][A-Za-z\s]{2,30}[:：\n]')
+# Inne sekcje: krótka linia z wielkiej litery zakończona dwukropkiem albo linia wielkimi literami
+_OTHER_HEADER_PATTERN = re.compile(r'^[ \t]*([A-Z][A-Za-z &/]{2,30}?)[ \t]*[:：][ \t]*$|^[ \t]*([A-Z][A-Z &/]{2,30}?)[ \t]*$', re.MULTILINE)
+
+@lru_cache(maxsize=64)
+def _keyword_scan_pattern(keywords):
+    alternation = '|'.join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True))
+    return re.compile(r'\n\s*(?=' + alternation + ')', re.IGNORECASE)
+
+def _scan_header_keywords(text_lower, keywords):
     """
-    Ekstrahuje sekcję z tekstu na podstawie słów kluczowych nagłówków.
+    Jeden skan tekstu: dla każdej pary (słowo kluczowe, typ nagłówka) zwraca koniec
+    pierwszego (najbardziej na lewo) pasującego nagłówka.
     """
-    text_lower = text.lower()
-    
-    start_pos = -1
-    
+    first_match = {}
+    for candidate in _keyword_scan_pattern(keywords).finditer(text_lower):
+        pos = candidate.end()
+        for keyword in keywords:
+            if not text_lower.startswith(keyword, pos):
+                continue
+            for pattern_index, suffix in enumerate(_HEADER_SUFFIX_PATTERNS):
+                if (keyword, pattern_index) not in first_match:
+                    match = suffix.match(text_lower, pos + len(keyword))
+                    if match:
+                        first_match[(keyword, pattern_index)] = (pos, match.end())
+    return first_match
+
+def _find_header(first_match, keywords):
+    """Zwraca (początek nagłówka, początek treści) według priorytetu słów kluczowych albo None."""
     for keyword in keywords:
-        patterns = [
-            rf'\n\s*{keyword}\s*[:：]\s*',  # "Skills:"
-            rf'\n\s*{keyword}\s*\n',         # "Skills" na początku linii
-            rf'\n\s*{keyword}\s*[-—]\s*',    # "Skills -"
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text_lower, re.IGNORECASE)
-            if match:
-                start_pos = match.end()
-                break
-        
-        if start_pos != -1:
-            break
+        for pattern_index in range(len(_HEADER_SUFFIX_PATTERNS)):
+            if (keyword, pattern_index) in first_match:
+                return first_match[(keyword, pattern_index)]
+    return None
+
+def _section_span(text, start_pos):
+    """Zakres sekcji od start_pos do następnego nagłówka (albo 800 znaków, gdy nagłówka brak lub jest za blisko)."""
+    next_header = _NEXT_HEADER_PATTERN.search(text, start_pos)
+    if next_header and next_header.start() - start_pos > 30:
+        return start_pos, next_header.start()
+    return start_pos, min(len(text), start_pos + 800)
+
+def segment_resume(text):
+    """
+    Dzieli tekst CV na sekcje w jednym przejściu po nagłówkach.
+    Zwraca {nazwa: {"start", "end", "text"}} - skills, experience, education (jeśli znalezione)
+    oraz inne sekcje z nagłówkami typu "Projects:" / "CERTIFICATES" pod nazwą nagłówka małymi literami.
+    """
+    text_lower = text.lower()
+    all_keywords = tuple(keyword for keywords in SECTION_KEYWORDS.values() for keyword in keywords)
+    first_match = _scan_header_keywords(text_lower, all_keywords)
     
-    if start_pos == -1:
-        return ""
+    sections = {}
+    header_starts = []
+    for name, keywords in SECTION_KEYWORDS.items():
+        header = _find_header(first_match, keywords)
+        if header is None:
+            continue
+        header_starts.append(header[0])
+        start, end = _section_span(text, header[1])
+        section_text = text[start:end].strip()
+        if section_text:
+            sections[name] = {"start": start, "end": end, "text": section_text}
     
-    remaining_text = text[start_pos:]
+    others = []
+    for header in _OTHER_HEADER_PATTERN.finditer(text):
+        title = (header.group(1) or header.group(2)).strip().lower()
+        header_starts.append(header.start())
+        if title not in all_keywords:
+            others.append((title, header.end()))
     
-    next_header = re.search(r'\n\s*[A-Z][A-Za-z\s]{2,30}[:：\n]', remaining_text)
+    header_starts.sort()
+    for title, start in others:
+        if title in sections:
+            continue
+        idx = bisect_right(header_starts, start)
+        end = header_starts[idx] if idx < len(header_starts) else len(text)
+        section_text = text[start:end].strip()
+        if section_text:
+            sections[title] = {"start": start, "end": end, "text": section_text}
     
-    if next_header and next_header.start() > 30:  
-        section_text = remaining_text[:next_header.start()]
-    else:
-        section_text = remaining_text[:800]
+    return sections
+
+def extract_section(text, keywords):
+    """
+    Ekstrahuje sekcję z tekstu na podstawie słów kluczowych nagłówków.
+    """
+    keywords = tuple(keywords)
+    header = _find_header(_scan_header_keywords(text.lower(), keywords), keywords)
+    if header is None:
+        return ""
     
-    return section_text.strip()
\ No newline at end of file
+    start, end = _section_span(text, header[1])
+    return text[start:end].strip()
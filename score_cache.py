@@ -0,0 +1,102 @@
+"""
+Trwały magazyn wyników oceny (SQLite).
+Klucz to (hash treści CV, hash opisu oferty, wersja logiki oceny). Wersja liczona jest
+w analyzer.scorer_version() z kodu funkcji oceniających, taksonomii i dostawcy embeddingów,
+więc zmiana wag czy progów sama unieważnia stare wyniki - zostają w bazie jako historia,
+ale nie są zwracane dla nowej wersji.
+"""
+import hashlib
+import json
+import time
+
+from config import SCORE_CACHE_ENABLED, SCORE_CACHE_PATH
+from sqlite_store import SQLiteStore, SharedInstance
+
+
+def text_digest(*texts):
+    """SHA-256 z kolejnych tekstów (rozdzielonych bajtem zerowym)."""
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ScoreCache(SQLiteStore):
+    """Wyniki analyze_candidate współdzielone między procesami przez plik SQLite."""
+
+    TABLE = "scores"
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS scores ("
+        " resume_hash TEXT NOT NULL,"
+        " job_hash TEXT NOT NULL,"
+        " scorer_version TEXT NOT NULL,"
+        " label TEXT,"
+        " score INTEGER NOT NULL,"
+        " recommendation TEXT,"
+        " result TEXT NOT NULL,"
+        " created REAL NOT NULL,"
+        " PRIMARY KEY (resume_hash, job_hash, scorer_version))",
+        "CREATE INDEX IF NOT EXISTS scores_by_job ON scores (job_hash, scorer_version, score)",
+    )
+
+    def get(self, resume_hash, job_hash, scorer_version):
+        """Zwraca zapisany wynik albo None."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT result FROM scores WHERE resume_hash = ? AND job_hash = ? AND scorer_version = ?",
+                (resume_hash, job_hash, scorer_version),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, resume_hash, job_hash, scorer_version, result, label=None):
+        """Zapisuje wynik; `label` (np. nazwa pliku CV) nie jest nadpisywany pustą wartością."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO scores (resume_hash, job_hash, scorer_version, label, score, recommendation, result, created)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (resume_hash, job_hash, scorer_version) DO UPDATE SET"
+                " label = COALESCE(excluded.label, scores.label), score = excluded.score,"
+                " recommendation = excluded.recommendation, result = excluded.result, created = excluded.created",
+                (resume_hash, job_hash, scorer_version, label, result.get("score", 0), result.get("recommendation"),
+                 json.dumps(result, ensure_ascii=False), time.time()),
+            )
+            conn.commit()
+
+    def history(self, job_hash, scorer_version=None, limit=None):
+        """
+        Zapisane wyniki dla oferty, od najwyższego score. Bez `scorer_version` zwraca
+        wyniki wszystkich wersji (każdy wiersz ma swoją wersję).
+        """
+        query = "SELECT resume_hash, scorer_version, label, score, recommendation, result, created FROM scores" \
+                " WHERE job_hash = ?"
+        params = [job_hash]
+        if scorer_version is not None:
+            query += " AND scorer_version = ?"
+            params.append(scorer_version)
+        query += " ORDER BY score DESC, created DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._connect().execute(query, params).fetchall()
+        return [
+            {"resume_hash": resume_hash, "scorer_version": version, "label": label, "score": score,
+             "recommendation": recommendation, "result": json.loads(result), "created": created}
+            for resume_hash, version, label, score, recommendation, result, created in rows
+        ]
+
+
+_default_cache = SharedInstance(lambda: ScoreCache(SCORE_CACHE_PATH))
+
+
+def get_score_cache():
+    """Zwraca domyślny magazyn wyników albo None, jeśli jest wyłączony w konfiguracji."""
+    if not SCORE_CACHE_ENABLED:
+        return None
+    return _default_cache.get()
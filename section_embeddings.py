@@ -0,0 +1,116 @@
+"""
+Embeddingi sekcji CV liczone raz na dokument.
+Sekcje (skills, experience, education) dzielone są na fragmenty mieszczące się w limicie
+jednego wejścia embeddingów, więc koniec długiego CV nie jest obcinany. Wektory fragmentów
+uśredniane są (z wagą = długość fragmentu) do wektora sekcji, a sekcje - do wektora całego CV.
+Wektory sekcji zapisywane są w tym samym pliku SQLite co sparsowane dokumenty
+(tabela section_embeddings), więc ocena CV względem kolejnych ofert wymaga już tylko
+embeddingu oferty.
+"""
+import time
+
+import numpy as np
+
+from config import SECTION_EMBEDDINGS_ENABLED, SECTION_EMBEDDINGS_PATH, EMBEDDING_CHUNK_CHARS
+from sqlite_store import SQLiteStore, SharedInstance
+
+SECTIONS = ("skills", "experience", "education")
+
+
+def chunk_text(text, max_chars=EMBEDDING_CHUNK_CHARS):
+    """
+    Dzieli tekst na fragmenty do `max_chars` znaków, tnąc na końcu akapitu, linii
+    albo słowa (w tej kolejności), jeśli któryś wypada w drugiej połowie fragmentu.
+    """
+    text = text.strip()
+    chunks = []
+    while len(text) > max_chars:
+        cut = -1
+        for separator in ("\n\n", "\n", " "):
+            cut = text.rfind(separator, max_chars // 2, max_chars)
+            if cut != -1:
+                break
+        if cut == -1:
+            cut = max_chars
+        chunks.append(text[:cut].strip())
+        text = text[cut:].strip()
+    if text:
+        chunks.append(text)
+    return chunks
+
+
+def pool_vectors(vectors, weights):
+    """Średnia wektorów ważona długością fragmentów (float32)."""
+    return np.average(np.asarray(vectors, dtype=np.float32), axis=0, weights=weights).astype(np.float32)
+
+
+def pool_resume(sections):
+    """
+    Z {sekcja: (wektor, waga)} zwraca (wektor CV, wektor skills) - None, gdy brak danych.
+    Wektor CV to średnia wszystkich fragmentów wszystkich sekcji.
+    """
+    if not sections:
+        return None, None
+    vectors = [vector for vector, _ in sections.values()]
+    weights = [weight for _, weight in sections.values()]
+    skills = sections.get("skills")
+    return pool_vectors(vectors, weights), (skills[0] if skills else None)
+
+
+class SectionEmbeddingStore(SQLiteStore):
+    """Wektory sekcji CV (float32) w SQLite, adresowane hashem tekstów CV i przestrzenią embeddingów."""
+
+    TABLE = "section_embeddings"
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS section_embeddings ("
+        " resume_hash TEXT NOT NULL,"
+        " namespace TEXT NOT NULL,"
+        " section TEXT NOT NULL,"
+        " weight INTEGER NOT NULL,"
+        " chunks INTEGER NOT NULL,"
+        " vector BLOB NOT NULL,"
+        " created REAL NOT NULL,"
+        " PRIMARY KEY (resume_hash, namespace, section))",
+    )
+
+    def get(self, resume_hash, namespace):
+        """Zwraca {sekcja: (wektor float32, waga)} albo None, jeśli CV nie było jeszcze embeddowane."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT section, weight, vector FROM section_embeddings WHERE resume_hash = ? AND namespace = ?",
+                (resume_hash, namespace),
+            ).fetchall()
+            if not rows:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return {section: (np.frombuffer(vector, dtype=np.float32), weight) for section, weight, vector in rows}
+
+    def put(self, resume_hash, namespace, sections, chunk_counts=None):
+        """Zapisuje {sekcja: (wektor, waga)} dla jednego CV."""
+        chunk_counts = chunk_counts or {}
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO section_embeddings"
+                " (resume_hash, namespace, section, weight, chunks, vector, created) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(resume_hash, namespace, section, int(weight), chunk_counts.get(section, 1),
+                  np.asarray(vector, dtype=np.float32).tobytes(), now)
+                 for section, (vector, weight) in sections.items()],
+            )
+            conn.commit()
+
+    def _entries(self, conn):
+        return {"resumes": conn.execute(
+            "SELECT COUNT(DISTINCT resume_hash || namespace) FROM section_embeddings").fetchone()[0]}
+
+
+_default_store = SharedInstance(lambda: SectionEmbeddingStore(SECTION_EMBEDDINGS_PATH))
+
+
+def get_section_store():
+    """Zwraca domyślny magazyn embeddingów sekcji albo None, jeśli jest wyłączony w konfiguracji."""
+    if not SECTION_EMBEDDINGS_ENABLED:
+        return None
+    return _default_store.get()
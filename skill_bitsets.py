@@ -0,0 +1,57 @@
+"""
+Umiejętności techniczne jako maski bitowe.
+Każdy termin ze słownika ma swój numer bitu, a zbiór umiejętności dokumentu to wiersz słów uint64.
+Dopasowanie oferty do całej puli kandydatów to AND z maską oferty i popcount - jedno
+wywołanie NumPy na pulę zamiast operacji na zbiorach Pythona dla każdego kandydata.
+"""
+import numpy as np
+
+WORD_BITS = 64
+_ONE = np.uint64(1)
+# np.bitwise_count jest od NumPy 2.0; starsze wersje liczą bity przez tablicę bajtów
+_bitwise_count = getattr(np, "bitwise_count", None)
+_BYTE_POPCOUNT = np.array([bin(n).count("1") for n in range(256)], dtype=np.uint8)
+
+
+def word_count(n_bits):
+    """Liczba słów uint64 potrzebna na `n_bits` bitów (co najmniej jedno)."""
+    return max(1, -(-n_bits // WORD_BITS))
+
+
+def pack_rows(offsets, ids, n_bits):
+    """
+    Listy numerów bitów w układzie CSR (wiersz r to ids[offsets[r]:offsets[r + 1]])
+    -> macierz (wiersze x słowa) uint64.
+    """
+    rows = len(offsets) - 1
+    bits = np.zeros((rows, word_count(n_bits)), dtype=np.uint64)
+    ids = np.asarray(ids, dtype=np.int64)
+    if len(ids):
+        row_of = np.repeat(np.arange(rows), np.diff(offsets))
+        np.bitwise_or.at(bits, (row_of, ids // WORD_BITS), _ONE << (ids % WORD_BITS).astype(np.uint64))
+    return bits
+
+
+def encode(terms, index, words):
+    """Zbiór terminów -> maska (słowa uint64); terminy spoza słownika `index` są pomijane."""
+    mask = np.zeros(words, dtype=np.uint64)
+    for term in terms:
+        bit = index.get(term)
+        if bit is not None:
+            mask[bit // WORD_BITS] |= _ONE << np.uint64(bit % WORD_BITS)
+    return mask
+
+
+def popcount(words):
+    """Liczba ustawionych bitów w każdym wierszu (ostatnia oś to słowa)."""
+    words = np.asarray(words, dtype=np.uint64)
+    if _bitwise_count is not None:
+        return _bitwise_count(words).sum(axis=-1, dtype=np.int64)
+    as_bytes = np.ascontiguousarray(words).view(np.uint8).reshape(words.shape[:-1] + (-1,))
+    return _BYTE_POPCOUNT[as_bytes].sum(axis=-1, dtype=np.int64)
+
+
+def and_count(bits, mask):
+    """popcount(bits & mask) - ile terminów maski ma każdy wiersz."""
+    return popcount(bits & mask)
+
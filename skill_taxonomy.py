@@ -0,0 +1,142 @@
+"""
+Taksonomia umiejętności technicznych ładowana z pliku danych (data/skills_taxonomy.json).
+Każda umiejętność ma formę kanoniczną, kategorię, listę aliasów i opcjonalną
+listę fragmentów "contains" (dopasowanie podciągiem, gdy termin nie jest aliasem). Taksonomia
+kompilowana jest raz do jednego wyrażenia regularnego w postaci trie oraz
+tablicy alias -> forma kanoniczna. Zmiana pliku jest wykrywana (mtime)
+i taksonomia przeładowywana bez restartu procesu.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from config import SKILL_TAXONOMY_PATH, SKILL_TAXONOMY_RELOAD_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+def build_trie_pattern(words):
+    """
+    Buduje wyrażenie regularne w postaci drzewa prefiksowego (trie) z listy słów.
+    Dłuższe warianty próbowane są najpierw, krótsze po nawrocie - jak w alternacji.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def render(node):
+        is_word_end = '' in node
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not is_word_end:
+            return branches[0]
+        body = '(?:' + '|'.join(branches) + ')'
+        return body + '?' if is_word_end else body
+
+    return render(trie)
+
+
+class SkillTaxonomy:
+    """Skompilowana taksonomia: matcher jednoprzebiegowy i tablice form kanonicznych."""
+
+    def __init__(self, skills, version=None):
+        self.version = version
+        self.canonical = {}
+        self.categories = {}
+        # (fragment, forma kanoniczna) w kolejności pliku - pierwszy pasujący wygrywa
+        self.contains = []
+        for skill in skills:
+            name = skill["canonical"].lower()
+            self.categories[name] = skill.get("category")
+            for alias in [name] + [a.lower() for a in skill.get("aliases", [])]:
+                self.canonical[alias] = name
+            self.contains.extend((fragment.lower(), name) for fragment in skill.get("contains", []))
+
+        self.pattern = re.compile(r'\b(' + build_trie_pattern(self.canonical) + r')\b', re.IGNORECASE)
+        # Odcisk zawartości - zmienia się przy każdej zmianie aliasów, także bez podbicia "version"
+        self.fingerprint = hashlib.sha256(
+            json.dumps([sorted(self.canonical.items()), sorted(self.categories.items()), self.contains]).encode("utf-8")
+        ).hexdigest()[:16]
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["skills"], version=data.get("version"))
+
+    def __len__(self):
+        return len(self.categories)
+
+    def normalize(self, term):
+        """
+        Zwraca formę kanoniczną aliasu; gdy termin nie jest aliasem - formę kanoniczną pierwszej
+        umiejętności, której fragment "contains" występuje w terminie (np. "Node" -> "node.js"),
+        a w ostateczności sam termin małymi literami.
+        """
+        term_lower = term.lower()
+        name = self.canonical.get(term_lower)
+        if name is not None:
+            return name
+        for fragment, name in self.contains:
+            if fragment in term_lower:
+                return name
+        return term_lower
+
+    def extract(self, text):
+        """Zwraca zbiór form kanonicznych wszystkich umiejętności znalezionych w tekście."""
+        canonical = self.canonical
+        return {canonical[term] for term in set(self.pattern.findall(text.lower()))}
+
+    def category(self, canonical_name):
+        return self.categories.get(canonical_name)
+
+
+class _ReloadingTaxonomy:
+    """Trzyma aktualną taksonomię i przeładowuje ją, gdy zmieni się plik (sprawdzane co kilka sekund)."""
+
+    def __init__(self, path, reload_interval):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._mtime = os.path.getmtime(path)
+        self._taxonomy = SkillTaxonomy.from_file(path)
+        self._checked_at = time.monotonic()
+
+    def get(self):
+        now = time.monotonic()
+        if self.reload_interval and now - self._checked_at >= self.reload_interval:
+            with self._lock:
+                if now - self._checked_at >= self.reload_interval:
+                    self._checked_at = now
+                    self._reload_if_changed()
+        return self._taxonomy
+
+    def _reload_if_changed(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+            if mtime == self._mtime:
+                return
+            taxonomy = SkillTaxonomy.from_file(self.path)
+        except (OSError, ValueError, KeyError) as e:
+            # Plik w trakcie edycji albo niepoprawny - zostajemy przy poprzedniej wersji
+            logger.warning("Nie udało się przeładować taksonomii %s: %s", self.path, e)
+            return
+        self._mtime = mtime
+        self._taxonomy = taxonomy
+        logger.info("Przeładowano taksonomię %s (%d umiejętności)", self.path, len(taxonomy))
+
+
+_current = _ReloadingTaxonomy(SKILL_TAXONOMY_PATH, SKILL_TAXONOMY_RELOAD_INTERVAL)
+
+
+def get_taxonomy():
+    """Zwraca aktualną (ewentualnie przeładowaną) taksonomię umiejętności."""
+    return _current.get()
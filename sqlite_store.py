@@ -0,0 +1,84 @@
+"""
+Wspólna baza trwałych magazynów w SQLite (cache embeddingów, dokumentów, wyników, embeddingów sekcji).
+Jedno połączenie na obiekt, tworzone leniwie (WAL - czytać i pisać może wiele procesów naraz),
+dostęp z wielu wątków pod blokadą obiektu. Podklasy podają tabelę i instrukcje tworzące schemat.
+"""
+import os
+import sqlite3
+import threading
+
+
+class SQLiteStore:
+    """Połączenie, blokada i liczniki trafień magazynu w jednym pliku SQLite."""
+
+    # Tabela liczona w stats() i czyszczona w clear()
+    TABLE = None
+    # Instrukcje wykonywane przy pierwszym połączeniu (CREATE TABLE / INDEX IF NOT EXISTS)
+    SCHEMA = ()
+    PRAGMAS = ("PRAGMA journal_mode=WAL",)
+
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        """Zwraca połączenie (tworzone przy pierwszym użyciu); wywoływane pod self._lock."""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            for statement in self.PRAGMAS + tuple(self.SCHEMA):
+                conn.execute(statement)
+            conn.commit()
+            self._conn = conn
+            self._on_connect()
+        return self._conn
+
+    def _on_connect(self):
+        """Hak po otwarciu połączenia (np. porządki w cache)."""
+
+    def _entries(self, conn):
+        """Liczniki zawartości do stats() - domyślnie liczba wierszy tabeli."""
+        return {"entries": conn.execute(f"SELECT COUNT(*) FROM {self.TABLE}").fetchone()[0]}
+
+    def stats(self):
+        with self._lock:
+            entries = self._entries(self._connect())
+        return {"hits": self.hits, "misses": self.misses, **entries, "path": self.path}
+
+    def clear(self):
+        """Usuwa wszystkie wpisy i zeruje liczniki."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(f"DELETE FROM {self.TABLE}")
+            conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class SharedInstance:
+    """Obiekt tworzony raz na proces przy pierwszym get() - pod blokadą, więc wątki dostają ten sam."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+                instance = self._instance
+        return instance
@@ -2,16 +2,34 @@
 Testy jednostkowe dla AI HR Candidate Analyzer
 Sprawdzają trafność ocen dopasowania CV do ofert pracy
 """
+import random
+import re
+import time
 import unittest
+from unittest import mock
+
+import numpy as np
+
+import analyzer
+from embeddings import AzureOpenAIEmbeddingProvider
+from feature_store import SENIORITY_NAMES
+from test_support import disable_persistent_stores
 from analyzer import (
     extract_technical_terms, 
     extract_keywords,
     extract_seniority_level,
     extract_experience_years,
     normalize_tech_term,
-    parse_job_requirements
+    parse_job_requirements,
+    JobProfile,
+    analyze_candidate,
+    rank_candidates
 )
 
+def setUpModule():
+    disable_persistent_stores()
+
+
 class TestTechnicalTermsExtraction(unittest.TestCase):
     """Testy ekstrakcji terminów technicznych"""
     
@@ -37,7 +55,16 @@ class TestTechnicalTermsExtraction(unittest.TestCase):
         for variant in sql_variants:
             terms = extract_technical_terms(variant)
             self.assertIn('sql', terms, f"Failed for: {variant}")
-    
+
+    def test_normalize_substring_fallback(self):
+        """Terminy spoza aliasów mapowane podciągiem jak przed taksonomią"""
+        self.assertEqual(normalize_tech_term("Node"), "node.js")
+        self.assertEqual(normalize_tech_term("NodeJS 18"), "node.js")
+        self.assertEqual(normalize_tech_term("PostgreSQL 15"), "sql")
+        self.assertEqual(normalize_tech_term("Azure SQL"), "sql")
+        self.assertEqual(normalize_tech_term("MySQL"), "sql")
+        self.assertEqual(normalize_tech_term("Kotlin"), "kotlin")
+
     def test_frameworks_detection(self):
         """Test rozpoznawania frameworków"""
         text = "React, Django, Flask, Angular, Vue.js"
@@ -49,6 +76,37 @@ class TestTechnicalTermsExtraction(unittest.TestCase):
         self.assertIn('angular', terms)
         self.assertIn('vue', terms)
 
+    def test_single_pass_matches_legacy_patterns(self):
+        """Jednoprzebiegowy matcher daje te same wyniki co dawne sześć wzorców"""
+        legacy_patterns = [
+            r'\b(python|java|javascript|typescript|c\+\+|c#|ruby|php|swift|kotlin|go|rust)\b',
+            r'\b(react|angular|vue|django|flask|spring|node\.?js|express|fastapi)\b',
+            r'\b(docker|kubernetes|aws|azure|gcp|terraform|jenkins|gitlab|github)\b',
+            r'\b(sql|postgresql|postgres|mysql|mssql|mongodb|redis|elasticsearch|oracle|sqlite|mariadb)\b',
+            r'\b(git|agile|scrum|ci\/cd|devops|rest|api|microservices)\b',
+            r'\b(machine learning|ai|deep learning|nlp|computer vision|data science)\b',
+        ]
+        
+        def legacy_normalize(term):
+            if any(sql in term for sql in ['sql', 'postgresql', 'postgres', 'mysql', 'mssql', 'oracle', 'sqlite', 'mariadb']):
+                return 'sql'
+            return 'node.js' if 'node' in term else term
+        
+        def legacy(text):
+            found = set()
+            for pattern in legacy_patterns:
+                found.update(re.findall(pattern, text.lower(), re.IGNORECASE))
+            return {legacy_normalize(term) for term in found}
+        
+        vocabulary = ['Python', 'java', 'JavaScript', 'c++', 'C#', 'go', 'golang', 'node.js', 'NodeJS', 'node',
+                      'ci/cd', 'gitlab', 'git', 'github', 'PostgreSQL', 'sql', 'nosql', 'fastapi', 'api', 'REST',
+                      'restful', 'machine', 'learning', 'ai', 'AI-driven', 'data', 'science', 'vue.js', 'x', '2020']
+        separators = [' ', ', ', '\n', '/', '-', '.', '(', ')', '']
+        rng = random.Random(7)
+        for _ in range(500):
+            text = ''.join(rng.choice(vocabulary) + rng.choice(separators) for _ in range(rng.randint(1, 30)))
+            self.assertEqual(extract_technical_terms(text), legacy(text), text)
+
 
 class TestSeniorityLevel(unittest.TestCase):
     """Testy rozpoznawania poziomu zaawansowania"""
@@ -146,6 +204,72 @@ class TestRequirementsParser(unittest.TestCase):
         self.assertIn('python', required.lower())
         self.assertEqual(nice, "")
 
+    def test_scanner_matches_legacy_patterns(self):
+        """Liniowy skaner sekcji daje te same wyniki co dawne wzorce regex"""
+        required_patterns = [
+            r'(requirements?|required|must have|must-have|wymagania|wymagane)[:\s]+(.*?)(?=nice to have|nice-to-have|preferred|optional|mile widziane|dodatkowo|$)',
+            r'(obowiązkowe|necessary)[:\s]+(.*?)(?=nice to have|nice-to-have|preferred|optional|mile widziane|dodatkowo|$)',
+        ]
+        nice_patterns = [
+            r'(nice to have|nice-to-have|preferred|optional|mile widziane|dodatkowo|would be plus)[:\s]+(.*?)(?=\n\n|$)',
+            r'(desirable|bonus)[:\s]+(.*?)(?=\n\n|$)',
+        ]
+        
+        def legacy(job_description):
+            text_lower = job_description.lower()
+            required_section = ""
+            nice_section = ""
+            for pattern in required_patterns:
+                match = re.search(pattern, text_lower, re.IGNORECASE | re.DOTALL)
+                if match:
+                    required_section = match.group(2)
+                    break
+            if not required_section:
+                required_section = job_description
+            for pattern in nice_patterns:
+                match = re.search(pattern, text_lower, re.IGNORECASE | re.DOTALL)
+                if match:
+                    nice_section = match.group(2)
+                    break
+            return required_section, nice_section
+        
+        pieces = ['Requirements', 'requirement', 'Required', 'must have', 'Must-Have', 'Wymagania', 'obowiązkowe',
+                  'necessary', 'Nice to have', 'nice-to-have', 'preferred', 'optional', 'Mile widziane', 'dodatkowo',
+                  'would be plus', 'desirable', 'Bonus', 'bonuses', 'Python', '- Docker', 'SQL', 'team']
+        separators = [':', ': ', ' ', '\n', '\n\n', '\n\n\n', ':\n', ', ', '']
+        rng = random.Random(11)
+        for _ in range(1000):
+            text = ''.join(rng.choice(pieces) + rng.choice(separators) for _ in range(rng.randint(1, 20)))
+            self.assertEqual(parse_job_requirements(text), legacy(text), repr(text))
+    
+    def test_scanner_benchmark_50kb(self):
+        """Syntetyczne ogłoszenia 50KB (także patologiczne) parsowane w czasie liniowym"""
+        bullets = "\n".join(f"- {i} years of Python, Django, REST API and SQL experience" for i in range(1000))
+        postings = [
+            f"Senior Developer\nRequirements:\n{bullets}\n\nNice to have:\n{bullets}",
+            "required " * 6000,
+            "requirements:" + "nice-to-hav" * 5000,
+            "\n\n".join(["optional"] * 6000),
+            "x" * 50000,
+        ]
+        for posting in postings:
+            posting = posting[:50000]
+            started = time.perf_counter()
+            parse_job_requirements(posting)
+            elapsed = time.perf_counter() - started
+            self.assertLess(elapsed, 0.25, f"{elapsed:.3f}s dla {posting[:30]!r}")
+        
+        # Czas rośnie liniowo: 4x dłuższy tekst nie może być wielokrotnie wolniejszy niż 4x
+        def timed(text):
+            started = time.perf_counter()
+            for _ in range(3):
+                parse_job_requirements(text)
+            return time.perf_counter() - started
+        
+        small = timed(postings[1][:12500])
+        large = timed(postings[1][:50000])
+        self.assertLess(large, small * 12)
+
 
 class TestKeywordExtraction(unittest.TestCase):
     """Testy ekstrakcji słów kluczowych"""
@@ -199,6 +323,150 @@ class TestIntegrationScenarios(unittest.TestCase):
         self.assertGreaterEqual(resume_years, job_years)
 
 
+def fake_embedding(text):
+    """Deterministyczny embedding zastępujący wywołanie Azure OpenAI w testach"""
+    if not text or not text.strip():
+        return None
+    return [float(len(text) % 7 + 1), float(text.lower().count('python') + 1), 1.0]
+
+
+def fake_embeddings(texts):
+    return [fake_embedding(text) for text in texts]
+
+
+@mock.patch.object(analyzer, 'get_embeddings', side_effect=fake_embeddings)
+class TestJobProfileRanking(unittest.TestCase):
+    """Testy prekompilowanego profilu oferty i rankingu kandydatów"""
+    
+    JOB = """
+    Senior Python Developer, 5+ years
+    Requirements:
+    - Python, Django, PostgreSQL
+    
+    Nice to have:
+    - Docker
+    """
+    
+    RESUMES = [
+        {"skills": ["Java, Spring"], "experience": ["2 years as Junior Developer"], "education": []},
+        {"skills": ["Python, Django, PostgreSQL, Docker"], "experience": ["Senior Developer 2015-2023"], "education": []},
+        {"skills": [], "experience": [], "education": []},
+    ]
+    
+    def test_profile_matches_analyze_candidate(self, _):
+        """Wynik przez JobProfile jest identyczny z analyze_candidate"""
+        profile = JobProfile(self.JOB)
+        ranked = rank_candidates(self.RESUMES, profile)
+        
+        for result in ranked:
+            expected = analyze_candidate(self.RESUMES[result["candidate_id"]], self.JOB)
+            expected.get("debug", {}).pop("timings", None)
+            result = dict(result)
+            del result["candidate_id"]
+            self.assertEqual(result, expected)
+    
+    def test_sorted_by_score(self, _):
+        """Ranking jest posortowany malejąco po score"""
+        ranked = rank_candidates(self.RESUMES, JobProfile(self.JOB))
+        scores = [r["score"] for r in ranked]
+        
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(ranked[0]["candidate_id"], 1)
+    
+    def test_job_embedded_once(self, get_embeddings):
+        """Embedding oferty liczony raz, a wszystkie embeddingi w jednym wywołaniu paczkowym"""
+        profile = JobProfile(self.JOB)
+        rank_candidates(self.RESUMES * 10, profile)
+        
+        self.assertEqual(get_embeddings.call_count, 1)
+        self.assertEqual(get_embeddings.call_args.args[0].count(self.JOB), 1)
+    
+    def test_process_pool_matches_serial(self, _):
+        """Ekstrakcja w puli procesów daje wyniki identyczne jak szeregowa"""
+        resumes = self.RESUMES * 4
+        profile = JobProfile(self.JOB)
+        
+        self.assertEqual(rank_candidates(resumes, profile, processes=2), rank_candidates(resumes, profile))
+    
+    def test_dict_input(self, _):
+        """Słownik kandydatów zachowuje identyfikatory"""
+        ranked = rank_candidates({"anna": self.RESUMES[0], "jan": self.RESUMES[1]}, self.JOB)
+        
+        self.assertEqual([r["candidate_id"] for r in ranked], ["jan", "anna"])
+
+
+class TestEmbeddingBatching(unittest.TestCase):
+    """Testy paczkowania żądań embeddings"""
+    
+    def test_pack_respects_limits(self):
+        """Paczki nie przekraczają limitu wejść ani tokenów"""
+        texts = ["x" * 300] * 10
+        
+        self.assertEqual([len(b) for b in analyzer.pack_embedding_batches(texts, max_inputs=4, max_tokens=10**6)], [4, 4, 2])
+        self.assertEqual([len(b) for b in analyzer.pack_embedding_batches(texts, max_inputs=100, max_tokens=350)], [3, 3, 3, 1])
+    
+    def test_order_and_empty_texts(self):
+        """Wyniki w kolejności wejścia, puste teksty -> None, duplikaty wysyłane raz"""
+        def create(model, input):
+            data = [mock.Mock(index=i, embedding=[float(len(t))]) for i, t in enumerate(input)]
+            return mock.Mock(data=list(reversed(data)))
+        
+        provider = AzureOpenAIEmbeddingProvider(model='test-deployment')
+        provider._client = mock.Mock()
+        create_mock = provider._client.embeddings.create
+        create_mock.side_effect = create
+        
+        with mock.patch.object(analyzer, 'get_cache', return_value=None), \
+             mock.patch.object(analyzer, 'get_provider', return_value=provider):
+            result = analyzer.get_embeddings(["abc", "", "  ", "abcde", "abc"])
+        
+        self.assertEqual(result, [[3.0], None, None, [5.0], [3.0]])
+        self.assertEqual(create_mock.call_count, 1)
+        self.assertEqual(create_mock.call_args.kwargs['input'], ["abc", "abcde"])
+
+
+class TestVectorisedScoring(unittest.TestCase):
+    """score_components_batch daje dokładnie te same wartości co skalarne score_components"""
+    
+    JOBS = [
+        "Senior Python Developer, 5+ years\nRequirements:\n- Python, Django, PostgreSQL\n\nNice to have:\n- Docker, AWS\n",
+        "Junior developer role. Requirements: Java, Spring\nteam communication english",
+        "Mid frontend engineer with 3 years. React, TypeScript, GraphQL and testing culture",
+        "We are hiring people who like solving problems",
+    ]
+    
+    def test_matches_scalar_path(self):
+        rng = np.random.default_rng(11)
+        n = 3000
+        for job in self.JOBS:
+            profile = JobProfile(job)
+            seniority = rng.integers(0, 4, n)
+            years = rng.integers(0, 12, n)
+            keywords = rng.integers(0, len(profile.keywords) + 1, n)
+            required = rng.integers(0, len(profile.tech_required) + 1, n)
+            nice = rng.integers(0, len(profile.tech_nice) + 1, n)
+            common_all = np.minimum(required + nice, len(profile.tech_all))
+            overall = rng.uniform(-0.2, 1.0, n)
+            overall[:4] = [0.3, 0.9, 0.0, 0.6]
+            skills = np.where(rng.random(n) < 0.2, 0.0, rng.uniform(-0.2, 1.0, n))
+            
+            batch = analyzer.score_components_batch(profile, seniority, years, keywords, required, nice,
+                                                    common_all, overall, skills)
+            for i in range(n):
+                expected = analyzer.score_components(
+                    profile, SENIORITY_NAMES[int(seniority[i])], int(years[i]), int(keywords[i]), int(required[i]),
+                    int(nice[i]), int(common_all[i]), overall[i], skills[i] if skills[i] else 0)
+                rule = analyzer.RECOMMENDATION_RULES[batch["rule"][i]]
+                self.assertEqual(rule, (expected["recommendation"], expected["recommendation_reason"],
+                                        expected["recommendation_confidence"]))
+                self.assertEqual(batch["recommendation"][i], expected["recommendation"])
+                self.assertEqual(batch["recommendation_confidence"][i], expected["recommendation_confidence"])
+                for key in ("seniority_match", "experience_match", "keyword_match_ratio", "required_match_ratio",
+                            "nice_match_ratio", "tech_match_ratio", "normalized_embedding", "experience_score",
+                            "final_score"):
+                    self.assertEqual(batch[key][i], expected[key], (job, i, key))
+
+
 def run_tests():
     """Uruchom wszystkie testy"""
     loader = unittest.TestLoader()
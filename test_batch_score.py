@@ -0,0 +1,133 @@
+"""
+Testy wsadowej oceny z linii poleceń
+"""
+import csv
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import analyzer
+import batch_score
+from embeddings import get_provider
+from test_support import disable_persistent_stores
+
+def setUpModule():
+    disable_persistent_stores()
+
+
+JOB = """Python Developer
+Requirements:
+- 3+ years of Python, Django, PostgreSQL
+
+Nice to have:
+- Docker
+"""
+
+RESUMES = {
+    "anna.txt": "Skills:\nPython, Django, PostgreSQL, Docker and REST APIs\nExperience:\nPython Developer 2019-2024 at SoftHouse",
+    "jan.txt": "Skills:\nJava, Spring, Oracle databases and Maven builds\nExperience:\nJava Developer 2021-2023 at BankSoft",
+}
+
+
+class TestBatchScore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.resumes_dir = os.path.join(self.tmp.name, "resumes")
+        os.makedirs(self.resumes_dir)
+        for name, text in RESUMES.items():
+            with open(os.path.join(self.resumes_dir, name), "w", encoding="utf-8") as f:
+                f.write(text)
+        self.job_path = os.path.join(self.tmp.name, "job.txt")
+        with open(self.job_path, "w", encoding="utf-8") as f:
+            f.write(JOB)
+
+        patch = mock.patch.object(analyzer, "get_provider", return_value=get_provider("local"))
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_cli(self, output, *extra):
+        return batch_score.main(["--resumes", self.resumes_dir, "--jobs", self.job_path,
+                                 "--output", output, "--workers", "2", *extra])
+
+    def test_jsonl_output_and_resume(self):
+        output = os.path.join(self.tmp.name, "results.jsonl")
+        self.assertEqual(self.run_cli(output), 0)
+
+        with open(output, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(len(rows), 2)
+        scores = {os.path.basename(row["resume"]): row["score"] for row in rows}
+        self.assertGreater(scores["anna.txt"], scores["jan.txt"])
+
+        # Wznowienie: nic nie jest liczone ponownie, nowe CV jest dopisywane
+        with open(os.path.join(self.resumes_dir, "ola.txt"), "w", encoding="utf-8") as f:
+            f.write("Skills:\nPython and Flask for internal tools\nExperience:\nJunior Developer 2023-2024")
+        with mock.patch.object(batch_score, "score_candidate", wraps=batch_score.score_candidate) as scored:
+            self.run_cli(output, "--resume")
+        self.assertEqual(scored.call_count, 1)
+
+        with open(output, encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 3)
+
+    def test_resume_after_partial_trailing_line(self):
+        """Niepełny ostatni wiersz po przerwanym zapisie nie psuje wznowienia i jest obcinany"""
+        output = os.path.join(self.tmp.name, "results.jsonl")
+        self.run_cli(output)
+        with open(output, "a", encoding="utf-8") as f:
+            f.write('{"resume": "ola.txt", "job": "job.txt", "sco')
+
+        with open(os.path.join(self.resumes_dir, "ola.txt"), "w", encoding="utf-8") as f:
+            f.write("Skills:\nPython and Flask for internal tools\nExperience:\nJunior Developer 2023-2024")
+        with mock.patch.object(batch_score, "score_candidate", wraps=batch_score.score_candidate) as scored:
+            self.assertEqual(self.run_cli(output, "--resume"), 0)
+        self.assertEqual(scored.call_count, 1)
+
+        with open(output, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(len(rows), 3)
+        self.assertIn("score", rows[-1])
+
+    def test_csv_output(self):
+        output = os.path.join(self.tmp.name, "results.csv")
+        self.run_cli(output)
+
+        with open(output, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 2)
+        self.assertTrue(all(row["recommendation"] in ("YES", "NO") for row in rows))
+        self.assertEqual(batch_score.load_completed(output, "csv"),
+                         {(row["resume"], self.job_path) for row in rows})
+
+    def test_rerun_without_resume_overwrites(self):
+        """Ponowny przebieg bez --resume zapisuje plik od nowa - bez zdublowanych wierszy"""
+        for name in ("results.csv", "results.jsonl"):
+            output = os.path.join(self.tmp.name, name)
+            self.run_cli(output)
+            self.run_cli(output)
+
+            with open(output, encoding="utf-8", newline="") as f:
+                rows = list(csv.DictReader(f)) if name.endswith(".csv") else [json.loads(line) for line in f]
+            self.assertEqual(len(rows), 2)
+
+    def test_failures_do_not_abort(self):
+        with open(os.path.join(self.resumes_dir, "broken.pdf"), "wb") as f:
+            f.write(b"not a pdf")
+        output = os.path.join(self.tmp.name, "results.jsonl")
+
+        with mock.patch.object(batch_score, "parse_resume", side_effect=RuntimeError("Form Recognizer down")):
+            self.run_cli(output)
+
+        with open(output, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual([row["error"] for row in rows if "error" in row], ["RuntimeError: Form Recognizer down"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Test dymny benchmarku na małych danych syntetycznych
+"""
+import json
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import analyzer
+import benchmark
+from embeddings import LocalHashingEmbeddingProvider
+from resume_parser import extract_section
+
+
+class TestBenchmark(unittest.TestCase):
+    """Generator danych i zapis wyników"""
+
+    def test_generated_resume_has_sections_and_skills(self):
+        """Syntetyczne CV ma sekcje widoczne dla parsera i zadany rozmiar"""
+        text, data = benchmark.generate_resume(3000, 0.2, random.Random(1))
+        self.assertGreaterEqual(len(text), 2000)
+        self.assertTrue(extract_section(text, ["skills"]))
+        self.assertEqual(data["full_text"], text)
+
+    def test_main_writes_json_report(self):
+        """Raport zawiera percentyle dla każdej funkcji i każdego rozmiaru"""
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "bench.json")
+            benchmark.main(["--sizes", "500", "--iterations", "3", "--output", output])
+            with open(output, encoding="utf-8") as f:
+                report = json.load(f)
+
+        functions = report["results"]["500"]["functions"]
+        self.assertIn("analyzer.analyze_candidate (stub embeddings)", functions)
+        self.assertIn("resume_parser.extract_section", functions)
+        for stats in functions.values():
+            self.assertLessEqual(stats["p50_ms"], stats["p99_ms"])
+            self.assertEqual(stats["iterations"], 3)
+
+    def test_index_recall_report(self):
+        """Raport formatów indeksu: float32 jest punktem odniesienia, int8 jest najmniejszy"""
+        report = benchmark.index_recall_report(200, queries=5, k=5, dim=128)
+
+        formats = report["formats"]
+        self.assertEqual(formats["float32"]["recall"], 1.0)
+        self.assertLess(formats["int8"]["bytes_per_vector"], formats["float16"]["bytes_per_vector"])
+
+    def test_sample_index_recall(self):
+        """Recall formatów indeksu na dokumentach z katalogu (tu: pliki tekstowe i lokalne embeddingi)"""
+        with tempfile.TemporaryDirectory() as tmp:
+            resumes, jobs = os.path.join(tmp, "resumes"), os.path.join(tmp, "jobs")
+            os.makedirs(resumes)
+            os.makedirs(jobs)
+            for i, skill in enumerate(["Python Django", "Java Spring", "React TypeScript", "Go Kubernetes"]):
+                with open(os.path.join(resumes, f"cv_{i}.txt"), "w", encoding="utf-8") as f:
+                    f.write(f"Skills:\n{skill}, SQL\nExperience:\nDeveloper 2018-2023")
+            with open(os.path.join(jobs, "job.txt"), "w", encoding="utf-8") as f:
+                f.write("Python developer\nRequirements:\nPython, Django")
+
+            with mock.patch.object(analyzer, "get_provider", return_value=LocalHashingEmbeddingProvider(dim=64)), \
+                 mock.patch.object(analyzer, "get_cache", return_value=None), \
+                 mock.patch.object(analyzer, "get_section_store", return_value=None):
+                report = benchmark.sample_index_recall([resumes], [jobs], k=2)
+
+        self.assertEqual((report["candidates"], report["queries"], report["k"]), (4, 1, 2))
+        self.assertEqual(report["formats"]["float32"]["recall"], 1.0)
+        self.assertEqual(set(report["formats"]), {"float32", "float16", "int8"})
+
+    def test_engine_benchmark(self):
+        report = benchmark.engine_benchmark(2000, iterations=2, scalar_sample=200)
+
+        self.assertEqual(report["candidates"], 2000)
+        self.assertGreater(report["candidates_per_sec"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
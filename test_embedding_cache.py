@@ -0,0 +1,90 @@
+"""
+Testy trwałego cache embeddingów
+"""
+import os
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import analyzer
+from embedding_cache import EmbeddingCache
+from embeddings import AzureOpenAIEmbeddingProvider
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    """Testy cache SQLite"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "emb.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_roundtrip_exact(self):
+        """Zapisany wektor wraca bit w bit"""
+        cache = EmbeddingCache(self.path)
+        vector = [0.1, -0.25, 1e-9, 3.141592653589793]
+        cache.put("model", "tekst", vector)
+
+        self.assertEqual(cache.get("model", "tekst"), vector)
+        self.assertIsNone(cache.get("inny-model", "tekst"))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_persists_across_instances(self):
+        """Nowa instancja (np. po restarcie) widzi zapisane wpisy"""
+        EmbeddingCache(self.path).put("model", "tekst", [1.0, 2.0])
+
+        self.assertEqual(EmbeddingCache(self.path).get("model", "tekst"), [1.0, 2.0])
+
+    def test_lru_eviction(self):
+        """Po przekroczeniu limitu usuwane są najdawniej używane wpisy"""
+        cache = EmbeddingCache(self.path, max_entries=2)
+        cache.put("m", "a", [1.0])
+        time.sleep(0.01)
+        cache.put("m", "b", [2.0])
+        time.sleep(0.01)
+        cache.get("m", "a")
+        cache.put("m", "c", [3.0])
+        cache._evict()
+
+        self.assertIsNone(cache.get("m", "b"))
+        self.assertEqual(cache.get("m", "a"), [1.0])
+        self.assertEqual(cache.get("m", "c"), [3.0])
+
+    def test_age_limit(self):
+        """Wpisy starsze niż limit wieku są traktowane jak brak"""
+        cache = EmbeddingCache(self.path, max_age_days=1)
+        cache.put("m", "a", [1.0])
+
+        with mock.patch("embedding_cache.time.time", return_value=time.time() + 2 * 86400):
+            self.assertIsNone(cache.get("m", "a"))
+
+
+class TestGetEmbeddingCached(unittest.TestCase):
+    """get_embedding nie wywołuje API dla znanych tekstów"""
+
+    def test_second_call_hits_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = EmbeddingCache(os.path.join(tmp, "emb.sqlite"))
+            response = SimpleNamespace(data=[SimpleNamespace(index=0, embedding=[0.5, 0.5])])
+
+            provider = AzureOpenAIEmbeddingProvider(model="test-deployment")
+            provider._client = mock.Mock()
+            create = provider._client.embeddings.create
+            create.return_value = response
+
+            with mock.patch.object(analyzer, "get_cache", return_value=cache), \
+                 mock.patch.object(analyzer, "get_provider", return_value=provider):
+                self.assertEqual(analyzer.get_embedding("Python developer"), [0.5, 0.5])
+                self.assertEqual(analyzer.get_embedding("Python developer"), [0.5, 0.5])
+
+            self.assertEqual(create.call_count, 1)
+            cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
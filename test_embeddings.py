@@ -0,0 +1,100 @@
+"""
+Testy dostawców embeddingów
+"""
+import json
+import os
+import subprocess
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import analyzer
+from analyzer import cosine_similarity, analyze_candidate
+from embeddings import AzureOpenAIEmbeddingProvider, LocalHashingEmbeddingProvider, get_provider
+from test_support import disable_persistent_stores
+
+
+def setUpModule():
+    disable_persistent_stores()
+
+
+class TestLocalHashingProvider(unittest.TestCase):
+    """Lokalny dostawca: deterministyczny, bez sieci, sensowne podobieństwa"""
+
+    def setUp(self):
+        self.provider = LocalHashingEmbeddingProvider(dim=1024)
+
+    def test_similar_texts_are_closer(self):
+        job, similar, unrelated = self.provider.embed_batch([
+            "Senior Python developer, Django, PostgreSQL, REST API",
+            "Python Django developer with PostgreSQL and REST experience",
+            "Registered nurse, pediatric ward, patient care",
+        ])
+
+        self.assertEqual(len(job), 1024)
+        self.assertGreater(cosine_similarity(job, similar), cosine_similarity(job, unrelated) + 0.3)
+
+    def test_deterministic_across_processes(self):
+        """crc32 zamiast hash() - ten sam wektor w innym procesie"""
+        probe = ("import json; from embeddings import LocalHashingEmbeddingProvider; "
+                 "print(json.dumps(LocalHashingEmbeddingProvider(dim=64).embed_one('Python i Django').tolist()))")
+        output = subprocess.run([sys.executable, "-c", probe], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stdout
+        local = LocalHashingEmbeddingProvider(dim=64).embed_one("Python i Django").tolist()
+
+        self.assertEqual(json.loads(output), local)
+
+    def test_idf_downweights_common_terms(self):
+        corpus = [f"developer team communication candidate {i}" for i in range(50)] + ["kubernetes terraform"]
+        fitted = LocalHashingEmbeddingProvider(dim=1024).fit(corpus)
+        query = "developer kubernetes"
+
+        self.assertGreater(
+            cosine_similarity(fitted.embed_one(query), fitted.embed_one("kubernetes")),
+            cosine_similarity(self.provider.embed_one(query), self.provider.embed_one("kubernetes"))
+        )
+
+    def test_fit_changes_cache_namespace(self):
+        """Wektory po fit (i z innego korpusu) nie trafiają pod klucze wektorów bez IDF"""
+        unfitted = self.provider.cache_namespace
+        first = LocalHashingEmbeddingProvider(dim=1024).fit(["python django", "java spring"]).cache_namespace
+        second = LocalHashingEmbeddingProvider(dim=1024).fit(["python django", "go kubernetes"]).cache_namespace
+
+        self.assertEqual(unfitted, "local-hashing-1024")
+        self.assertTrue(first.startswith("local-hashing-1024-"))
+        self.assertNotEqual(first, second)
+        self.assertEqual(
+            first, LocalHashingEmbeddingProvider(dim=1024).fit(["python django", "java spring"]).cache_namespace)
+
+    def test_analyze_candidate_offline(self):
+        """Pełna analiza z lokalnym dostawcą nie dotyka Azure"""
+        resume = {"skills": ["Python, Django"], "experience": ["3 years"], "education": []}
+
+        with mock.patch.object(analyzer, "get_provider", return_value=get_provider("local")), \
+             mock.patch("openai.AzureOpenAI", side_effect=AssertionError("network")):
+            result = analyze_candidate(resume, "Python developer with Django")
+
+        self.assertGreater(result["similarity_scores"]["embedding"], 0)
+
+    def test_unknown_provider(self):
+        with self.assertRaises(ValueError):
+            get_provider("does-not-exist")
+
+
+class TestAzureDimensions(unittest.TestCase):
+    """Skrócony wymiar embeddingów Azure (parametr `dimensions`)"""
+
+    def test_dimensions_sent_and_namespaced(self):
+        provider = AzureOpenAIEmbeddingProvider(model="emb", dimensions=256)
+        create = mock.Mock(return_value=SimpleNamespace(data=[SimpleNamespace(index=0, embedding=[0.1] * 256)]))
+        provider._client = SimpleNamespace(embeddings=SimpleNamespace(create=create))
+
+        self.assertEqual(len(provider.embed_batch(["Python"])[0]), 256)
+        self.assertEqual(create.call_args.kwargs["dimensions"], 256)
+        self.assertEqual(provider.cache_namespace, "emb@256")
+        self.assertEqual(AzureOpenAIEmbeddingProvider(model="emb", dimensions=0).cache_namespace, "emb")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,206 @@
+"""
+Testy kolumnowego magazynu cech kandydatów
+"""
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import analyzer
+from analyzer import (JobProfile, extract_resume_features, ingest_features, pool_skill_matches, rank_candidates,
+                      rank_stored)
+from benchmark import generate_job_description, generate_resume
+from embeddings import LocalHashingEmbeddingProvider
+from feature_store import MAX_YEARS, FeatureRecord, FeatureStore
+from test_support import disable_persistent_stores
+
+
+def setUpModule():
+    # Bez cache embeddingów i bez sieci - lokalne embeddingi
+    disable_persistent_stores("get_cache")
+    patcher = mock.patch.object(analyzer, "get_provider", return_value=LocalHashingEmbeddingProvider(dim=64))
+    patcher.start()
+    unittest.addModuleCleanup(patcher.stop)
+
+
+def sample_pool(count, seed=3):
+    rng = random.Random(seed)
+    resumes = {f"cv_{i}.pdf": generate_resume(1200, 0.2, rng)[1] for i in range(count)}
+    resumes["empty.pdf"] = {"skills": [], "experience": [], "education": []}
+    resumes["present.pdf"] = {"skills": ["Python, Docker"], "experience": ["Senior Developer 2019-present"],
+                              "education": []}
+    return resumes, generate_job_description(1500, 0.2, rng)
+
+
+class TestFeatureStore(unittest.TestCase):
+    """Zapis i odczyt kolumn"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "features")
+        self.store = FeatureStore(self.path)
+        self.store.reset("test-schema")
+
+    def test_roundtrip(self):
+        """Cechy, wektory i etykiety wracają bez zmian; hash kończący się zerami jest odnajdywany"""
+        features = extract_resume_features("Senior Python developer, Docker, Kubernetes, 2015-2020")
+        zero_tail = "ab" * 30 + "0000"
+        self.store.append([
+            FeatureRecord(zero_tail, "anna.pdf", features, [0.5] * 4, None),
+            FeatureRecord("cd" * 32, None, None, None, None),
+        ])
+
+        reopened = FeatureStore(self.path)
+        self.assertEqual(len(reopened), 2)
+        self.assertEqual(reopened.find(zero_tail), 0)
+        self.assertEqual(reopened.features(0), features)
+        self.assertIsNone(reopened.features(1))
+        embedding, skills_embedding = reopened.embeddings(0)
+        self.assertEqual(embedding.tolist(), [0.5] * 4)
+        self.assertIsNone(skills_embedding)
+        self.assertEqual(reopened.labels(), ["anna.pdf", None])
+
+    def test_columns_are_memory_mapped(self):
+        self.store.append([FeatureRecord("ab" * 32, None, extract_resume_features("Python"), [1.0, 0.0], None)])
+
+        years = FeatureStore(self.path).column("years")
+        self.assertIsInstance(years, np.memmap)
+        self.assertFalse(years.flags.writeable)
+
+    def test_uncommitted_tail_is_discarded(self):
+        """Bajty dopisane bez zatwierdzenia w meta.json (przerwany zapis) nie psują kolejnych wierszy"""
+        self.store.append([FeatureRecord("01" * 32, "a", extract_resume_features("Python"), None, None)])
+        with open(os.path.join(self.path, "years.bin"), "ab") as f:
+            f.write(b"\xff" * 6)
+        self.store.append([FeatureRecord("02" * 32, "b", extract_resume_features("Java 5 years"), None, None)])
+
+        reopened = FeatureStore(self.path)
+        self.assertEqual([reopened.features(row).years for row in range(2)], [0, 5])
+        self.assertEqual(reopened.features(1).tech, {"java"})
+
+    def test_compact_vector_formats(self):
+        """float16 / int8: wektory wracają w przybliżeniu, pliki są 2-4 razy mniejsze, dosypanie zer działa"""
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(20, 64)).astype(np.float32)
+        records = [FeatureRecord("ff" * 32, None, None, None, None)]
+        records += [FeatureRecord(f"{i:064x}", None, extract_resume_features("Python"), vector, vector)
+                    for i, vector in enumerate(vectors)]
+        sizes = {}
+        for dtype in ("float32", "float16", "int8"):
+            self.store.reset("test-schema", dtype)
+            self.store.append(records[:1])
+            self.store.append(records[1:])
+
+            reopened = FeatureStore(self.path)
+            self.assertEqual(reopened.vector_dtype, dtype)
+            self.assertIsNone(reopened.embeddings(0)[0])
+            restored = reopened.vectors("embedding", 1)
+            self.assertEqual(restored.dtype, np.float32)
+            np.testing.assert_allclose(restored, vectors, atol=np.abs(vectors).max() / 100)
+            np.testing.assert_allclose(reopened.embeddings(5)[1], restored[4])
+            sizes[dtype] = os.path.getsize(os.path.join(self.path, "embedding.bin"))
+        self.assertEqual(sizes["float16"] * 2, sizes["float32"])
+        self.assertEqual(sizes["int8"] * 4, sizes["float32"])
+
+        with self.assertRaises(ValueError):
+            self.store.reset("test-schema", "int4")
+
+
+class TestIngestAndRank(unittest.TestCase):
+    """Ingestia cech i ocena z magazynu"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = FeatureStore(os.path.join(tmp.name, "features"))
+        self.resumes, self.job = sample_pool(30)
+
+    def test_rank_stored_matches_rank_candidates(self):
+        """Ocena z zapisanych cech jest identyczna z oceną z tekstu"""
+        ingest_features(self.resumes, self.store, batch_size=8)
+        profile = JobProfile(self.job)
+
+        with mock.patch.object(analyzer, "extract_keywords", side_effect=AssertionError("regex")):
+            stored = rank_stored(profile, FeatureStore(self.store.path))
+
+        self.assertEqual(stored, rank_candidates(self.resumes, profile))
+
+    def test_rank_stored_from_int8_vectors(self):
+        """Ranking z wektorów int8 różni się od float32 co najwyżej o punkt przez składnik embeddingu"""
+        profile = JobProfile(self.job)
+        expected = {r["candidate_id"]: r["score"] for r in rank_candidates(self.resumes, profile)}
+
+        with mock.patch.object(analyzer, "FEATURE_STORE_VECTOR_DTYPE", "int8"):
+            ingest_features(self.resumes, self.store)
+            self.assertEqual(self.store.vector_dtype, "int8")
+            stored = rank_stored(profile, self.store)
+
+        self.assertEqual(len(stored), len(expected))
+        for result in stored:
+            self.assertLessEqual(abs(result["score"] - expected[result["candidate_id"]]), 1)
+
+    def test_limit_builds_only_top_results(self):
+        """limit zwraca tych samych najlepszych kandydatów, a etykiety dekoduje tylko dla nich"""
+        ingest_features(self.resumes, self.store)
+        profile = JobProfile(self.job)
+        expected = rank_candidates(self.resumes, profile)[:5]
+
+        with mock.patch.object(analyzer, "score_resume_features", wraps=analyzer.score_resume_features) as build:
+            top = rank_stored(profile, self.store, limit=5)
+
+        self.assertEqual(top, expected)
+        self.assertLessEqual(build.call_count, 5)
+
+    def test_pool_skill_matches_equal_set_operations(self):
+        """AND + popcount na całej puli daje te same liczności co zbiory dla każdego CV"""
+        rows = ingest_features(self.resumes, self.store)
+        profile = JobProfile(self.job + "\nRequirements: Python, Haskell, COBOL\n")
+        matches = pool_skill_matches(profile, self.store)
+
+        for row, resume_data in zip(rows, self.resumes.values()):
+            tech = extract_resume_features(analyzer.resume_texts(resume_data)[1]).tech
+            self.assertEqual(matches.required[row], len(profile.tech_required & tech))
+            self.assertEqual(matches.nice[row], len(profile.tech_nice & tech))
+            self.assertEqual(matches.all[row], len(profile.tech_all & tech))
+
+    def test_incremental_append(self):
+        """Ponowna ingestia dopisuje tylko nowe CV"""
+        first = ingest_features(self.resumes, self.store)
+        extra = {"new.pdf": {"skills": ["Rust, Go"], "experience": ["Mid developer 3 years"], "education": []}}
+
+        with mock.patch.object(analyzer, "extract_resume_features", wraps=extract_resume_features) as extract:
+            rows = ingest_features({**self.resumes, **extra}, self.store)
+
+        self.assertEqual(extract.call_count, 1)
+        self.assertEqual(rows[:-1], first)
+        self.assertEqual(rows[-1], len(first))
+        self.assertEqual(len(self.store), len(first) + 1)
+
+    def test_absurd_years_are_clamped(self):
+        """Liczba lat poza zakresem int32 nie przerywa ingestii paczki"""
+        extra = {"absurd.pdf": {"skills": ["Python"], "experience": ["Senior developer 99999999999 years"],
+                                "education": []}}
+        rows = ingest_features({**self.resumes, **extra}, self.store)
+
+        self.assertEqual(len(self.store), len(self.resumes) + 1)
+        self.assertEqual(self.store.features(rows[-1]).years, MAX_YEARS)
+
+    def test_schema_change_triggers_reextraction(self):
+        ingest_features(self.resumes, self.store)
+
+        with mock.patch.object(analyzer, "FEATURE_SCHEMA_VERSION", analyzer.FEATURE_SCHEMA_VERSION + 1):
+            with self.assertRaises(ValueError):
+                rank_stored(self.job, self.store)
+            with mock.patch.object(analyzer, "extract_resume_features", wraps=extract_resume_features) as extract:
+                ingest_features(self.resumes, self.store)
+
+        self.assertEqual(extract.call_count, len(self.resumes))
+        self.assertEqual(len(self.store), len(self.resumes))
+
+
+if __name__ == "__main__":
+    unittest.main()
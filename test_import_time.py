@@ -0,0 +1,45 @@
+"""
+Budżet czasu importu - moduły analizy nie mogą ładować SDK Azure/OpenAI przy imporcie
+"""
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+# Z zapasem: bez SDK import analyzer trwa ~0.1 s, z SDK ~1 s
+IMPORT_TIME_BUDGET_SECONDS = 0.5
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+heavy = sorted({{name.split('.')[0] for name in sys.modules if name.startswith(('openai', 'azure'))}})
+print(json.dumps({{"elapsed": elapsed, "heavy": heavy}}))
+"""
+
+
+def measure_import(module):
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+class TestImportTime(unittest.TestCase):
+    """Zimny start procesów CLI, testów i workerów"""
+
+    def test_modules_import_without_sdks(self):
+        for module in ["analyzer", "resume_parser"]:
+            with self.subTest(module=module):
+                # Najlepszy z trzech pomiarów - odporność na chwilowe obciążenie maszyny
+                results = [measure_import(module) for _ in range(3)]
+                self.assertEqual(results[0]["heavy"], [], f"{module} importuje SDK przy starcie")
+                self.assertLess(min(r["elapsed"] for r in results), IMPORT_TIME_BUDGET_SECONDS)
+
+
+if __name__ == "__main__":
+    unittest.main()
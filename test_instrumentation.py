@@ -0,0 +1,88 @@
+"""
+Testy instrumentacji etapów analizy
+"""
+import unittest
+from unittest.mock import patch
+
+import analyzer
+import instrumentation
+from analyzer import analyze_candidate
+from test_support import disable_persistent_stores
+
+
+def setUpModule():
+    disable_persistent_stores()
+
+
+def fake_embeddings(texts):
+    return [[1.0, 0.5, 0.0] if text and text.strip() else None for text in texts]
+
+
+RESUME = {
+    "skills": ["Python, Django, Docker"],
+    "experience": ["Senior Developer 2015-2023"],
+    "education": ["MSc Computer Science"],
+}
+JOB = "Senior Python Developer\n5+ years\nRequirements:\nPython, Django, Kubernetes"
+
+
+class TestInstrumentation(unittest.TestCase):
+    """Pomiary w result["debug"] i eksport liczników"""
+
+    def setUp(self):
+        instrumentation.set_enabled(True)
+        instrumentation.metrics.reset()
+
+    def tearDown(self):
+        instrumentation.set_enabled(True)
+
+    @patch("analyzer.get_embeddings", side_effect=fake_embeddings)
+    def test_timings_in_debug(self, _):
+        """Wynik zawiera czasy, liczby wywołań i rozmiary wejścia etapów"""
+        timings = analyze_candidate(RESUME, JOB)["debug"]["timings"]
+
+        self.assertEqual(timings["request"], "analyze_candidate")
+        stages = timings["stages"]
+        for name in ("job_profile", "extract_keywords", "extract_technical_terms", "parse_job_requirements"):
+            self.assertIn(name, stages)
+        self.assertEqual(stages["parse_job_requirements"]["calls"], 1)
+        self.assertEqual(stages["parse_job_requirements"]["input_size"], len(JOB))
+        # ekstraktory: raz dla oferty, raz dla CV
+        self.assertEqual(stages["extract_keywords"]["calls"], 2)
+        self.assertGreaterEqual(timings["total_ms"], stages["job_profile"]["ms"])
+
+    @patch("analyzer.get_embeddings", side_effect=fake_embeddings)
+    def test_nested_trace_collects_outer_stages(self, _):
+        """Ślad otwarty wyżej (np. w main.py) obejmuje też etapy spoza analyze_candidate"""
+        with instrumentation.request_trace("screening") as trace:
+            with instrumentation.stage("parse_resume", size=123):
+                pass
+            result = analyze_candidate(RESUME, JOB)
+
+        self.assertIs(result["debug"]["timings"]["request"], "screening")
+        self.assertEqual(trace.as_dict()["stages"]["parse_resume"]["input_size"], 123)
+        self.assertEqual(instrumentation.metrics.snapshot()["requests"], {"screening": 1})
+
+    @patch("analyzer.get_embeddings", side_effect=fake_embeddings)
+    def test_disabled(self, _):
+        """Wyłączona instrumentacja nie dodaje pomiarów ani nie liczy metryk"""
+        instrumentation.set_enabled(False)
+        result = analyze_candidate(RESUME, JOB)
+
+        self.assertNotIn("timings", result["debug"])
+        self.assertEqual(instrumentation.metrics.snapshot()["stages"], {})
+
+    @patch("analyzer.get_embeddings", side_effect=fake_embeddings)
+    def test_prometheus_export(self, _):
+        """Liczniki procesu w formacie tekstowym Prometheus"""
+        analyze_candidate(RESUME, JOB)
+        analyze_candidate(RESUME, JOB)
+        text = instrumentation.metrics.render_prometheus()
+
+        self.assertIn('hr_analyzer_requests_total{request="analyze_candidate"} 2', text)
+        self.assertIn('hr_analyzer_stage_calls_total{stage="extract_keywords"} 4', text)
+        self.assertIn("# TYPE hr_analyzer_stage_seconds_total counter", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,257 @@
+"""
+Testy harmonogramu wywołań Azure (limity, ponowienia, współbieżność)
+"""
+import asyncio
+import random
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from embeddings import AzureOpenAIEmbeddingProvider, estimate_tokens
+from rate_limiter import AzureScheduler, AdaptiveConcurrency, TokenBucket, classify_error, retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class HttpError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+def make_scheduler(clock, **kwargs):
+    kwargs.setdefault("max_concurrency", 4)
+    return AzureScheduler("test", clock=clock, sleep=clock.sleep, rng=random.Random(0), **kwargs)
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Kubełek żetonów z rezerwacjami"""
+
+    def test_paces_requests_at_quota(self):
+        """Po wyczerpaniu zapasu kolejne żądania są rozłożone równo wg limitu"""
+        clock = FakeClock()
+        bucket = TokenBucket(per_minute=60, burst_seconds=2, clock=clock)  # 1/s, zapas 2
+
+        delays = [bucket.reserve() for _ in range(5)]
+        self.assertEqual(delays, [0.0, 0.0, 1.0, 2.0, 3.0])
+
+        clock.now = 10.0
+        self.assertEqual(bucket.reserve(), 0.0)
+
+    def test_refund_and_unlimited(self):
+        """Zwrot niewykorzystanych tokenów skraca oczekiwanie; limit 0 nie ogranicza"""
+        clock = FakeClock()
+        bucket = TokenBucket(per_minute=600, burst_seconds=1, clock=clock)  # 10/s, zapas 10
+        bucket.reserve(10)
+        bucket.refund(5)
+        self.assertEqual(bucket.reserve(5), 0.0)
+        self.assertEqual(TokenBucket(0, clock=clock).reserve(10 ** 9), 0.0)
+
+
+class TestAdaptiveConcurrency(unittest.TestCase):
+    """Limit współbieżności AIMD"""
+
+    def test_halves_on_throttle_and_recovers(self):
+        clock = FakeClock()
+        concurrency = AdaptiveConcurrency(8, clock=clock)
+        concurrency.on_throttle()
+        concurrency.on_throttle()  # ta sama fala 429 - bez drugiego cięcia
+        self.assertEqual(concurrency.limit, 4)
+
+        for _ in range(50):
+            concurrency.on_success()
+        self.assertEqual(concurrency.limit, 8)
+
+    def test_try_acquire_respects_limit(self):
+        concurrency = AdaptiveConcurrency(2)
+        self.assertTrue(concurrency.try_acquire())
+        self.assertTrue(concurrency.try_acquire())
+        self.assertFalse(concurrency.try_acquire())
+        concurrency.release()
+        self.assertTrue(concurrency.try_acquire())
+
+    def test_async_waiters_woken_in_order(self):
+        """Czekające korutyny dostają miejsce od razu po release, w kolejności zgłoszeń"""
+        concurrency = AdaptiveConcurrency(1)
+        order = []
+
+        async def worker(name):
+            await concurrency.acquire_async()
+            order.append(name)
+            await asyncio.sleep(0)
+            concurrency.release()
+
+        async def run():
+            await concurrency.acquire_async()
+            tasks = [asyncio.create_task(worker(name)) for name in "abc"]
+            await asyncio.sleep(0)
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            concurrency.release()
+            await asyncio.gather(*tasks)
+            return loop.time() - started
+
+        elapsed = asyncio.run(run())
+        self.assertEqual(order, ["a", "b", "c"])
+        self.assertLess(elapsed, 0.04)
+        self.assertEqual(concurrency.in_flight, 0)
+
+    def test_cancelled_async_waiter_does_not_leak_slot(self):
+        concurrency = AdaptiveConcurrency(1)
+
+        async def run():
+            await concurrency.acquire_async()
+            waiter = asyncio.create_task(concurrency.acquire_async())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            concurrency.release()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            await asyncio.sleep(0)
+
+        asyncio.run(run())
+        self.assertEqual(concurrency.in_flight, 0)
+        self.assertTrue(concurrency.try_acquire())
+
+
+class TestAzureScheduler(unittest.TestCase):
+    """Ponowienia i Retry-After"""
+
+    def test_classification(self):
+        self.assertEqual(classify_error(HttpError(429)), "throttled")
+        self.assertEqual(classify_error(HttpError(503)), "transient")
+        self.assertEqual(classify_error(ConnectionResetError()), "transient")
+        self.assertIsNone(classify_error(HttpError(400)))
+        self.assertIsNone(classify_error(ValueError("bad input")))
+        self.assertEqual(retry_after(HttpError(429, {"retry-after-ms": "1500"})), 1.5)
+        self.assertEqual(retry_after(HttpError(429, {"retry-after": "7"})), 7.0)
+
+    def test_retry_after_is_honoured(self):
+        """429 z Retry-After: czekamy co najmniej tyle, ile kazał serwer, i wstrzymujemy całą usługę"""
+        clock = FakeClock()
+        scheduler = make_scheduler(clock)
+        responses = [HttpError(429, {"retry-after": "5"}), "ok"]
+
+        def call():
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        self.assertEqual(scheduler.call(call), "ok")
+        self.assertGreaterEqual(clock.sleeps[0], 5.0)
+        self.assertEqual(scheduler.stats["throttled"], 1)
+        # limit spadł z 4 do 2, a udane ponowienie podniosło go o 1/limit
+        self.assertEqual(scheduler.concurrency.limit, 2.5)
+
+    def test_transient_errors_retried_then_raised(self):
+        """Błędy przejściowe są ponawiane do limitu prób, trwałe - zgłaszane od razu"""
+        clock = FakeClock()
+        scheduler = make_scheduler(clock, max_retries=3, base_delay=1.0)
+        calls = []
+
+        def failing():
+            calls.append(1)
+            raise HttpError(503)
+
+        with self.assertRaises(HttpError):
+            scheduler.call(failing)
+        self.assertEqual(len(calls), 4)
+        for attempt, delay in enumerate(clock.sleeps):
+            self.assertLessEqual(delay, 2 ** attempt)
+
+        calls.clear()
+        with self.assertRaises(HttpError):
+            scheduler.call(lambda: calls.append(1) or (_ for _ in ()).throw(HttpError(400)))
+        self.assertEqual(len(calls), 1)
+
+    def test_token_quota_paces_calls(self):
+        """Duże żądania czekają na tokeny zgodnie z TPM"""
+        clock = FakeClock()
+        scheduler = make_scheduler(clock, tpm=6000)  # 100 tokenów/s, zapas 1000
+        for _ in range(3):
+            scheduler.call(lambda: None, tokens=1000)
+        self.assertEqual(clock.sleeps, [10.0, 10.0])
+        self.assertEqual(clock.now, 20.0)
+
+    def test_batches_larger_than_bucket_stay_within_tpm(self):
+        """Paczki embeddingów większe niż kubełek są obciążane w całości - przepustowość <= TPM"""
+        clock = FakeClock()
+        tpm = 350000
+        scheduler = make_scheduler(clock, tpm=tpm)  # zapas ok. 58 tys. tokenów
+        text = "x" * (240000 * 3)
+        sent = []
+
+        def create(model, input):
+            sent.append(estimate_tokens(input[0]))
+            return SimpleNamespace(data=[SimpleNamespace(index=0, embedding=[0.0])],
+                                   usage=SimpleNamespace(prompt_tokens=sent[-1] - 1000))
+
+        provider = AzureOpenAIEmbeddingProvider(model="test")
+        provider._client = SimpleNamespace(embeddings=SimpleNamespace(create=create))
+        with patch("embeddings.get_scheduler", return_value=scheduler):
+            for _ in range(10):
+                provider.embed_batch([text])
+
+        used = sum(sent) - 1000 * len(sent)
+        self.assertGreater(used, scheduler.tokens.capacity)
+        # Poza początkowym zapasem kubełka zużycie nie wyprzedza kwoty minutowej
+        self.assertLessEqual(used - scheduler.tokens.capacity, clock.now * tpm / 60 + 1e-6)
+
+    def test_async_retry(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock)
+        attempts = []
+
+        async def call():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise HttpError(500)
+            return "done"
+
+        real_sleep = asyncio.sleep
+
+        async def no_wait(seconds):
+            await real_sleep(0)
+
+        with patch("rate_limiter.asyncio.sleep", new=no_wait):
+            self.assertEqual(asyncio.run(scheduler.call_async(call)), "done")
+        self.assertEqual(len(attempts), 2)
+
+    def test_embeddings_go_through_scheduler(self):
+        """Provider Azure ponawia 429 i rozlicza rzeczywiste zużycie tokenów"""
+        clock = FakeClock()
+        scheduler = make_scheduler(clock, tpm=60000)
+        attempts = []
+
+        def create(model, input):
+            attempts.append(input)
+            if len(attempts) == 1:
+                raise HttpError(429, {"retry-after": "1"})
+            return SimpleNamespace(
+                data=[SimpleNamespace(index=i, embedding=[float(i)]) for i in range(len(input))],
+                usage=SimpleNamespace(prompt_tokens=2, total_tokens=2),
+            )
+
+        provider = AzureOpenAIEmbeddingProvider(model="test")
+        provider._client = SimpleNamespace(embeddings=SimpleNamespace(create=create))
+        with patch("embeddings.get_scheduler", return_value=scheduler):
+            self.assertEqual(provider.embed_batch(["a", "b"]), [[0.0], [1.0]])
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(scheduler.stats, {"calls": 1, "retries": 1, "throttled": 1, "failures": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,274 @@
+"""
+Testy parsera CV (bez połączenia z Azure)
+"""
+import asyncio
+import os
+import random
+import re
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import mock
+
+import resume_parser
+from document_cache import DocumentCache
+from rate_limiter import AzureScheduler
+
+SAMPLE_TEXT = """Jan Kowalski
+Skills:
+Python, Django, PostgreSQL, Docker, Git, REST API development
+Experience:
+Senior Python Developer at TechCorp 2018-2023, building microservices
+Education:
+MSc Computer Science, Warsaw University of Technology
+"""
+
+
+class TestParseResumeCache(unittest.TestCase):
+    """Testy cache sparsowanych dokumentów"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pdf_path = os.path.join(self.tmp.name, "cv.pdf")
+        with open(self.pdf_path, "wb") as f:
+            f.write(b"%PDF-1.4 fake resume")
+        self.cache = DocumentCache(os.path.join(self.tmp.name, "docs.sqlite"))
+
+        client = mock.Mock()
+        client.begin_analyze_document.return_value.result.return_value = SimpleNamespace(content=SAMPLE_TEXT)
+        self.client = client
+
+        patches = [
+            mock.patch.object(resume_parser, "get_document_cache", return_value=self.cache),
+            mock.patch.object(resume_parser, "get_client", return_value=client),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_repeat_parse_uses_cache(self):
+        """Drugie parsowanie tego samego pliku nie wysyła go do Azure"""
+        first = resume_parser.parse_resume(self.pdf_path)
+        second = resume_parser.parse_resume(self.pdf_path)
+
+        self.assertEqual(first, second)
+        self.assertIn("Python", first["skills"][0])
+        self.assertEqual(self.client.begin_analyze_document.call_count, 1)
+
+    def test_version_change_rebuilds_sections(self):
+        """Zmiana wersji ekstrakcji przelicza sekcje z zapisanego tekstu, bez Azure"""
+        resume_parser.parse_resume(self.pdf_path)
+
+        with mock.patch.object(resume_parser, "SECTION_EXTRACTION_VERSION", 999), \
+             mock.patch.object(resume_parser, "build_resume_data", return_value={"rebuilt": True}) as build:
+            self.assertEqual(resume_parser.parse_resume(self.pdf_path), {"rebuilt": True})
+
+        build.assert_called_once_with(SAMPLE_TEXT)
+        self.assertEqual(self.client.begin_analyze_document.call_count, 1)
+        self.assertEqual(self.cache.get(resume_parser.file_digest(b"%PDF-1.4 fake resume"), "prebuilt-document")[2], 999)
+
+
+def legacy_extract_section(text, keywords):
+    """Poprzednia implementacja extract_section (trzy wzorce na słowo kluczowe, szukanie od początku)"""
+    text_lower = text.lower()
+    start_pos = -1
+    for keyword in keywords:
+        for pattern in [rf'\n\s*{keyword}\s*[:：]\s*', rf'\n\s*{keyword}\s*\n', rf'\n\s*{keyword}\s*[-—]\s*']:
+            match = re.search(pattern, text_lower, re.IGNORECASE)
+            if match:
+                start_pos = match.end()
+                break
+        if start_pos != -1:
+            break
+    if start_pos == -1:
+        return ""
+    remaining_text = text[start_pos:]
+    next_header = re.search(r'\n\s*[A-Z][A-Za-z\s]{2,30}[:：\n]', remaining_text)
+    if next_header and next_header.start() > 30:
+        return remaining_text[:next_header.start()].strip()
+    return remaining_text[:800].strip()
+
+
+class TestSegmentResume(unittest.TestCase):
+    """Testy jednoprzebiegowego podziału CV na sekcje"""
+
+    def test_matches_legacy_extract_section(self):
+        """Sekcje skills/experience/education identyczne z poprzednią implementacją"""
+        pieces = ["Skills", "skills", "Technical Skills", "Experience", "Work history", "Doświadczenie",
+                  "Education", "Studia", "Projects", "Python, Django and SQL on production systems",
+                  "Senior Developer at TechCorp 2018-2023", "- Docker", "MSc Computer Science"]
+        separators = [":", ": ", "\n", " - ", " — ", "\n\n", " ", ":\n  "]
+        rng = random.Random(3)
+        for _ in range(500):
+            text = "".join(rng.choice(pieces) + rng.choice(separators) for _ in range(rng.randint(1, 25)))
+            sections = resume_parser.segment_resume(text)
+            for name, keywords in resume_parser.SECTION_KEYWORDS.items():
+                expected = legacy_extract_section(text, keywords)
+                self.assertEqual(sections.get(name, {}).get("text", ""), expected, repr(text))
+                self.assertEqual(resume_parser.extract_section(text, keywords), expected, repr(text))
+
+    def test_offsets_and_other_sections(self):
+        """Sekcje mają offsety w tekście, inne nagłówki też są zwracane"""
+        text = SAMPLE_TEXT + "Certificates:\nAZ-900 Azure Fundamentals\n"
+        sections = resume_parser.segment_resume(text)
+
+        for section in sections.values():
+            self.assertEqual(text[section["start"]:section["end"]].strip(), section["text"])
+        self.assertEqual(sections["certificates"]["text"], "AZ-900 Azure Fundamentals")
+        self.assertEqual(resume_parser.build_resume_data(text)["section_offsets"]["skills"],
+                         [sections["skills"]["start"], sections["skills"]["end"]])
+
+
+class TestSharedClient(unittest.TestCase):
+    """Współdzielony klient Form Recognizer"""
+
+    def tearDown(self):
+        resume_parser._client = None
+
+    def test_client_created_once(self):
+        """get_client zwraca tego samego klienta we wszystkich wątkach, close_client go zamyka"""
+        client = mock.Mock()
+        with mock.patch.object(resume_parser, "create_client", return_value=client) as create:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                clients = list(executor.map(lambda _: resume_parser.get_client(), range(32)))
+            self.assertTrue(all(c is client for c in clients))
+            self.assertEqual(create.call_count, 1)
+
+            resume_parser.close_client()
+            client.close.assert_called_once()
+            resume_parser.get_client()
+            self.assertEqual(create.call_count, 2)
+
+    def test_pooled_client_against_stand_in(self):
+        """Prawdziwy klient SDK z pulą połączeń używa ponownie połączeń do lokalnej atrapy usługi"""
+        import benchmark_client
+
+        server = benchmark_client.StandInServer()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        client = resume_parser.create_client(server.base_url, "stand-in-key", pool_size=2)
+        try:
+            result = benchmark_client.measure("shared", lambda: client, 6, 2, server)
+        finally:
+            client.close()
+            server.shutdown()
+
+        self.assertEqual(result["documents"], 6)
+        self.assertLessEqual(result["connections"], 2)
+
+
+class FakeAsyncClient:
+    """Atrapa asynchronicznego DocumentAnalysisClient mierząca liczbę dokumentów w locie"""
+
+    def __init__(self, *args, **kwargs):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def begin_analyze_document(self, model, document):
+        if b"broken" in document:
+            raise ValueError("corrupted pdf")
+        client = self
+
+        class Poller:
+            async def result(self):
+                client.in_flight += 1
+                client.max_in_flight = max(client.max_in_flight, client.in_flight)
+                await asyncio.sleep(0.01)
+                client.in_flight -= 1
+                return SimpleNamespace(content=SAMPLE_TEXT + document.decode())
+
+        return Poller()
+
+
+class TestParseResumesAsync(unittest.TestCase):
+    """Testy asynchronicznego parsowania wielu CV"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.paths = []
+        for i in range(10):
+            path = os.path.join(self.tmp.name, f"cv_{i}.pdf")
+            with open(path, "wb") as f:
+                f.write(b"broken" if i == 3 else f"cv {i}".encode())
+            self.paths.append(path)
+        self.client = FakeAsyncClient()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def collect(self, max_concurrency):
+        async def run():
+            return [r async for r in resume_parser.parse_resumes_async(self.paths, max_concurrency=max_concurrency)]
+
+        with mock.patch.object(resume_parser, "get_document_cache", return_value=None), \
+             mock.patch.object(resume_parser, "create_async_client", return_value=self.client):
+            return asyncio.run(run())
+
+    def test_concurrency_and_failures(self):
+        """Wszystkie pliki zwrócone, błąd jednego nie przerywa partii, limit współbieżności zachowany"""
+        results = self.collect(max_concurrency=3)
+
+        self.assertEqual(sorted(r["path"] for r in results), self.paths)
+        failed = [r for r in results if r["error"]]
+        self.assertEqual([r["path"] for r in failed], [self.paths[3]])
+        self.assertIn("corrupted pdf", failed[0]["error"])
+        self.assertTrue(all(r["data"]["skills"] for r in results if not r["error"]))
+        self.assertLessEqual(self.client.max_in_flight, 3)
+        self.assertGreater(self.client.max_in_flight, 1)
+
+    def test_concurrency_capped_by_scheduler(self):
+        """max_concurrency powyżej limitu harmonogramu Form Recognizer jest obniżane do tego limitu"""
+        scheduler = AzureScheduler("form_recognizer", max_concurrency=2)
+        with mock.patch.object(resume_parser, "get_scheduler", return_value=scheduler), \
+             mock.patch.object(resume_parser.asyncio, "Semaphore", wraps=asyncio.Semaphore) as semaphore:
+            results = self.collect(max_concurrency=6)
+
+        semaphore.assert_called_once_with(2)
+        self.assertEqual(len(results), len(self.paths))
+        self.assertLessEqual(self.client.max_in_flight, 2)
+
+    def test_document_cache_runs_off_event_loop(self):
+        """Odczyt i zapis cache dokumentów nie blokują pętli zdarzeń"""
+        loop_threads = set()
+        cache_threads = []
+
+        class ThreadRecordingCache:
+            def get(self, digest, model):
+                cache_threads.append(threading.get_ident())
+                return None
+
+            def put(self, *args):
+                cache_threads.append(threading.get_ident())
+
+        async def run():
+            loop_threads.add(threading.get_ident())
+            return [r async for r in resume_parser.parse_resumes_async(self.paths, max_concurrency=3)]
+
+        with mock.patch.object(resume_parser, "get_document_cache", return_value=ThreadRecordingCache()), \
+             mock.patch.object(resume_parser, "create_async_client", return_value=self.client):
+            results = asyncio.run(run())
+
+        self.assertEqual(len(results), len(self.paths))
+        self.assertEqual(len(cache_threads), 2 * len(self.paths) - 1)  # zepsuty plik nie trafia do cache
+        self.assertFalse(loop_threads & set(cache_threads))
+
+    def test_list_resume_files(self):
+        """list_resume_files zwraca tylko pliki PDF"""
+        open(os.path.join(self.tmp.name, "notes.txt"), "w").close()
+
+        self.assertEqual(resume_parser.list_resume_files(self.tmp.name), self.paths)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+"""
+Testy magazynu wyników oceny
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import analyzer
+from analyzer import analyze_candidate, rank_candidates, score_history
+from score_cache import ScoreCache
+
+
+def fake_embeddings(texts):
+    return [[1.0, 0.5, 0.0] if text and text.strip() else None for text in texts]
+
+
+JOB = "Senior Python Developer\n5+ years\nRequirements:\nPython, Django, Kubernetes\n\nNice to have:\nDocker"
+RESUMES = {
+    "anna.pdf": {"skills": ["Python, Django, Docker, Kubernetes"], "experience": ["Senior Developer 2015-2023"]},
+    "jan.pdf": {"skills": ["Java, Spring"], "experience": ["Junior Developer 2022-2023"]},
+}
+
+
+class TestScoreCache(unittest.TestCase):
+    """Wyniki zapisywane pod (CV, oferta, wersja logiki oceny)"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ScoreCache(os.path.join(self.tmp.name, "scores.sqlite"))
+        patches = [
+            mock.patch.object(analyzer, "get_score_cache", return_value=self.cache),
+            mock.patch.object(analyzer, "get_embeddings", side_effect=fake_embeddings),
+            mock.patch.object(analyzer, "get_section_store", return_value=None),
+        ]
+        self.get_embeddings = patches[1].start()
+        patches[0].start()
+        for patch in patches:
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_repeat_analysis_served_from_cache(self):
+        """Drugie wywołanie zwraca zapisany wynik bez embeddingów i ponownej oceny"""
+        first = analyze_candidate(RESUMES["anna.pdf"], JOB)
+        second = analyze_candidate(RESUMES["anna.pdf"], JOB)
+
+        self.assertEqual(self.get_embeddings.call_count, 1)
+        for result in (first, second):
+            result["debug"].pop("timings", None)
+        self.assertEqual(first, second)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_scorer_version_change_invalidates(self):
+        """Zmiana wersji logiki oceny (np. wag) powoduje ponowną ocenę; stary wynik zostaje w historii"""
+        analyze_candidate(RESUMES["anna.pdf"], JOB)
+        with mock.patch.object(analyzer, "SCORER_VERSION", analyzer.SCORER_VERSION + 1):
+            analyze_candidate(RESUMES["anna.pdf"], JOB)
+            self.assertEqual(len(score_history(JOB)), 1)
+            self.assertEqual(len(score_history(JOB, all_versions=True)), 2)
+
+        self.assertEqual(self.get_embeddings.call_count, 2)
+
+    def test_code_fingerprint_in_version(self):
+        """Wersja zależy od kodu oceny, taksonomii i dostawcy embeddingów"""
+        version = analyzer.scorer_version()
+        self.assertIn(analyzer._scoring_code_digest(), version)
+        self.assertIn(analyzer.get_taxonomy().fingerprint, version)
+
+        analyzer._scoring_code_digest.cache_clear()
+        with mock.patch.object(analyzer.inspect, "getsource", side_effect=lambda obj: "changed " + getattr(obj, "__name__", "")):
+            self.assertNotEqual(analyzer.scorer_version(), version)
+        analyzer._scoring_code_digest.cache_clear()
+        self.assertEqual(analyzer.scorer_version(), version)
+
+    def test_new_year_invalidates(self):
+        """Otwarte zakresy lat ("2019-present") liczone są od bieżącego roku - nowy rok to nowa wersja"""
+        version = analyzer.scorer_version()
+        next_year = analyzer.date(analyzer.date.today().year + 1, 1, 1)
+        with mock.patch.object(analyzer, "date", mock.Mock(today=mock.Mock(return_value=next_year))):
+            self.assertNotEqual(analyzer.scorer_version(), version)
+
+    def test_weight_and_threshold_changes_invalidate(self):
+        """Zmiana wagi lub progu w score_components / score_components_batch zmienia wersję"""
+        version = analyzer.scorer_version()
+        for function, old, new in ((analyzer.score_components, "tech_match_ratio * 45", "tech_match_ratio * 50"),
+                                   (analyzer.score_components, "final_score >= 50", "final_score >= 55"),
+                                   (analyzer.score_components_batch, "* 45", "* 50")):
+            source = analyzer.inspect.getsource(function)
+            self.assertIn(old, source)
+            getsource = analyzer.inspect.getsource
+            changed = lambda obj: source.replace(old, new) if obj is function else getsource(obj)
+
+            analyzer._scoring_code_digest.cache_clear()
+            with mock.patch.object(analyzer.inspect, "getsource", side_effect=changed):
+                self.assertNotEqual(analyzer.scorer_version(), version)
+            analyzer._scoring_code_digest.cache_clear()
+        self.assertEqual(analyzer.scorer_version(), version)
+
+    def test_rank_scores_only_missing_candidates(self):
+        """Ranking ocenia tylko kandydatów bez zapisanego wyniku, a historia ma etykiety"""
+        analyze_candidate(RESUMES["anna.pdf"], JOB)
+        self.get_embeddings.reset_mock()
+
+        ranked = rank_candidates(RESUMES, JOB)
+
+        texts = self.get_embeddings.call_args[0][0]
+        self.assertEqual(len(texts), 3)  # sekcje Jana (skills, experience) + oferta
+        self.assertEqual([r["candidate_id"] for r in ranked], ["anna.pdf", "jan.pdf"])
+
+        history = score_history(JOB)
+        self.assertEqual([row["score"] for row in history], [r["score"] for r in ranked])
+        self.assertEqual(history[1]["label"], "jan.pdf")
+
+        self.get_embeddings.reset_mock()
+        self.assertEqual(rank_candidates(RESUMES, JOB), ranked)
+        self.get_embeddings.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
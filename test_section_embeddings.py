@@ -0,0 +1,107 @@
+"""
+Testy embeddingów sekcji CV (fragmenty, uśrednianie, magazyn)
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import analyzer
+from analyzer import JobProfile, embed_resumes, score_candidate
+from section_embeddings import SectionEmbeddingStore, chunk_text, pool_resume
+
+
+def fake_embeddings(texts):
+    return [[float(len(text)), float(text.count("Python") + 1), 1.0] if text.strip() else None for text in texts]
+
+
+LONG_EXPERIENCE = " ".join(f"Project {i}: backend services in Python and Django." for i in range(400))
+RESUME = {
+    "skills": ["Python, Django, Docker"],
+    "experience": [LONG_EXPERIENCE + " FINAL-PROJECT Kubernetes migration"],
+    "education": ["MSc Computer Science"],
+}
+
+
+class TestChunking(unittest.TestCase):
+    """Podział sekcji na fragmenty"""
+
+    def test_no_text_lost(self):
+        """Fragmenty mieszczą się w limicie, tną na spacjach i razem zawierają cały tekst"""
+        chunks = chunk_text(LONG_EXPERIENCE, max_chars=1000)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(chunk) <= 1000 for chunk in chunks))
+        self.assertEqual(" ".join(chunks).split(), LONG_EXPERIENCE.split())
+
+    def test_short_and_empty(self):
+        self.assertEqual(chunk_text("  Python  "), ["Python"])
+        self.assertEqual(chunk_text("   "), [])
+        self.assertEqual(chunk_text("x" * 25, max_chars=10), ["x" * 10, "x" * 10, "x" * 5])
+
+    def test_pooling_weights(self):
+        """Wektor CV to średnia sekcji ważona ich długością"""
+        resume, skills = pool_resume({"skills": (np.array([1.0, 0.0]), 1), "experience": (np.array([0.0, 1.0]), 3)})
+        np.testing.assert_allclose(resume, [0.25, 0.75])
+        np.testing.assert_allclose(skills, [1.0, 0.0])
+        self.assertEqual(pool_resume({}), (None, None))
+
+
+class TestSectionEmbeddings(unittest.TestCase):
+    """Embeddingi sekcji liczone raz i używane dla kolejnych ofert"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SectionEmbeddingStore(os.path.join(self.tmp.name, "documents.sqlite"))
+        patches = [
+            mock.patch.object(analyzer, "get_section_store", return_value=self.store),
+            mock.patch.object(analyzer, "get_score_cache", return_value=None),
+            mock.patch.object(analyzer, "get_embeddings", side_effect=fake_embeddings),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.get_embeddings = analyzer.get_embeddings
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_long_resume_not_truncated(self):
+        """Koniec długiej sekcji trafia do embeddingów, a każdy fragment mieści się w limicie"""
+        embed_resumes([RESUME])
+        texts = self.get_embeddings.call_args[0][0]
+
+        self.assertTrue(all(len(text) <= analyzer.EMBEDDING_CHUNK_CHARS for text in texts))
+        self.assertTrue(any("FINAL-PROJECT" in text for text in texts))
+        # skills embeddowane raz (dawniej: osobno i jako część pełnego tekstu)
+        self.assertEqual(sum("Docker" in text for text in texts), 1)
+
+    def test_sections_embedded_once_across_jobs(self):
+        """Ocena względem kolejnych ofert pobiera już tylko embedding oferty"""
+        first = score_candidate(RESUME, JobProfile("Python developer\nRequirements:\nPython, Django"))
+        self.assertEqual(self.get_embeddings.call_count, 1)
+
+        self.get_embeddings.reset_mock()
+        second_job = "Kubernetes engineer\nRequirements:\nKubernetes, Docker"
+        score_candidate(RESUME, JobProfile(second_job))
+        self.get_embeddings.assert_called_once_with([second_job])
+
+        self.assertEqual(self.store.stats()["resumes"], 1)
+        self.assertIn("score", first)
+
+    def test_stored_vectors_match_fresh(self):
+        """Wektory z magazynu są identyczne z policzonymi od nowa"""
+        fresh = embed_resumes([RESUME, {"skills": [], "experience": [], "education": []}])
+        stored = embed_resumes([RESUME])
+
+        self.assertEqual(fresh[1], (None, None))
+        for a, b in zip(fresh[0], stored[0]):
+            np.testing.assert_array_equal(a, b)
+        self.assertEqual(self.get_embeddings.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
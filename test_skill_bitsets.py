@@ -0,0 +1,49 @@
+"""
+Testy masek bitowych umiejętności
+"""
+import random
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import skill_bitsets
+from skill_bitsets import and_count, encode, pack_rows, popcount, word_count
+
+
+class TestSkillBitsets(unittest.TestCase):
+    """AND + popcount zgodne z operacjami na zbiorach"""
+
+    def setUp(self):
+        rng = random.Random(5)
+        # 150 terminów - maski na 3 słowach, z bitami na granicach słów
+        self.vocab = [f"skill{i}" for i in range(150)]
+        self.index = {term: i for i, term in enumerate(self.vocab)}
+        self.sets = [set(rng.sample(self.vocab, rng.randint(0, 12))) for _ in range(200)]
+        self.sets[0] = {"skill0", "skill63", "skill64", "skill149"}
+        ids = [self.index[term] for terms in self.sets for term in sorted(terms)]
+        offsets = np.concatenate([[0], np.cumsum([len(terms) for terms in self.sets])])
+        self.bits = pack_rows(offsets, ids, len(self.vocab))
+
+    def test_pack_rows(self):
+        self.assertEqual(self.bits.shape, (200, word_count(150)))
+        self.assertEqual(popcount(self.bits).tolist(), [len(terms) for terms in self.sets])
+        for term in ("skill0", "skill63", "skill64", "skill149"):
+            mask = encode({term}, self.index, self.bits.shape[1])
+            self.assertEqual(and_count(self.bits, mask).tolist(), [int(term in terms) for terms in self.sets])
+
+    def test_counts_match_set_operations(self):
+        job = {"skill0", "skill64", "skill100", "skill149", "unknown"}
+        mask = encode(job, self.index, self.bits.shape[1])
+
+        self.assertEqual(and_count(self.bits, mask).tolist(), [len(job & terms) for terms in self.sets])
+
+    def test_popcount_without_bitwise_count(self):
+        """Zapasowy popcount (tablica bajtów) dla NumPy < 2.0 daje te same wyniki"""
+        expected = popcount(self.bits)
+        with mock.patch.object(skill_bitsets, "_bitwise_count", None):
+            self.assertEqual(popcount(self.bits).tolist(), expected.tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+Testy taksonomii umiejętności ładowanej z pliku
+"""
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from skill_taxonomy import SkillTaxonomy, _ReloadingTaxonomy
+
+
+def write_taxonomy(path, skills):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "skills": skills}, f)
+
+
+class TestSkillTaxonomy(unittest.TestCase):
+    """Testy kompilacji i przeładowania taksonomii"""
+
+    def test_aliases_and_categories(self):
+        """Aliasy mapowane na formę kanoniczną, kategorie dostępne"""
+        taxonomy = SkillTaxonomy([
+            {"canonical": "sql", "category": "databases", "aliases": ["PostgreSQL", "mysql"]},
+            {"canonical": "power bi", "category": "analytics", "aliases": ["powerbi"]},
+        ])
+
+        self.assertEqual(taxonomy.extract("PostgreSQL, MySQL and Power BI"), {"sql", "power bi"})
+        self.assertEqual(taxonomy.normalize("MySQL"), "sql")
+        self.assertEqual(taxonomy.category("power bi"), "analytics")
+
+    def test_contains_fallback(self):
+        """Fragment "contains" dopasowywany dopiero po dokładnym aliasie i zmienia odcisk"""
+        skills = [
+            {"canonical": "node.js", "category": "frameworks", "aliases": ["nodejs"]},
+            {"canonical": "sql", "category": "databases", "aliases": ["mysql"]},
+        ]
+        plain = SkillTaxonomy(skills)
+        skills[0]["contains"] = ["node"]
+        skills[1]["contains"] = ["sql"]
+        taxonomy = SkillTaxonomy(skills)
+
+        self.assertEqual(plain.normalize("Node"), "node")
+        self.assertEqual(taxonomy.normalize("Node"), "node.js")
+        self.assertEqual(taxonomy.normalize("Azure SQL"), "sql")
+        self.assertEqual(taxonomy.normalize("nodejs"), "node.js")
+        self.assertEqual(taxonomy.normalize("Go"), "go")
+        self.assertNotEqual(plain.fingerprint, taxonomy.fingerprint)
+
+    def test_large_vocabulary(self):
+        """Tysiące terminów kompilują się do jednego wzorca"""
+        skills = [{"canonical": f"skill{i}", "category": "generated", "aliases": [f"alias{i}x"]} for i in range(5000)]
+        taxonomy = SkillTaxonomy(skills)
+
+        self.assertEqual(taxonomy.extract("skill42, alias4999x and skill5000"), {"skill42", "skill4999"})
+
+    def test_hot_reload(self):
+        """Zmiana pliku jest widoczna bez restartu, a niepoprawny plik nie psuje działającej taksonomii"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "taxonomy.json")
+            write_taxonomy(path, [{"canonical": "python", "category": "languages"}])
+            current = _ReloadingTaxonomy(path, reload_interval=0.001)
+            self.assertEqual(current.get().extract("Python and Rust"), {"python"})
+
+            write_taxonomy(path, [{"canonical": "python"}, {"canonical": "rust"}])
+            os.utime(path, (time.time() + 5, time.time() + 5))
+            time.sleep(0.01)
+            self.assertEqual(current.get().extract("Python and Rust"), {"python", "rust"})
+
+            with open(path, "w") as f:
+                f.write("{ broken")
+            os.utime(path, (time.time() + 10, time.time() + 10))
+            time.sleep(0.01)
+            self.assertEqual(current.get().extract("Python and Rust"), {"python", "rust"})
+
+
+if __name__ == "__main__":
+    unittest.main()
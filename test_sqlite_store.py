@@ -0,0 +1,63 @@
+"""
+Testy wspólnej bazy magazynów SQLite
+"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from sqlite_store import SQLiteStore, SharedInstance
+
+
+class NotesStore(SQLiteStore):
+    TABLE = "notes"
+    SCHEMA = ("CREATE TABLE IF NOT EXISTS notes (text TEXT NOT NULL)",)
+
+    def add(self, text):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("INSERT INTO notes (text) VALUES (?)", (text,))
+            conn.commit()
+
+
+class TestSQLiteStore(unittest.TestCase):
+
+    def test_schema_stats_clear_close(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = NotesStore(os.path.join(tmp, "nested", "notes.sqlite"))
+            store.add("a")
+            store.add("b")
+            store.hits = 3
+            self.assertEqual(store.stats()["entries"], 2)
+
+            store.clear()
+            self.assertEqual(store.stats(), {"hits": 0, "misses": 0, "entries": 0, "path": store.path})
+            store.close()
+
+
+class TestSharedInstance(unittest.TestCase):
+
+    def test_threads_get_one_instance(self):
+        """Wątki wołające get() naraz dostają jeden obiekt, a fabryka uruchamia się raz"""
+        created = []
+
+        def factory():
+            time.sleep(0.01)  # okno, w którym drugi wątek wszedłby do fabryki bez blokady
+            created.append(object())
+            return created[-1]
+
+        shared = SharedInstance(factory)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(shared.get())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(created), 1)
+        self.assertTrue(all(result is created[0] for result in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,21 @@
+"""
+Wspólne przygotowanie modułów testowych
+"""
+import unittest
+from unittest import mock
+
+import analyzer
+
+# Trwałe magazyny z .cache/ wyłączane w testach oceny
+PERSISTENT_STORES = ("get_score_cache", "get_section_store")
+
+
+def disable_persistent_stores(*extra):
+    """
+    Do wywołania w setUpModule: analyzer nie używa magazynu wyników ani embeddingów sekcji
+    (oraz getterów z `extra`, np. "get_cache"), więc każdy test liczy wynik od nowa.
+    """
+    for name in PERSISTENT_STORES + extra:
+        patcher = mock.patch.object(analyzer, name, return_value=None)
+        patcher.start()
+        unittest.addModuleCleanup(patcher.stop)
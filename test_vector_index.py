@@ -0,0 +1,116 @@
+"""
+Testy indeksu wektorowego kandydatów
+"""
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from analyzer import cosine_similarity
+from vector_index import CandidateIndex, MappedCandidateIndex, quantize, dequantize, recall_at_k
+
+
+class TestCandidateIndex(unittest.TestCase):
+    """Testy wyszukiwania top-k"""
+
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.vectors = rng.normal(size=(200, 16))
+        self.ids = [f"cv_{i}" for i in range(200)]
+        self.query = rng.normal(size=16)
+        self.index = CandidateIndex()
+        self.index.add_many(self.ids, self.vectors)
+
+    def test_search_matches_cosine_similarity(self):
+        """Top-k zgodne z brute-force cosine_similarity"""
+        expected = sorted(
+            ((cid, cosine_similarity(self.query, v)) for cid, v in zip(self.ids, self.vectors)),
+            key=lambda item: item[1], reverse=True
+        )[:5]
+        result = self.index.search(self.query, k=5)
+
+        self.assertEqual([cid for cid, _ in result], [cid for cid, _ in expected])
+        for (_, score), (_, expected_score) in zip(result, expected):
+            self.assertAlmostEqual(score, expected_score, places=5)
+
+    def test_remove_and_overwrite(self):
+        """Usunięty kandydat znika z wyników, a nadpisany ma nowy wektor"""
+        best_id = self.index.search(self.query, k=1)[0][0]
+        self.index.remove(best_id)
+
+        self.assertNotIn(best_id, self.index)
+        self.assertEqual(len(self.index), 199)
+        self.assertNotIn(best_id, [cid for cid, _ in self.index.search(self.query, k=199)])
+
+        self.index.add("cv_7", self.query * 3)
+        self.assertEqual(self.index.search(self.query, k=1)[0][0], "cv_7")
+        self.assertEqual(len(self.index), 199)
+
+    def test_save_load(self):
+        """Indeks po zapisie i odczycie daje te same wyniki"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "pool")
+            self.index.save(path)
+            loaded = CandidateIndex.load(path)
+
+        self.assertEqual(loaded.search(self.query, k=10), self.index.search(self.query, k=10))
+        loaded.add("new", self.query)
+        self.assertEqual(loaded.search(self.query, k=1)[0][0], "new")
+
+
+class TestCompactStorage(unittest.TestCase):
+    """Zapis float16/int8 i indeks mapowany w pamięć"""
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.index = CandidateIndex()
+        self.index.add_many([f"cv_{i}" for i in range(300)], rng.normal(size=(300, 32)))
+        self.queries = rng.normal(size=(20, 32))
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_int8_roundtrip_error_is_small(self):
+        """Kwantyzacja int8 ze skalą na wiersz odtwarza wektory z błędem poniżej pół kroku"""
+        vectors = self.index.vectors
+        data, scales = quantize(vectors, "int8")
+        self.assertEqual(data.dtype, np.int8)
+        error = np.abs(dequantize(data, scales) - vectors).max(axis=1)
+        self.assertTrue(np.all(error <= scales * 0.5 + 1e-7))
+
+    def test_mapped_float32_matches_in_memory(self):
+        """Mapowany indeks float32 (wyszukiwanie blokami) zwraca dokładnie to samo co indeks w pamięci"""
+        path = os.path.join(self.tmp.name, "pool")
+        self.index.save(path)
+        mapped = MappedCandidateIndex(path)
+
+        self.assertIsInstance(mapped.data, np.memmap)
+        self.assertFalse(mapped.data.flags.writeable)
+        for query in self.queries[:5]:
+            expected = self.index.search(query, k=7)
+            result = mapped.search(query, k=7, block_rows=64)
+            self.assertEqual([cid for cid, _ in result], [cid for cid, _ in expected])
+            for (_, score), (_, expected_score) in zip(result, expected):
+                self.assertAlmostEqual(score, expected_score, places=5)
+
+    def test_compact_formats_keep_recall(self):
+        """float16 i int8 zajmują 2x i ~4x mniej, z wysokim recall@10 względem float32"""
+        sizes = {}
+        for dtype, minimum_recall in (("float32", 1.0), ("float16", 0.99), ("int8", 0.9)):
+            path = os.path.join(self.tmp.name, dtype)
+            self.index.save(path, dtype=dtype)
+            mapped = MappedCandidateIndex(path)
+            sizes[dtype] = mapped.nbytes
+            self.assertGreaterEqual(recall_at_k(self.index, mapped, self.queries, k=10), minimum_recall)
+            self.assertEqual(len(CandidateIndex.load(path)), 300)
+
+        self.assertEqual(sizes["float16"] * 2, sizes["float32"])
+        self.assertLess(sizes["int8"] * 3, sizes["float32"])
+
+    def test_unknown_dtype(self):
+        with self.assertRaises(ValueError):
+            self.index.save(os.path.join(self.tmp.name, "pool"), dtype="int4")
+
+
+if __name__ == "__main__":
+    unittest.main()
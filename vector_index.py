@@ -0,0 +1,238 @@
+"""
+Indeks wektorowy kandydatów w pamięci.
+Embeddingi przechowywane są jako znormalizowane (L2) wektory float32 w jednej
+ciągłej macierzy, więc top-k dla oferty to jedno mnożenie macierz-wektor
+i argpartition, zamiast wywołania cosine_similarity dla każdego kandydata.
+
+Na dysku indeks może być zapisany jako float32, float16 albo int8 (kwantyzacja
+symetryczna ze skalą na wiersz) i otwierany przez MappedCandidateIndex jako
+mapowanie pamięci - bez wczytywania, tylko do odczytu, z tymi samymi stronami
+współdzielonymi przez wszystkie procesy robocze.
+"""
+import json
+import os
+
+import numpy as np
+
+STORAGE_DTYPES = ("float32", "float16", "int8")
+# Ile wierszy mapowanej macierzy przeliczamy naraz (ogranicza pamięć na konwersję do float32)
+SEARCH_BLOCK_ROWS = 65536
+
+
+def normalize_rows(vectors):
+    """Normalizuje wiersze do długości 1 (wiersze zerowe pozostają zerowe)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def quantize(vectors, dtype):
+    """
+    Zamienia znormalizowane wektory float32 na format zapisu.
+    Zwraca (dane, skale) - skale (float32, po jednej na wiersz) tylko dla int8.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == "float32":
+        return vectors, None
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        data = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return data, scales.astype(np.float32)
+    raise ValueError(f"Nieznany format zapisu: {dtype!r} (dostępne: {', '.join(STORAGE_DTYPES)})")
+
+
+def dequantize(data, scales=None):
+    """Odwrotność quantize - wektory float32."""
+    vectors = np.asarray(data, dtype=np.float32)
+    if scales is not None:
+        vectors = vectors * np.asarray(scales, dtype=np.float32)[:, None]
+    return vectors
+
+
+def _top_k(scores, k):
+    """Indeksy k największych wartości, posortowane malejąco."""
+    if k < len(scores):
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def recall_at_k(reference, approximate, queries, k=10):
+    """Średni odsetek top-k z indeksu referencyjnego (float32) odnaleziony przez indeks przybliżony."""
+    if not len(queries):
+        return 1.0
+    hits = 0
+    for query in queries:
+        expected = {candidate_id for candidate_id, _ in reference.search(query, k)}
+        found = {candidate_id for candidate_id, _ in approximate.search(query, k)}
+        hits += len(expected & found) / max(len(expected), 1)
+    return hits / len(queries)
+
+
+class CandidateIndex:
+    """Indeks top-k po podobieństwie cosinusowym dla puli kandydatów."""
+
+    def __init__(self, dim=None, capacity=1024):
+        self.dim = dim
+        self._ids = []
+        self._positions = {}
+        self._matrix = np.zeros((capacity, dim), dtype=np.float32) if dim else None
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, candidate_id):
+        return candidate_id in self._positions
+
+    @property
+    def ids(self):
+        return list(self._ids)
+
+    @property
+    def vectors(self):
+        """Widok na znormalizowane wektory (n, dim) - bez kopiowania."""
+        if self._matrix is None:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return self._matrix[:len(self._ids)]
+
+    def _reserve(self, extra):
+        needed = len(self._ids) + extra
+        if self._matrix is None:
+            self._matrix = np.zeros((max(needed, 1024), self.dim), dtype=np.float32)
+        elif needed > self._matrix.shape[0]:
+            grown = np.zeros((max(needed, 2 * self._matrix.shape[0]), self.dim), dtype=np.float32)
+            grown[:len(self._ids)] = self._matrix[:len(self._ids)]
+            self._matrix = grown
+
+    def add(self, candidate_id, vector):
+        """Dodaje albo nadpisuje wektor kandydata."""
+        self.add_many([candidate_id], [vector])
+
+    def add_many(self, candidate_ids, vectors):
+        """Dodaje wielu kandydatów naraz; istniejące identyfikatory są nadpisywane."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(candidate_ids):
+            raise ValueError("vectors musi mieć kształt (len(candidate_ids), dim)")
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Niezgodny wymiar wektora: {vectors.shape[1]} != {self.dim}")
+
+        vectors = normalize_rows(vectors)
+        self._reserve(len(candidate_ids))
+        for candidate_id, vector in zip(candidate_ids, vectors):
+            position = self._positions.get(candidate_id)
+            if position is None:
+                position = len(self._ids)
+                self._ids.append(candidate_id)
+                self._positions[candidate_id] = position
+            self._matrix[position] = vector
+
+    def remove(self, candidate_id):
+        """Usuwa kandydata (ostatni wiersz przenoszony na zwolnione miejsce)."""
+        position = self._positions.pop(candidate_id)
+        last = len(self._ids) - 1
+        if position != last:
+            moved_id = self._ids[last]
+            self._matrix[position] = self._matrix[last]
+            self._ids[position] = moved_id
+            self._positions[moved_id] = position
+        self._ids.pop()
+
+    def search(self, job_vector, k=10):
+        """Zwraca do k par (candidate_id, similarity) posortowanych malejąco po podobieństwie."""
+        n = len(self._ids)
+        if n == 0 or job_vector is None:
+            return []
+        query = normalize_rows(np.asarray(job_vector, dtype=np.float32)[None, :])[0]
+        scores = self.vectors @ query
+
+        top = _top_k(scores, min(k, n))
+        return [(self._ids[i], float(scores[i])) for i in top]
+
+    def save(self, path, dtype="float32"):
+        """
+        Zapisuje macierz do `<path>.npy` (w formacie `dtype`), skale int8 do `<path>.scales.npy`,
+        identyfikatory do `<path>.ids.json` i opis formatu do `<path>.meta.json`.
+        """
+        data, scales = quantize(self.vectors, dtype)
+        np.save(f"{path}.npy", data)
+        if scales is not None:
+            np.save(f"{path}.scales.npy", scales)
+        elif os.path.exists(f"{path}.scales.npy"):
+            os.remove(f"{path}.scales.npy")
+        with open(f"{path}.ids.json", "w", encoding="utf-8") as f:
+            json.dump(self._ids, f, ensure_ascii=False)
+        with open(f"{path}.meta.json", "w", encoding="utf-8") as f:
+            json.dump({"dtype": dtype, "dim": self.dim, "count": len(self._ids)}, f)
+
+    @classmethod
+    def load(cls, path):
+        """Wczytuje indeks zapisany przez save() do pamięci (jako float32, z możliwością zmian)."""
+        mapped = MappedCandidateIndex(path)
+        ids = mapped.ids
+        index = cls(dim=mapped.dim, capacity=max(len(ids), 1))
+        if ids:
+            index._matrix[:len(ids)] = dequantize(mapped.data, mapped.scales)
+        index._ids = ids
+        index._positions = {candidate_id: i for i, candidate_id in enumerate(ids)}
+        return index
+
+
+class MappedCandidateIndex:
+    """
+    Indeks tylko do odczytu nad plikami z CandidateIndex.save(), mapowanymi w pamięć.
+    Otwarcie nie wczytuje macierzy; wyszukiwanie przelicza ją blokami do float32.
+    """
+
+    def __init__(self, path):
+        meta_path = f"{path}.meta.json"
+        meta = {"dtype": "float32"}
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        self.path = path
+        self.dtype = meta["dtype"]
+        self.data = np.load(f"{path}.npy", mmap_mode="r")
+        self.scales = np.load(f"{path}.scales.npy", mmap_mode="r") if self.dtype == "int8" else None
+        self.dim = self.data.shape[1] if self.data.ndim == 2 else meta.get("dim")
+        with open(f"{path}.ids.json", encoding="utf-8") as f:
+            self._ids = json.load(f)
+
+    def __len__(self):
+        return len(self._ids)
+
+    @property
+    def ids(self):
+        return list(self._ids)
+
+    @property
+    def nbytes(self):
+        """Rozmiar wektorów (i skal) na dysku."""
+        return self.data.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def search(self, job_vector, k=10, block_rows=SEARCH_BLOCK_ROWS):
+        """Jak CandidateIndex.search - top-k liczone blokami, z bieżącą listą najlepszych."""
+        n = len(self._ids)
+        if n == 0 or job_vector is None:
+            return []
+        query = normalize_rows(np.asarray(job_vector, dtype=np.float32)[None, :])[0]
+        k = min(k, n)
+
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for start in range(0, n, block_rows):
+            block = np.asarray(self.data[start:start + block_rows], dtype=np.float32)
+            scores = block @ query
+            if self.scales is not None:
+                scores *= self.scales[start:start + block_rows]
+            rows = np.concatenate([best_rows, np.arange(start, start + len(block))])
+            scores = np.concatenate([best_scores, scores])
+            keep = _top_k(scores, k)
+            best_rows, best_scores = rows[keep], scores[keep]
+        return [(self._ids[row], float(score)) for row, score in zip(best_rows, best_scores)]